@@ -0,0 +1,8 @@
+# gunicorn -c config/gunicorn.py config.wsgi
+# Перед запуском задайте PROMETHEUS_MULTIPROC_DIR и очистите директорию
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """ Удаляет gauge-метрики завершившегося воркера """
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,4 +1,5 @@
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -28,6 +29,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'surveys.metrics.PrometheusMetricsMiddleware',
+    'surveys.middleware.ServerTimingMiddleware',
+    'surveys.middleware.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,6 +73,28 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: DB__REPLICA_HOSTS=host1,host2 с теми же базой и пользователем
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, (os.getenv('DB__REPLICA_HOSTS') or '').split(',')), start=1):
+    DATABASES[f'replica_{number}'] = dict(DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+# В тестах реплика - зеркало основной базы, тесты включают ее через DATABASE_REPLICAS
+if sys.argv[1:2] == ['test'] and not DATABASE_REPLICAS:
+    DATABASES['replica'] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+
+DATABASE_ROUTERS = ['surveys.db_routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи ответов результаты пользователя читаются из основной базы
+SURVEYS_REPLICA_STICKY_SECONDS = int(os.getenv('SURVEYS__REPLICA_STICKY_SECONDS') or 5)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE__BACKEND') or 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': os.getenv('CACHE__LOCATION') or '',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -88,8 +114,65 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-    ]
+        'surveys.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'surveys.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+}
+
+# Отложенная запись ответов: ответы пишутся в журнал на диске,
+# а в базу их загружает manage.py flush_answers.
+# Журнал больше MAX_BYTES становится сегментом, сегменты загружаются
+# порциями по CHUNK_SIZE ответов, FSYNC=0 отключает fsync после записи
+SURVEYS_ANSWER_SPOOL_DIR = os.getenv('SURVEYS__ANSWER_SPOOL_DIR') or None
+SURVEYS_ANSWER_SPOOL_MAX_BYTES = int(os.getenv('SURVEYS__ANSWER_SPOOL_MAX_BYTES') or 1024 * 1024)
+SURVEYS_ANSWER_SPOOL_CHUNK_SIZE = int(os.getenv('SURVEYS__ANSWER_SPOOL_CHUNK_SIZE') or 1000)
+SURVEYS_ANSWER_SPOOL_FLUSH_INTERVAL = float(os.getenv('SURVEYS__ANSWER_SPOOL_FLUSH_INTERVAL') or 1)
+SURVEYS_ANSWER_SPOOL_FSYNC = (os.getenv('SURVEYS__ANSWER_SPOOL_FSYNC') or '1') == '1'
+
+# Списки опросов и результатов без сериализаторов DRF
+SURVEYS_FAST_READS = (os.getenv('SURVEYS__FAST_READS') or '1') == '1'
+
+# GET /result/ читает готовые документы результатов (UserSurveyResult).
+# Выключено по умолчанию: перед включением постройте документы
+# manage.py rebuild_result_documents, иначе пользователи без документов получат пустой список
+SURVEYS_RESULT_DOCUMENTS = (os.getenv('SURVEYS__RESULT_DOCUMENTS') or '0') == '1'
+
+# Сколько секунд хранится ответ на POST /result/ с заголовком Idempotency-Key
+SURVEYS_IDEMPOTENCY_TTL = int(os.getenv('SURVEYS__IDEMPOTENCY_TTL') or 24 * 60 * 60)
+
+# Ограничение записи ответов: лимиты на пользователя и общий
+# (запросов в секунду и запросов подряд, пусто - без ограничения)
+# и число одновременных записей во всех процессах, сверх которого отвечаем 503.
+# Счетчики хранятся в кеше, поэтому нужен общий кеш (CACHE__BACKEND)
+SURVEYS_THROTTLE_USER_RATE = float(os.getenv('SURVEYS__THROTTLE_USER_RATE') or 0) or None
+SURVEYS_THROTTLE_USER_BURST = int(os.getenv('SURVEYS__THROTTLE_USER_BURST') or 0) or None
+SURVEYS_THROTTLE_GLOBAL_RATE = float(os.getenv('SURVEYS__THROTTLE_GLOBAL_RATE') or 0) or None
+SURVEYS_THROTTLE_GLOBAL_BURST = int(os.getenv('SURVEYS__THROTTLE_GLOBAL_BURST') or 0) or None
+SURVEYS_WRITE_CONCURRENCY = int(os.getenv('SURVEYS__WRITE_CONCURRENCY') or 0) or None
+SURVEYS_WRITE_RETRY_AFTER = int(os.getenv('SURVEYS__WRITE_RETRY_AFTER') or 1)
+
+# Доля запросов с заголовком Server-Timing и записью в лог surveys.timing
+SURVEYS_TIMING_SAMPLE_RATE = float(os.getenv('SURVEYS__TIMING_SAMPLE_RATE') or 0)
+
+# Доля запросов, в которых для /metrics считается количество SQL запросов
+SURVEYS_METRICS_QUERY_SAMPLE_RATE = float(os.getenv('SURVEYS__METRICS_QUERY_SAMPLE_RATE') or 0.1)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'surveys.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 LANGUAGE_CODE = 'ru'
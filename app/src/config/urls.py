@@ -5,6 +5,7 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from surveys.metrics import metrics_view
 from surveys.urls import router
 
 schema_view = get_schema_view(
@@ -22,6 +23,7 @@ urlpatterns = [
     re_path(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     re_path(r'^redoc/$', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     ]
 
 urlpatterns += router.urls
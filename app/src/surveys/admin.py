@@ -1,11 +1,60 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.widgets import AdminDateWidget
+from django.db import transaction
+from django.template.response import TemplateResponse
+
+from surveys.changelists import EstimatedCountPaginator, KeysetChangeList
+from surveys.cloning import clone_survey
+from surveys.documents import refresh_result_documents
 from surveys.models import Survey, Question, Choice, Answer
+from surveys.tallies import increment_tallies, decrement_tallies
+
+
+class SurveyCloneForm(forms.Form):
+    """ Даты копий опросов """
+    start_at = forms.DateField(label='Дата старта', widget=AdminDateWidget)
+    end_at = forms.DateField(label='Дата окночания', widget=AdminDateWidget)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_at, end_at = cleaned_data.get('start_at'), cleaned_data.get('end_at')
+        if start_at and end_at and start_at > end_at:
+            raise forms.ValidationError("Дата начала опроса не может быть позже даты окончания опроса")
+        return cleaned_data
 
 
 @admin.register(Survey)
 class SurveysAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'start_at', 'end_at', 'description',)
     list_display_links = ('id', 'name')
+    search_fields = ('name',)
+    actions = ('clone_surveys',)
+
+    def clone_surveys(self, request, queryset):
+        """
+        Копирует выбранные опросы с вопросами и вариантами ответа
+        на даты из промежуточной формы
+        """
+        form = SurveyCloneForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            for survey in queryset:
+                clone_survey(survey, form.cleaned_data['start_at'], form.cleaned_data['end_at'])
+            self.message_user(request, f"Скопировано опросов: {len(queryset)}", messages.SUCCESS)
+            return None
+
+        return TemplateResponse(request, 'admin/surveys/survey/clone.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Копирование опросов',
+            'opts': self.model._meta,
+            'form': form,
+            'media': self.media + form.media,
+            'queryset': queryset,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    clone_surveys.short_description = 'Копировать опросы на новые даты'
 
     def get_readonly_fields(self, request, obj=None):
         """
@@ -28,5 +77,45 @@ class ChoicesAdmin(admin.ModelAdmin):
 
 @admin.register(Answer)
 class AnswersAdmin(admin.ModelAdmin):
+    """
+    Админка таблицы ответов в сотни миллионов строк: связанные объекты
+    одним запросом, приблизительное количество, страницы по id без OFFSET
+    и поля связей без выпадающих списков всех вопросов и вариантов
+    """
     list_display = ('id', 'user_id', 'survey', 'question', 'choice', 'text')
+    list_select_related = ('survey', 'question', 'choice')
+    autocomplete_fields = ('survey',)
+    raw_id_fields = ('question', 'choice')
+    sortable_by = ()
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    change_list_template = 'admin/surveys/answer/change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def save_model(self, request, obj, form, change):
+        pairs = [(obj.user_id, obj.survey_id)]
+        if change:
+            pairs.append((form.initial['user_id'], form.initial['survey']))
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if change:
+                decrement_tallies([Answer(question_id=form.initial['question'], choice_id=form.initial['choice'])])
+            increment_tallies([obj])
+            refresh_result_documents(pairs)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            decrement_tallies([obj])
+            refresh_result_documents([obj])
+
+    def delete_queryset(self, request, queryset):
+        answers = list(queryset.only('user_id', 'survey_id', 'question_id', 'choice_id'))
+        pairs = {(answer.user_id, answer.survey_id) for answer in answers}
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            decrement_tallies(answers)
+            refresh_result_documents(list(pairs))
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SurveysConfig(AppConfig):
     name = 'surveys'
     verbose_name = 'Опросы'
+
+    def ready(self):
+        import surveys.checks  # noqa: F401
+        import surveys.signals  # noqa: F401
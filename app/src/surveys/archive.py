@@ -0,0 +1,76 @@
+import time
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from surveys.models import Survey, Answer, ArchivedAnswer
+
+ANSWER_TABLE = Answer._meta.db_table
+ARCHIVE_TABLE = ArchivedAnswer._meta.db_table
+ARCHIVE_COLUMNS = ('id', 'text', 'survey_id', 'question_id', 'choice_id', 'user_id')
+ARCHIVE_BATCH_SIZE = 5000
+
+# Порция ответов переносится одним запросом: DELETE ... RETURNING
+# передает удаленные строки в INSERT архива
+MOVE_SQL = f"""
+WITH moved AS (
+    DELETE FROM {ANSWER_TABLE}
+    WHERE survey_id = %(survey)s AND id IN (
+        SELECT id FROM {ANSWER_TABLE} WHERE survey_id = %(survey)s ORDER BY id LIMIT %(limit)s
+    )
+    RETURNING {', '.join(ARCHIVE_COLUMNS)}
+)
+INSERT INTO {ARCHIVE_TABLE} ({', '.join(ARCHIVE_COLUMNS)})
+SELECT {', '.join(ARCHIVE_COLUMNS)} FROM moved
+"""
+
+
+def get_archivable_surveys(today=None) -> list:
+    """ ID завершившихся опросов, у которых есть ответы в основной таблице """
+    today = today or timezone.now().date()
+    return list(
+        Survey.objects.filter(end_at__lt=today)
+        .annotate(has_answers=Exists(Answer.objects.filter(survey_id=OuterRef('pk'))))
+        .filter(has_answers=True)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def archive_survey_answers(survey_id: int, batch_size: int = ARCHIVE_BATCH_SIZE,
+                           pause: float = 0.0, progress=None) -> int:
+    """
+    Переносит ответы опроса в архив порциями по batch_size,
+    каждая порция - отдельная транзакция. Ответы сохраняют id,
+    поэтому счетчики и документы результатов не меняются
+
+    :param pause: пауза между порциями в секундах
+    :param progress: функция, которая получает количество перенесенных ответов
+    :return int: количество перенесенных ответов
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            moved = _move_batch(survey_id, batch_size)
+        if not moved:
+            return total
+        total += moved
+        if progress:
+            progress(total)
+        if pause:
+            time.sleep(pause)
+
+
+def _move_batch(survey_id, batch_size) -> int:
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(MOVE_SQL, {'survey': int(survey_id), 'limit': batch_size})
+            return cursor.rowcount
+
+    rows = list(Answer.objects.filter(survey_id=survey_id).order_by('id').values(*ARCHIVE_COLUMNS)[:batch_size])
+    if not rows:
+        return 0
+    ArchivedAnswer.objects.bulk_create([ArchivedAnswer(**row) for row in rows], batch_size=1000)
+    Answer.objects.filter(survey_id=survey_id, id__lte=rows[-1]['id']).delete()
+    return len(rows)
@@ -0,0 +1,118 @@
+from django.db import connection, transaction
+from django.db.models import Max
+
+from surveys.cache import invalidate_active_surveys
+from surveys.db_routers import read_from_primary
+from surveys.models import Survey, Question, Choice
+from surveys.structure import invalidate_survey_structure
+
+SURVEY_FIELDS = ('name', 'start_at', 'end_at', 'description')
+QUESTION_FIELDS = ('text', 'type')
+CHOICE_FIELDS = ('text',)
+
+
+def save_survey_document(data: dict, survey: Survey = None) -> Survey:
+    """
+    Записывает опрос с вопросами и вариантами ответа одной транзакцией
+    Новые вопросы и варианты создаются через bulk_create по уровням,
+    измененные обновляются через bulk_update, отсутствующие в документе
+    удаляются. Неизмененные строки не трогаются
+
+    :param data: опрос с вопросами (questions) и вариантами (choices);
+        вопросы и варианты с id обновляют существующие
+    :param survey: изменяемый опрос или None для нового
+    :return Survey: опрос
+    """
+    with transaction.atomic():
+        fields = {field: data[field] for field in SURVEY_FIELDS if field in data}
+        if survey is None:
+            survey = Survey.objects.create(**fields)
+        else:
+            changed = {field: value for field, value in fields.items() if getattr(survey, field) != value}
+            if changed:
+                Survey.objects.filter(pk=survey.pk).update(**changed)
+                for field, value in changed.items():
+                    setattr(survey, field, value)
+
+        if 'questions' in data:
+            sync_questions(survey, data['questions'])
+
+        # bulk_create и bulk_update не отправляют сигналы, поэтому кеши
+        # опроса сбрасываются и дата изменения обновляется здесь
+        Survey.touch(survey.pk)
+        invalidate_active_surveys()
+        invalidate_survey_structure(survey.pk)
+    return survey
+
+
+def sync_questions(survey: Survey, items: list) -> None:
+    """ Приводит вопросы и варианты опроса к списку items """
+    with read_from_primary():
+        existing = {question.id: question for question in survey.questions.prefetch_related('choices')}
+
+    new_questions, changed_questions, pairs = [], [], []
+    for item in items:
+        question = existing.get(item.get('id'))
+        if question is None:
+            question = Question(survey=survey, **_pick(item, QUESTION_FIELDS))
+            new_questions.append(question)
+        elif _update_fields(question, item, QUESTION_FIELDS):
+            changed_questions.append(question)
+        pairs.append((question, item.get('choices', [])))
+
+    removed = set(existing) - {question.id for question, _ in pairs}
+    if removed:
+        Question.objects.filter(pk__in=removed).delete()
+    Question.objects.bulk_update(changed_questions, QUESTION_FIELDS)
+    bulk_create_with_ids(Question, new_questions, survey_id=survey.pk)
+
+    new_choices, changed_choices, removed_choices = [], [], []
+    for question, choice_items in pairs:
+        current = {choice.id: choice for choice in question.choices.all()} if question.id in existing else {}
+        kept = set()
+        for item in choice_items:
+            choice = current.get(item.get('id'))
+            if choice is None:
+                new_choices.append(Choice(question=question, **_pick(item, CHOICE_FIELDS)))
+                continue
+            kept.add(choice.id)
+            if _update_fields(choice, item, CHOICE_FIELDS):
+                changed_choices.append(choice)
+        removed_choices.extend(set(current) - kept)
+
+    if removed_choices:
+        Choice.objects.filter(pk__in=removed_choices).delete()
+    Choice.objects.bulk_update(changed_choices, CHOICE_FIELDS)
+    Choice.objects.bulk_create(new_choices, batch_size=1000)
+
+
+def bulk_create_with_ids(model, objects: list, **scope) -> None:
+    """
+    bulk_create, после которого у объектов заполнены id
+    PostgreSQL возвращает id из INSERT, на остальных базах id новых
+    строк читаются по возрастанию после максимального id до вставки
+    """
+    if not objects:
+        return
+    if connection.features.can_return_ids_from_bulk_insert:
+        model.objects.bulk_create(objects, batch_size=1000)
+        return
+    last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+    model.objects.bulk_create(objects, batch_size=1000)
+    ids = model.objects.filter(id__gt=last_id, **scope).order_by('id').values_list('id', flat=True)
+    for obj, pk in zip(objects, ids):
+        obj.id = pk
+
+
+def _pick(item: dict, fields: tuple) -> dict:
+    return {field: item[field] for field in fields if field in item}
+
+
+def _update_fields(obj, item: dict, fields: tuple) -> bool:
+    """ Переносит измененные поля из item в obj, возвращает True при изменениях """
+    changed = False
+    for field, value in _pick(item, fields).items():
+        if getattr(obj, field) != value:
+            setattr(obj, field, value)
+            changed = True
+    return changed
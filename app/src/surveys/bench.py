@@ -0,0 +1,330 @@
+import datetime
+import json
+import math
+import platform
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from surveys.cache import invalidate_active_surveys
+from surveys.documents import rebuild_result_documents, refresh_result_documents, result_documents_enabled
+from surveys.models import Survey, Question, Choice, Answer
+from surveys.partitions import create_missing_partitions
+from surveys.purge import purge_survey
+from surveys.tallies import rebuild_tallies
+
+BENCH_SURVEY_PREFIX = 'bench:'
+# Пользователи бенчмарка получают id от BENCH_USER_ID_BASE + 1,
+# чтобы не пересекаться с настоящими пользователями
+BENCH_USER_ID_BASE = 2_000_000_000
+ENDPOINTS = ('survey-list', 'survey-detail', 'result-list', 'result-create', 'result-batch')
+
+
+def seed(surveys: int, questions: int, choices: int, respondents: int, rng: random.Random) -> dict:
+    """
+    Создает синтетические данные: surveys опросов по questions вопросов
+    по choices вариантов, каждый из respondents пользователей отвечает
+    на все вопросы всех опросов. Пользователи получают id
+    от BENCH_USER_ID_BASE + 1 до BENCH_USER_ID_BASE + respondents
+
+    :return dict: количество созданных объектов
+    """
+    today = timezone.now().date()
+    with transaction.atomic():
+        Survey.objects.bulk_create([
+            Survey(
+                name=f"{BENCH_SURVEY_PREFIX}{number}",
+                start_at=today,
+                end_at=today + datetime.timedelta(days=30),
+                description='Опрос для нагрузочного тестирования'
+            )
+            for number in range(surveys)
+        ])
+        survey_objects = list(Survey.objects.filter(name__startswith=BENCH_SURVEY_PREFIX).order_by('-id')[:surveys])
+        create_missing_partitions()
+
+        Question.objects.bulk_create([
+            Question(text=f"Вопрос {number}", type=Question.TYPE_RADIO, survey=survey)
+            for survey in survey_objects
+            for number in range(questions)
+        ], batch_size=1000)
+        question_objects = list(Question.objects.filter(survey__in=survey_objects))
+
+        Choice.objects.bulk_create([
+            Choice(text=f"Вариант {number}", question=question)
+            for question in question_objects
+            for number in range(choices)
+        ], batch_size=1000)
+
+        structure = get_bench_structure([survey.id for survey in survey_objects])
+        answers = 0
+        batch = []
+        for user_id in range(BENCH_USER_ID_BASE + 1, BENCH_USER_ID_BASE + respondents + 1):
+            for survey_id, survey_questions in structure.items():
+                for question_id, choice_ids in survey_questions.items():
+                    batch.append(Answer(
+                        user_id=user_id,
+                        survey_id=survey_id,
+                        question_id=question_id,
+                        choice_id=rng.choice(choice_ids) if choice_ids else None,
+                        text=None if choice_ids else 'Ответ'
+                    ))
+                    if len(batch) >= 5000:
+                        Answer.objects.bulk_create(batch)
+                        answers += len(batch)
+                        batch = []
+        Answer.objects.bulk_create(batch)
+        answers += len(batch)
+        rebuild_tallies([survey.id for survey in survey_objects])
+    if result_documents_enabled():
+        rebuild_result_documents([survey.id for survey in survey_objects])
+    invalidate_active_surveys()
+
+    return {
+        'surveys': len(survey_objects),
+        'questions': len(question_objects),
+        'choices': len(question_objects) * choices,
+        'answers': answers,
+    }
+
+
+def get_bench_structure(survey_ids=None) -> dict:
+    """ {survey_id: {question_id: [choice_id, ...]}} для опросов бенчмарка """
+    surveys = Survey.objects.filter(name__startswith=BENCH_SURVEY_PREFIX)
+    if survey_ids is not None:
+        surveys = surveys.filter(pk__in=survey_ids)
+    structure = {}
+    for survey in surveys.prefetch_related('questions__choices'):
+        structure[survey.id] = {
+            question.id: [choice.id for choice in question.choices.all()]
+            for question in survey.questions.all()
+        }
+    return structure
+
+
+def build_request(endpoint: str, structure: dict, respondents: int, rng: random.Random) -> tuple:
+    """
+    Запрос к эндпоинту со случайными параметрами
+
+    :return tuple: (метод, путь, тело JSON или None)
+    """
+    survey_id = rng.choice(list(structure))
+    questions = structure[survey_id]
+    user_id = BENCH_USER_ID_BASE + rng.randint(1, max(respondents, 1))
+
+    if endpoint == 'survey-list':
+        return 'GET', reverse('survey-list'), None
+    if endpoint == 'survey-detail':
+        return 'GET', reverse('survey-detail', args=(survey_id,)), None
+    if endpoint == 'result-list':
+        return 'GET', f"{reverse('result-list')}?user_id={user_id}", None
+    if endpoint == 'result-create':
+        question_id = rng.choice(list(questions))
+        return 'POST', reverse('result-list'), {
+            'user_id': user_id,
+            'survey': survey_id,
+            'question': question_id,
+            **_answer_value(questions[question_id], rng),
+        }
+    if endpoint == 'result-batch':
+        return 'POST', reverse('result-batch'), {
+            'user_id': user_id,
+            'survey': survey_id,
+            'answers': [
+                {'question': question_id, **_answer_value(choice_ids, rng)}
+                for question_id, choice_ids in questions.items()
+            ],
+        }
+    raise ValueError(f"Неизвестный эндпоинт {endpoint}")
+
+
+def run(endpoints, requests: int, respondents: int, rng: random.Random,
+        base_url: str = None, concurrency: int = 1, warmup: int = 5, cleanup: bool = True) -> dict:
+    """
+    Выполняет requests запросов к каждому эндпоинту
+
+    Без base_url запросы выполняются в процессе через django.test.Client
+    и для каждого считается количество SQL запросов. С base_url запросы
+    отправляются по HTTP в concurrency потоков.
+    С cleanup ответы, записанные прогоном, удаляются после него
+
+    :return dict: отчет, пригодный для сохранения в JSON
+    """
+    structure = get_bench_structure()
+    if not structure:
+        raise ValueError('Нет данных для нагрузочного тестирования, запустите bench_seed')
+    last_answer_id = Answer.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    try:
+        return _run(endpoints, requests, respondents, rng, structure, base_url, concurrency, warmup)
+    finally:
+        if cleanup:
+            remove_run_answers(list(structure), last_answer_id)
+
+
+def remove_run_answers(survey_ids: list, last_answer_id: int) -> int:
+    """
+    Удаляет ответы, записанные прогоном в опросы бенчмарка после last_answer_id,
+    и пересчитывает счетчики и документы результатов этих опросов
+
+    :return int: количество удаленных ответов
+    """
+    answers = Answer.objects.filter(
+        survey_id__in=survey_ids, id__gt=last_answer_id, user_id__gt=BENCH_USER_ID_BASE
+    )
+    with transaction.atomic():
+        pairs = list(answers.values_list('user_id', 'survey_id').distinct())
+        count, _ = answers.delete()
+        rebuild_tallies(survey_ids)
+        refresh_result_documents(pairs)
+    return count
+
+
+def remove_bench_data(batch_size: int = 5000) -> int:
+    """
+    Удаляет опросы бенчмарка вместе с ответами порциями (purge_survey)
+
+    :return int: количество удаленных опросов
+    """
+    survey_ids = list(Survey.objects.filter(name__startswith=BENCH_SURVEY_PREFIX).values_list('id', flat=True))
+    for survey_id in survey_ids:
+        purge_survey(survey_id, batch_size=batch_size)
+    return len(survey_ids)
+
+
+def _run(endpoints, requests, respondents, rng, structure, base_url, concurrency, warmup):
+    report = {
+        'started_at': timezone.now().isoformat(),
+        'mode': 'http' if base_url else 'in-process',
+        'base_url': base_url,
+        'concurrency': concurrency if base_url else 1,
+        'requests': requests,
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'endpoints': {},
+    }
+    for endpoint in endpoints:
+        plan = [build_request(endpoint, structure, respondents, rng) for _ in range(warmup + requests)]
+        if base_url:
+            results, elapsed = _run_http(base_url, plan, concurrency, warmup)
+        else:
+            results, elapsed = _run_in_process(plan, warmup)
+        report['endpoints'][endpoint] = summarize(results, elapsed)
+    return report
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    """
+    Сводка по результатам запросов
+
+    :param results: список (статус, длительность в секундах, количество SQL запросов или None)
+    :param elapsed: общее время выполнения в секундах
+    """
+    latencies = sorted(duration * 1000 for _, duration, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        'count': len(results),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': round(latencies[-1], 3) if latencies else None,
+        },
+        'queries_per_request': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+        'statuses': dict(Counter(str(status) for status, _, _ in results)),
+    }
+
+
+def percentile(values: list, rank: float):
+    """ Перцентиль по методу ближайшего ранга для отсортированного списка """
+    if not values:
+        return None
+    index = max(0, math.ceil(len(values) * rank / 100) - 1)
+    return round(values[index], 3)
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """
+    Изменение p50/p95/p99 и количества SQL запросов относительно прошлого прогона
+
+    :return dict: {эндпоинт: {метрика: (было, стало)}}
+    """
+    changes = {}
+    for endpoint, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous:
+            continue
+        changes[endpoint] = {
+            metric: (previous['latency_ms'][metric], current['latency_ms'][metric])
+            for metric in ('p50', 'p95', 'p99')
+        }
+        changes[endpoint]['queries'] = (
+            previous['queries_per_request']['mean'],
+            current['queries_per_request']['mean'],
+        )
+    return changes
+
+
+def _answer_value(choice_ids, rng):
+    if choice_ids:
+        return {'choice': rng.choice(choice_ids)}
+    return {'text': 'Ответ'}
+
+
+def _run_in_process(plan, warmup):
+    client = Client()
+    results = []
+    started = None
+    for number, (method, path, body) in enumerate(plan):
+        if number == warmup:
+            started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            begin = time.perf_counter()
+            if method == 'GET':
+                response = client.get(path)
+            else:
+                response = client.post(path, data=json.dumps(body), content_type='application/json')
+            duration = time.perf_counter() - begin
+        if number >= warmup:
+            results.append((response.status_code, duration, len(queries)))
+    return results, time.perf_counter() - (started or time.perf_counter())
+
+
+def _run_http(base_url, plan, concurrency, warmup):
+    base_url = base_url.rstrip('/')
+
+    def send(request):
+        method, path, body = request
+        data = json.dumps(body).encode() if body is not None else None
+        http_request = urllib.request.Request(
+            base_url + path,
+            data=data,
+            method=method,
+            headers={'Content-Type': 'application/json'}
+        )
+        begin = time.perf_counter()
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        return status, time.perf_counter() - begin, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, plan[:warmup]))
+        started = time.perf_counter()
+        results = list(executor.map(send, plan[warmup:]))
+    return results, time.perf_counter() - started
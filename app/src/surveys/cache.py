@@ -0,0 +1,103 @@
+import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from surveys.db_routers import read_from_primary
+from surveys.models import Survey
+from surveys.renderers import render_json
+from surveys.serializers import SurveysRetrieveSerializer
+from surveys.timing import timed
+
+ACTIVE_SURVEYS_KEY = 'surveys:active'
+ACTIVE_SURVEYS_MODIFIED_KEY = 'surveys:active:modified'
+SURVEY_SNAPSHOT_KEY = 'surveys:snapshot:{}:{}'
+# Документ хранится под версией опроса, документы старых версий истекают сами
+SURVEY_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+
+def get_active_surveys() -> list:
+    """
+    Возвращает список активных опросов из кеша
+    Запись в кеше действительна до ближайшей даты
+    старта или окончания какого-либо опроса и пока не изменилось время
+    сброса кеша (get_active_surveys_modified): список, построенный до коммита
+    изменения и записанный после сброса, не будет прочитан.
+    Кеш строится по основной базе, чтобы не закешировать отставшую реплику
+
+    :return list: опросы, отсортированные по id
+    """
+    today = timezone.now().date()
+    modified = get_active_surveys_modified()
+    entry = cache.get(ACTIVE_SURVEYS_KEY)
+    if entry and entry['modified'] == modified and entry['valid_from'] <= today \
+            and (entry['valid_until'] is None or today < entry['valid_until']):
+        return entry['surveys']
+
+    surveys = []
+    boundaries = []
+    with read_from_primary():
+        candidates = list(Survey.objects.filter(end_at__gte=today).order_by('id'))
+    for survey in candidates:
+        if survey.start_at <= today:
+            surveys.append(survey)
+            boundaries.append(survey.end_at + datetime.timedelta(days=1))
+        else:
+            boundaries.append(survey.start_at)
+
+    valid_until = min(boundaries) if boundaries else None
+    entry = {'surveys': surveys, 'modified': modified, 'valid_from': today, 'valid_until': valid_until}
+    cache.set(ACTIVE_SURVEYS_KEY, entry, timeout=_seconds_until(valid_until))
+    return surveys
+
+
+def invalidate_active_surveys() -> None:
+    """
+    Сбрасывает кеш активных опросов сразу и повторно после коммита:
+    меняет время сброса, с которым сверяется запись в кеше, поэтому
+    параллельный запрос не закеширует незакоммиченное или старое состояние
+    """
+    cache.set(ACTIVE_SURVEYS_MODIFIED_KEY, timezone.now(), timeout=None)
+    transaction.on_commit(lambda: cache.set(ACTIVE_SURVEYS_MODIFIED_KEY, timezone.now(), timeout=None))
+
+
+def get_active_surveys_modified() -> datetime.datetime:
+    """
+    Время последнего сброса кеша активных опросов, в том числе
+    при удалении опроса. Если время потеряно вместе с кешем,
+    отсчет начинается заново с текущего момента
+    """
+    now = timezone.now()
+    cache.add(ACTIVE_SURVEYS_MODIFIED_KEY, now, timeout=None)
+    return cache.get(ACTIVE_SURVEYS_MODIFIED_KEY, now)
+
+
+def get_survey_snapshot(survey: Survey) -> bytes:
+    """
+    Возвращает детали опроса в виде готового JSON
+    Документ строится один раз для каждой версии опроса: ключ содержит
+    updated_at, который меняется при изменении опроса, его вопросов или
+    вариантов ответа. Документ, построенный до коммита изменения,
+    остается под старой версией, и сбрасывать его не нужно
+
+    :param survey: опрос
+    :return bytes: тело ответа SurveysRetrieveSerializer
+    """
+    key = SURVEY_SNAPSHOT_KEY.format(survey.id, survey.updated_at.timestamp())
+    content = cache.get(key)
+    if content is None:
+        with read_from_primary():
+            prefetch_related_objects([survey], 'questions__choices')
+        with timed('serialize'):
+            content = render_json(SurveysRetrieveSerializer(survey).data)
+        cache.set(key, content, timeout=SURVEY_SNAPSHOT_TIMEOUT)
+    return content
+
+
+def _seconds_until(date):
+    if date is None:
+        return None
+    delta = datetime.datetime.combine(date, datetime.time.min) - timezone.now()
+    return max(int(delta.total_seconds()), 1)
@@ -0,0 +1,95 @@
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset) -> int:
+    """
+    Приблизительное количество строк на PostgreSQL
+    Без фильтров - по статистике pg_class (для секционированной таблицы
+    сумма по секциям), с фильтрами - оценка планировщика из EXPLAIN.
+    Небольшие оценки уточняются точным COUNT(*)
+
+    :return int: количество строк
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            table = queryset.model._meta.db_table
+            cursor.execute(
+                "SELECT coalesce(sum(greatest(reltuples, 0)), 0)::bigint FROM pg_class "
+                "WHERE oid = to_regclass(%s) "
+                "OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))",
+                [table, table]
+            )
+            estimate = cursor.fetchone()[0]
+        else:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            estimate = cursor.fetchone()[0][0]['Plan']['Plan Rows']
+
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return queryset.count()
+    return int(estimate)
+
+
+class EstimatedCountPaginator(Paginator):
+    """ Пагинатор с приблизительным количеством строк """
+
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Список объектов админки по id без OFFSET и точного COUNT(*)
+    Страница - объекты с id меньше курсора по убыванию id,
+    поэтому любая страница стоит столько же, сколько первая
+    """
+    CURSOR_VAR = 'cursor'
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.cursor = int(request.GET[self.CURSOR_VAR])
+        except (KeyError, ValueError):
+            self.cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(self.CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        queryset = self.queryset
+        if self.cursor is not None:
+            queryset = queryset.filter(pk__lt=self.cursor)
+        items = list(queryset.order_by('-pk')[:self.list_per_page + 1])
+
+        self.next_cursor = items[self.list_per_page - 1].pk if len(items) > self.list_per_page else None
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.result_list = items[:self.list_per_page]
+        self.can_show_all = False
+        self.multi_page = self.cursor is not None or self.next_cursor is not None
+        self.paginator = paginator
+
+    def get_next_url(self):
+        if self.next_cursor is None:
+            return None
+        return self.get_query_string({self.CURSOR_VAR: self.next_cursor})
+
+    def get_first_url(self):
+        if self.cursor is None:
+            return None
+        return self.get_query_string(remove=[self.CURSOR_VAR])
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Кеши, которые не видны другим процессам
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local_cache(alias: str = 'default') -> bool:
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+
+
+@register()
+def check_replica_cache(app_configs, **kwargs):
+    """
+    Закрепление пользователя за основной базой после записи хранится в кеше,
+    поэтому с репликами кеш должен быть общим для всех процессов
+    """
+    if getattr(settings, 'DATABASE_REPLICAS', []) and is_process_local_cache():
+        return [Error(
+            'С репликами (DB__REPLICA_HOSTS) нужен общий для всех процессов кеш.',
+            hint='Задайте CACHE__BACKEND, например django.core.cache.backends.memcached.MemcachedCache.',
+            id='surveys.E001',
+        )]
+    return []
+
+
+THROTTLE_SETTINGS = ('SURVEYS_THROTTLE_USER_RATE', 'SURVEYS_THROTTLE_GLOBAL_RATE', 'SURVEYS_WRITE_CONCURRENCY')
+
+
+@register()
+def check_throttle_cache(app_configs, **kwargs):
+    """
+    Счетчики ограничения записи хранятся в кеше и должны быть общими
+    для всех процессов, иначе каждый процесс пропускает свой лимит
+    """
+    enabled = [name for name in THROTTLE_SETTINGS if getattr(settings, name, None)]
+    if enabled and is_process_local_cache():
+        return [Error(
+            f"Ограничение записи ({', '.join(enabled)}) требует общего для всех процессов кеша.",
+            hint='Задайте CACHE__BACKEND с атомарным incr, например memcached.',
+            id='surveys.E002',
+        )]
+    return []
+
+
+@register(deploy=True)
+def check_idempotency_cache(app_configs, **kwargs):
+    """
+    Сохраненные ответы на запросы с Idempotency-Key хранятся в кеше.
+    С кешем процесса повтор, попавший в другой процесс, записывает ответы второй раз.
+    Проверка для manage.py check --deploy: один процесс runserver работает и с кешем процесса
+    """
+    if getattr(settings, 'SURVEYS_IDEMPOTENCY_TTL', None) and is_process_local_cache():
+        return [Error(
+            'Ключи идемпотентности (Idempotency-Key) требуют общего для всех процессов кеша.',
+            hint='Задайте CACHE__BACKEND, например django.core.cache.backends.memcached.MemcachedCache.',
+            id='surveys.E003',
+        )]
+    return []
+
+
+@register(deploy=True)
+def check_invalidation_cache(app_configs, **kwargs):
+    """
+    Список активных опросов, готовый JSON опроса и индекс опроса сбрасываются
+    при изменении опроса. С кешем процесса сброс виден только процессу,
+    который изменил опрос, остальные отдают старые данные
+    """
+    if is_process_local_cache():
+        return [Error(
+            'Кеши опросов сбрасываются при изменении опроса и требуют общего для всех процессов кеша.',
+            hint='Задайте CACHE__BACKEND, например django.core.cache.backends.memcached.MemcachedCache.',
+            id='surveys.E004',
+        )]
+    return []
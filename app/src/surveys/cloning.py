@@ -0,0 +1,73 @@
+from django.db import connection, transaction
+
+from surveys.authoring import bulk_create_with_ids
+from surveys.cache import invalidate_active_surveys
+from surveys.db_routers import read_from_primary
+from surveys.models import Survey, Question, Choice
+from surveys.structure import invalidate_survey_structure
+
+QUESTION_TABLE = Question._meta.db_table
+CHOICE_TABLE = Choice._meta.db_table
+
+# Новые id вопросов выдаются из последовательности заранее (qmap),
+# поэтому вопросы и варианты копируются одним INSERT ... SELECT
+CLONE_SQL = f"""
+WITH qmap AS (
+    SELECT old_id, nextval(pg_get_serial_sequence('{QUESTION_TABLE}', 'id')) AS new_id
+    FROM (SELECT id AS old_id FROM {QUESTION_TABLE} WHERE survey_id = %(source)s ORDER BY id) source
+),
+questions AS (
+    INSERT INTO {QUESTION_TABLE} (id, text, type, survey_id)
+    SELECT qmap.new_id, question.text, question.type, %(target)s
+    FROM {QUESTION_TABLE} question JOIN qmap ON qmap.old_id = question.id
+    ORDER BY qmap.new_id
+)
+INSERT INTO {CHOICE_TABLE} (text, question_id)
+SELECT choice.text, qmap.new_id
+FROM {CHOICE_TABLE} choice JOIN qmap ON qmap.old_id = choice.question_id
+ORDER BY choice.id
+"""
+
+
+def clone_survey(survey: Survey, start_at, end_at, name: str = None) -> Survey:
+    """
+    Копирует опрос с вопросами и вариантами ответа на новые даты
+    На PostgreSQL вопросы и варианты копируются внутри базы одним запросом,
+    на остальных базах - двумя bulk_create. Ответы не копируются
+
+    :param survey: исходный опрос
+    :param name: название копии, по умолчанию название исходного опроса
+    :return Survey: копия опроса
+    """
+    with transaction.atomic():
+        clone = Survey.objects.create(
+            name=name or survey.name,
+            start_at=start_at,
+            end_at=end_at,
+            description=survey.description
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(CLONE_SQL, {'source': survey.pk, 'target': clone.pk})
+        else:
+            _clone_questions(survey, clone)
+
+        invalidate_active_surveys()
+        invalidate_survey_structure(clone.pk)
+    return clone
+
+
+def _clone_questions(survey, clone):
+    with read_from_primary():
+        questions = list(Question.objects.filter(survey=survey).order_by('id').values('id', 'text', 'type'))
+        choices = list(
+            Choice.objects.filter(question__survey=survey).order_by('id').values('question_id', 'text')
+        )
+    copies = [Question(survey=clone, text=question['text'], type=question['type']) for question in questions]
+    bulk_create_with_ids(Question, copies, survey_id=clone.pk)
+
+    question_map = {question['id']: copy.id for question, copy in zip(questions, copies)}
+    Choice.objects.bulk_create([
+        Choice(question_id=question_map[choice['question_id']], text=choice['text'])
+        for choice in choices
+    ], batch_size=1000)
@@ -0,0 +1,67 @@
+import calendar
+import datetime
+import hashlib
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from surveys.models import Survey
+
+
+def survey_validators(survey: Survey) -> tuple:
+    """
+    ETag и Last-Modified деталей опроса
+
+    :param survey: опрос
+    :return tuple: (etag, last_modified)
+    """
+    etag = quote_etag(f"{survey.id}-{survey.updated_at.timestamp()}")
+    return etag, _timestamp(survey.updated_at)
+
+
+def surveys_list_validators(surveys: list, date: datetime.date, modified: datetime.datetime,
+                            key: str = '') -> tuple:
+    """
+    ETag и Last-Modified списка опросов
+    Состав активных опросов меняется на границе суток и при изменении
+    или удалении опросов, поэтому Last-Modified - позднее из начала даты date
+    и времени последнего изменения списка modified
+
+    :param surveys: опросы
+    :param date: дата, на которую составлен список
+    :param modified: время последнего изменения списка (get_active_surveys_modified)
+    :param key: параметры запроса, от которых зависит ответ (страница)
+    :return tuple: (etag, last_modified)
+    """
+    versions = key + ';' + ','.join(f"{survey.id}-{survey.updated_at.timestamp()}" for survey in surveys)
+    etag = quote_etag(hashlib.md5(versions.encode()).hexdigest())
+    last_modified = max(
+        [survey.updated_at for survey in surveys] + [modified, datetime.datetime.combine(date, datetime.time.min)]
+    )
+    return etag, _timestamp(last_modified)
+
+
+def conditional_response(request, etag: str, last_modified: int, render):
+    """
+    Отвечает 304 по If-None-Match/If-Modified-Since без вызова render,
+    иначе возвращает результат render с заголовками ETag и Last-Modified
+
+    :param request: запрос
+    :param etag: ETag текущей версии
+    :param last_modified: время изменения, секунды с начала эпохи
+    :param render: функция, строящая ответ
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render()
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _timestamp(value: datetime.datetime) -> int:
+    """ Секунды с начала эпохи; наивное время считается временем TIME_ZONE """
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return calendar.timegm(value.utctimetuple())
@@ -0,0 +1,65 @@
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY_USER_KEY = 'surveys:primary:{}'
+
+_use_primary = contextvars.ContextVar('surveys_use_primary', default=False)
+
+
+def get_replicas() -> list:
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись в основную базу, чтение из случайной реплики DATABASE_REPLICAS
+    Внутри read_from_primary и в запросах, закрепленных за основной базой
+    (ReplicaStickinessMiddleware), чтение тоже идет в основную базу
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas or _use_primary.get():
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas()
+
+
+@contextlib.contextmanager
+def read_from_primary():
+    """ Чтение из основной базы, например для построения кеша """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def pin_user_to_primary(user_id: int) -> None:
+    """
+    Закрепляет чтение результатов пользователя за основной базой
+    на SURVEYS_REPLICA_STICKY_SECONDS, пока реплики догоняют запись
+    """
+    if get_replicas():
+        timeout = getattr(settings, 'SURVEYS_REPLICA_STICKY_SECONDS', 5)
+        cache.set(PRIMARY_USER_KEY.format(user_id), True, timeout=timeout)
+
+
+def is_user_pinned_to_primary(user_id) -> bool:
+    return bool(cache.get(PRIMARY_USER_KEY.format(user_id)))
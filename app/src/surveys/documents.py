@@ -0,0 +1,196 @@
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, F
+
+from surveys.db_routers import read_from_primary
+from surveys.models import Survey, Answer, ArchivedAnswer, UserSurveyResult
+from surveys.renderers import render_json
+from surveys.rows import SURVEY_FIELDS, survey_row, answer_rows
+
+REFRESH_CHUNK_SIZE = 500
+
+
+def result_documents_enabled() -> bool:
+    """ GET /result/ читает готовые документы UserSurveyResult """
+    return getattr(settings, 'SURVEYS_RESULT_DOCUMENTS', False)
+
+
+def refresh_result_documents(answers) -> None:
+    """
+    Перестраивает документы результатов пользователей и опросов ответов
+    Вызывается в той же транзакции, что и запись ответов. Строки документов
+    блокируются до чтения ответов, поэтому параллельная запись того же
+    пользователя в тот же опрос перестроит документ после этой транзакции
+
+    :param answers: записанные ответы или пары (user_id, survey_id)
+    """
+    if not result_documents_enabled():
+        return
+    pairs = sorted({
+        answer if isinstance(answer, tuple) else (answer.user_id, answer.survey_id)
+        for answer in answers
+    })
+    for start in range(0, len(pairs), REFRESH_CHUNK_SIZE):
+        _refresh_chunk(pairs[start:start + REFRESH_CHUNK_SIZE])
+
+
+def rebuild_result_documents(survey_ids=None) -> int:
+    """
+    Строит документы результатов по таблице ответов и архиву
+    и удаляет документы без ответов
+
+    :param survey_ids: ID опросов, по умолчанию все
+    :return int: количество пар пользователь-опрос
+    """
+    pairs = []
+    for model in (Answer, ArchivedAnswer):
+        answers = model.objects.all()
+        if survey_ids:
+            answers = answers.filter(survey_id__in=survey_ids)
+        pairs.append(answers.order_by('user_id', 'survey_id').values_list('user_id', 'survey_id').distinct())
+
+    count = 0
+    chunk = []
+    for pair in _iter_unique(heapq.merge(*(queryset.iterator() for queryset in pairs))):
+        chunk.append(pair)
+        if len(chunk) >= REFRESH_CHUNK_SIZE:
+            with transaction.atomic():
+                _refresh_chunk(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        with transaction.atomic():
+            _refresh_chunk(chunk)
+        count += len(chunk)
+
+    documents = UserSurveyResult.objects.all()
+    if survey_ids:
+        documents = documents.filter(survey_id__in=survey_ids)
+    documents.annotate(
+        has_answers=Exists(Answer.objects.filter(user_id=OuterRef('user_id'), survey_id=OuterRef('survey_id'))),
+        has_archived_answers=Exists(
+            ArchivedAnswer.objects.filter(user_id=OuterRef('user_id'), survey_id=OuterRef('survey_id'))
+        )
+    ).filter(has_answers=False, has_archived_answers=False).delete()
+    return count
+
+
+def _iter_unique(pairs):
+    """ Пропускает повторы в отсортированной последовательности """
+    previous = None
+    for pair in pairs:
+        if pair != previous:
+            yield pair
+        previous = pair
+
+
+def get_result_documents(user_id: int):
+    """ Строки документов пользователя с текущей датой изменения опроса """
+    return UserSurveyResult.objects.filter(user_id=user_id).values(
+        'survey_id', 'document', 'survey_updated_at', 'survey__updated_at'
+    )
+
+
+def get_fresh_documents(rows: list, user_id: int) -> list:
+    """
+    Документы страницы; вместо документов опросов, измененных после
+    построения документа, результаты собираются запросом к ответам.
+    Чтение ничего не записывает: устаревшие документы перестраиваются
+    при следующей записи ответов пользователя или командой
+    rebuild_result_documents --stale
+
+    :param rows: строки get_result_documents
+    :return list: документы в байтах
+    """
+    stale = {row['survey_id'] for row in rows if row['survey_updated_at'] != row['survey__updated_at']}
+    rebuilt = {}
+    if stale:
+        with read_from_primary():
+            rebuilt = _build_documents([(user_id, survey_id) for survey_id in stale])
+    return [
+        rebuilt[row['survey_id']] if row['survey_id'] in stale else row['document'].encode()
+        for row in rows
+        if row['survey_id'] not in stale or row['survey_id'] in rebuilt
+    ]
+
+
+def refresh_stale_result_documents(survey_ids=None) -> int:
+    """
+    Перестраивает документы опросов, измененных после построения документа
+
+    :param survey_ids: ID опросов, по умолчанию все
+    :return int: количество перестроенных документов
+    """
+    documents = UserSurveyResult.objects.exclude(survey_updated_at=F('survey__updated_at'))
+    if survey_ids:
+        documents = documents.filter(survey_id__in=survey_ids)
+    pairs = list(documents.order_by('user_id', 'survey_id').values_list('user_id', 'survey_id'))
+    for start in range(0, len(pairs), REFRESH_CHUNK_SIZE):
+        with transaction.atomic():
+            _refresh_chunk(pairs[start:start + REFRESH_CHUNK_SIZE])
+    return len(pairs)
+
+
+def _build_documents(pairs: list) -> dict:
+    """ Документы пар (user_id, survey_id) без записи в базу: {survey_id: bytes} """
+    survey_ids = {survey_id for _, survey_id in pairs}
+    surveys = {survey['id']: survey for survey in Survey.objects.filter(pk__in=survey_ids).values(*SURVEY_FIELDS)}
+    answers = answer_rows({user_id for user_id, _ in pairs}, surveys)
+    documents = {}
+    for user_id, survey_id in pairs:
+        if survey_id in surveys and answers.get((user_id, survey_id)):
+            row = survey_row(surveys[survey_id])
+            row['answers'] = answers[(user_id, survey_id)]
+            documents[survey_id] = render_json(row)
+    return documents
+
+
+def _refresh_chunk(pairs: list) -> None:
+    surveys = {
+        survey['id']: survey
+        for survey in Survey.objects.filter(pk__in={survey_id for _, survey_id in pairs})
+        .values(*SURVEY_FIELDS, 'updated_at')
+    }
+    pairs = [(user_id, survey_id) for user_id, survey_id in pairs if survey_id in surveys]
+    if not pairs:
+        return
+    user_ids = {user_id for user_id, _ in pairs}
+
+    locked = _lock_documents(user_ids, surveys)
+    missing = [pair for pair in pairs if pair not in locked]
+    if missing:
+        UserSurveyResult.objects.bulk_create(
+            [UserSurveyResult(user_id=user_id, survey_id=survey_id) for user_id, survey_id in missing],
+            ignore_conflicts=True
+        )
+        locked.update(_lock_documents(
+            {user_id for user_id, _ in missing}, {survey_id for _, survey_id in missing}
+        ))
+    answers = answer_rows(user_ids, surveys)
+
+    changed, empty = [], []
+    for user_id, survey_id in pairs:
+        document = locked[(user_id, survey_id)]
+        row = survey_row(surveys[survey_id])
+        row['answers'] = answers.get((user_id, survey_id))
+        if not row['answers']:
+            empty.append(document.pk)
+            continue
+        document.document = render_json(row).decode()
+        document.survey_updated_at = surveys[survey_id]['updated_at']
+        changed.append(document)
+
+    UserSurveyResult.objects.bulk_update(changed, ['document', 'survey_updated_at'], batch_size=REFRESH_CHUNK_SIZE)
+    if empty:
+        UserSurveyResult.objects.filter(pk__in=empty).delete()
+
+
+def _lock_documents(user_ids, survey_ids) -> dict:
+    return {
+        (row.user_id, row.survey_id): row
+        for row in UserSurveyResult.objects.select_for_update()
+        .filter(user_id__in=user_ids, survey_id__in=survey_ids)
+        .order_by('user_id', 'survey_id')
+    }
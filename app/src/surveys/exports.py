@@ -0,0 +1,57 @@
+import csv
+import heapq
+import json
+
+from surveys.models import Answer, ArchivedAnswer
+
+EXPORT_FIELDS = (
+    'id', 'user_id', 'survey_id', 'question_id', 'question__text', 'question__type', 'choice_id', 'choice__text', 'text',
+)
+EXPORT_HEADER = (
+    'id', 'user_id', 'survey_id', 'question_id', 'question_text', 'question_type', 'choice_id', 'choice_text', 'text',
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_answer_rows(survey_id: int, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Ответы опроса вместе с текстом вопроса и варианта ответа
+    из основной таблицы и архива по возрастанию id
+    На PostgreSQL строки читаются серверными курсорами порциями chunk_size
+
+    :param survey_id: ID опроса
+    :param chunk_size: размер порции
+    :return: генератор кортежей в порядке EXPORT_HEADER
+    """
+    querysets = [
+        model.objects.filter(survey_id=survey_id).order_by('id').values_list(*EXPORT_FIELDS)
+        for model in (Answer, ArchivedAnswer)
+    ]
+    return heapq.merge(*(queryset.iterator(chunk_size=chunk_size) for queryset in querysets), key=lambda row: row[0])
+
+
+class _Echo:
+    """ Файлоподобный объект, который возвращает записанную строку """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """ Строки CSV с заголовком """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows):
+    """ Строки NDJSON, по объекту на ответ """
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_HEADER, row)), ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
@@ -0,0 +1,88 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+IDEMPOTENCY_RESPONSE_KEY = 'surveys:idempotency:{}'
+IDEMPOTENCY_LOCK_KEY = 'surveys:idempotency:{}:lock'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Запрос с этим ключом идемпотентности еще выполняется.'
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(exceptions.APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Ключ идемпотентности уже использован с другим телом запроса.'
+    default_code = 'idempotency_key_reused'
+
+
+def idempotent(action):
+    """
+    Повтор запроса с тем же заголовком Idempotency-Key возвращает
+    сохраненный ответ без проверки и записи. Сохраняются успешные ответы,
+    на SURVEYS_IDEMPOTENCY_TTL секунд. Пока первый запрос выполняется,
+    повтор получает 409
+    """
+
+    @functools.wraps(action)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return action(view, request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise exceptions.ParseError(
+                f'Ключ идемпотентности длиннее {IDEMPOTENCY_KEY_MAX_LENGTH} символов'
+            )
+
+        digest = get_idempotency_digest(request.path, key)
+        fingerprint = get_fingerprint(request.data)
+        response_key = IDEMPOTENCY_RESPONSE_KEY.format(digest)
+        stored = cache.get(response_key)
+        if stored is None:
+            lock_key = IDEMPOTENCY_LOCK_KEY.format(digest)
+            timeout = getattr(settings, 'SURVEYS_IDEMPOTENCY_LOCK_TIMEOUT', 30)
+            if not cache.add(lock_key, True, timeout=timeout):
+                stored = cache.get(response_key)
+                if stored is None:
+                    raise IdempotencyConflict
+            else:
+                try:
+                    response = action(view, request, *args, **kwargs)
+                    if status.is_success(response.status_code):
+                        cache.set(
+                            response_key,
+                            (fingerprint, response.status_code, response.data),
+                            timeout=getattr(settings, 'SURVEYS_IDEMPOTENCY_TTL', 24 * 60 * 60)
+                        )
+                    return response
+                finally:
+                    cache.delete(lock_key)
+
+        stored_fingerprint, status_code, data = stored
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyKeyReused
+        response = Response(data, status=status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    return wrapper
+
+
+def get_idempotency_digest(path: str, key: str) -> str:
+    """ Ключ в хранилище: Idempotency-Key действует в пределах одного адреса """
+    return hashlib.sha256(f"{path}:{key}".encode()).hexdigest()
+
+
+def get_fingerprint(data) -> str:
+    """ Хеш тела запроса для проверки, что ключ не переиспользован """
+    content = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(content.encode()).hexdigest()
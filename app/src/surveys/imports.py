@@ -0,0 +1,144 @@
+import csv
+import hashlib
+import io
+import os
+
+from django.db import connection, transaction
+
+from surveys.documents import refresh_result_documents
+from surveys.models import Answer, IngestedBatch
+from surveys.serializers import check_answer_structure
+from surveys.structure import get_survey_structure
+from surveys.tallies import increment_tallies
+
+IMPORT_FIELDS = ('user_id', 'survey', 'question', 'choice', 'text')
+IMPORT_CHUNK_SIZE = 10000
+COPY_COLUMNS = ('user_id', 'survey_id', 'question_id', 'choice_id', 'text')
+
+
+def get_import_key(path: str) -> str:
+    """ Ключ файла для журнала загруженных порций """
+    stat = os.stat(path)
+    identity = f"{os.path.realpath(path)}:{stat.st_size}"
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def check_chunk_size(key: str, chunk_size: int) -> None:
+    """
+    Закрепляет размер порции за загрузкой
+    Журнал хранит номера загруженных порций, а они зависят от размера порции:
+    продолжение с другим размером загрузило бы часть строк повторно
+
+    :raise ValueError: загрузка начата с другим размером порции
+    """
+    prefix = f"import:{key}:chunk-size:"
+    stored = IngestedBatch.objects.filter(key__startswith=prefix).values_list('key', flat=True).first()
+    if stored is None:
+        IngestedBatch.objects.get_or_create(key=f"{prefix}{chunk_size}")
+    elif stored != f"{prefix}{chunk_size}":
+        raise ValueError(
+            f"Загрузка начата с размером порции {stored[len(prefix):]}, продолжите ее с тем же --chunk-size"
+        )
+
+
+def iter_chunks(rows, chunk_size: int):
+    """ Разбивает строки (номер строки, словарь) на порции """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_rows(chunk: list) -> tuple:
+    """
+    Проверяет порцию строк по индексу структуры опросов
+    Индекс каждого опроса читается из кеша один раз на порцию
+
+    :param chunk: список пар (номер строки, словарь полей IMPORT_FIELDS)
+    :return tuple: (ответы Answer, ошибки (номер строки, текст, строка))
+    """
+    answers, errors = [], []
+    structures = {}
+    for line, row in chunk:
+        try:
+            answer = _row_to_answer(row, structures)
+        except ValueError as error:
+            errors.append((line, str(error), row))
+        else:
+            answers.append(answer)
+    return answers, errors
+
+
+def load_answers(answers: list) -> None:
+    """
+    Записывает ответы: на PostgreSQL через COPY FROM STDIN,
+    на остальных базах через bulk_create
+    Вызывается в транзакции
+    """
+    if connection.vendor == 'postgresql':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for answer in answers:
+            writer.writerow([getattr(answer, column) for column in COPY_COLUMNS])
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Answer._meta.db_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+    else:
+        Answer.objects.bulk_create(answers, batch_size=1000)
+
+
+def import_chunk(key: str, number: int, chunk: list):
+    """
+    Проверяет и загружает порцию одной транзакцией
+    Уже загруженная порция пропускается
+
+    :return: ошибки порции или None, если порция была загружена ранее
+    """
+    batch_key = f"import:{key}:{number}"
+    if IngestedBatch.objects.filter(key=batch_key).exists():
+        return None
+
+    answers, errors = validate_rows(chunk)
+    with transaction.atomic():
+        _, created = IngestedBatch.objects.get_or_create(key=batch_key)
+        if not created:
+            return None
+        load_answers(answers)
+        increment_tallies(answers)
+        refresh_result_documents(answers)
+    return errors
+
+
+def _row_to_answer(row: dict, structures: dict) -> Answer:
+    """
+    :param structures: индексы опросов порции по ID опроса, дополняются по мере чтения
+    """
+    try:
+        user_id = int(row['user_id'])
+        survey_id = int(row['survey'])
+        question_id = int(row['question'])
+        choice_id = int(row['choice']) if row.get('choice') else None
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Некорректные user_id, survey, question или choice")
+    text = row.get('text') or None
+
+    if not any([text, choice_id]):
+        raise ValueError("Введите текст или выберите подходящий вариант ответа.")
+
+    if survey_id not in structures:
+        structures[survey_id] = get_survey_structure(survey_id)
+    structure = structures[survey_id]
+    if structure is None:
+        raise ValueError(f"Опрос {survey_id} не найден")
+    errors = check_answer_structure(structure, question_id, choice_id)
+    if errors:
+        raise ValueError(next(iter(errors.values()))[0])
+
+    return Answer(user_id=user_id, survey_id=survey_id, question_id=question_id, choice_id=choice_id, text=text)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from surveys.models import Survey
+from surveys.partitions import (
+    ANSWER_PARTITIONS_AHEAD,
+    is_partitioned,
+    partition_bounds,
+    create_missing_partitions,
+    detach_answer_partition,
+    drop_answer_partition,
+    drop_empty_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Управление секциями таблицы ответов (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['ensure', 'prune', 'detach', 'drop'],
+                            help='ensure - создать недостающие секции и секции впрок, '
+                                 'prune - удалить секции удаленных опросов, '
+                                 'detach - отключить секции опросов, drop - отключить и удалить')
+        parser.add_argument('surveys', type=int, nargs='*', help='ID опросов для detach и drop')
+        parser.add_argument('--ahead', type=int, default=ANSWER_PARTITIONS_AHEAD,
+                            help='Сколько секций создать после секции последнего опроса')
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError('Таблица ответов не секционирована')
+
+        if options['action'] == 'ensure':
+            count = create_missing_partitions(options['ahead'])
+            self.stdout.write(self.style.SUCCESS(f"Создано секций: {count}"))
+            return
+        if options['action'] == 'prune':
+            count = drop_empty_partitions()
+            self.stdout.write(self.style.SUCCESS(f"Удалено секций: {count}"))
+            return
+
+        if not options['surveys']:
+            raise CommandError('Укажите ID опросов')
+        for survey_id in options['surveys']:
+            start, end = partition_bounds(survey_id)
+            # Секция хранит ответы всех опросов диапазона, идущие опросы в ней трогать нельзя
+            if Survey.objects.filter(id__gte=start, id__lt=end, end_at__gte=timezone.now().date()).exists():
+                raise CommandError(f"В секции опросов {start}-{end - 1} есть незавершенные опросы")
+            if options['action'] == 'detach':
+                name = detach_answer_partition(survey_id)
+                self.stdout.write(f"Секция {name} (опросы {start}-{end - 1}) отключена")
+            else:
+                drop_answer_partition(survey_id)
+                self.stdout.write(f"Секция опросов {start}-{end - 1} удалена")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from surveys.archive import ARCHIVE_BATCH_SIZE, get_archivable_surveys, archive_survey_answers
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит ответы завершившихся опросов в архив (ArchivedAnswer). '
+        'Порции переносятся отдельными транзакциями, повторный запуск продолжает перенос'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', dest='surveys',
+                            help='ID опроса, можно указать несколько раз. По умолчанию все завершившиеся опросы')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0.0, help='Пауза между порциями, секунды')
+
+    def handle(self, *args, **options):
+        survey_ids = options['surveys'] or get_archivable_surveys()
+        active = Survey.objects.filter(pk__in=survey_ids, end_at__gte=timezone.now().date())
+        if active.exists():
+            raise CommandError(f"Опросы еще не завершились: {', '.join(str(pk) for pk in active.values_list('id', flat=True))}")
+
+        total = 0
+        for survey_id in survey_ids:
+            count = archive_survey_answers(
+                survey_id,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                progress=lambda moved: self.stdout.write(f"Опрос {survey_id}: перенесено {moved}")
+            )
+            total += count
+        self.stdout.write(self.style.SUCCESS(f"Перенесено в архив ответов: {total}"))
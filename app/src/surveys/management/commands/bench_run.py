@@ -0,0 +1,62 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.bench import ENDPOINTS, run, compare
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон эндпоинтов API. Выводит p50/p95/p99, пропускную способность '
+        'и количество SQL запросов на запрос, сохраняет отчет в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS, dest='endpoints',
+                            help='Эндпоинт, можно указать несколько раз. По умолчанию все')
+        parser.add_argument('--requests', type=int, default=200, help='Запросов к каждому эндпоинту')
+        parser.add_argument('--warmup', type=int, default=5, help='Запросов для прогрева, не входят в отчет')
+        parser.add_argument('--respondents', type=int, default=100, help='Сколько пользователей создал bench_seed')
+        parser.add_argument('--base-url', help='Адрес запущенного сервера. По умолчанию запросы выполняются в процессе')
+        parser.add_argument('--concurrency', type=int, default=1, help='Потоков для --base-url')
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора случайных чисел')
+        parser.add_argument('--output', help='Файл для отчета в JSON')
+        parser.add_argument('--baseline', help='Отчет прошлого прогона для сравнения')
+        parser.add_argument('--keep-answers', action='store_true',
+                            help='Не удалять ответы, записанные прогоном result-create и result-batch')
+
+    def handle(self, *args, **options):
+        try:
+            report = run(
+                options['endpoints'] or ENDPOINTS,
+                options['requests'],
+                options['respondents'],
+                random.Random(options['seed']),
+                base_url=options['base_url'],
+                concurrency=options['concurrency'],
+                warmup=options['warmup'],
+                cleanup=not options['keep_answers'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        for endpoint, summary in report['endpoints'].items():
+            latency = summary['latency_ms']
+            self.stdout.write(
+                f"{endpoint:15} p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms "
+                f"rps={summary['throughput_rps']} queries={summary['queries_per_request']['mean']} "
+                f"statuses={summary['statuses']}"
+            )
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline_file:
+                changes = compare(report, json.load(baseline_file))
+            for endpoint, metrics in changes.items():
+                self.stdout.write(f"{endpoint:15} " + ' '.join(
+                    f"{metric}: {before} -> {after}" for metric, (before, after) in metrics.items()
+                ))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
@@ -0,0 +1,34 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from surveys.bench import seed, remove_bench_data
+
+
+class Command(BaseCommand):
+    help = 'Создает синтетические опросы и ответы для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--surveys', type=int, default=10)
+        parser.add_argument('--questions', type=int, default=30, help='Вопросов в опросе')
+        parser.add_argument('--choices', type=int, default=4, help='Вариантов ответа на вопрос')
+        parser.add_argument('--respondents', type=int, default=100, help='Пользователей, ответивших на все опросы')
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора случайных чисел')
+        parser.add_argument('--clean', action='store_true',
+                            help='Удалить опросы и ответы бенчмарка вместо создания новых')
+
+    def handle(self, *args, **options):
+        if options['clean']:
+            removed = remove_bench_data()
+            self.stdout.write(self.style.SUCCESS(f"Удалено опросов: {removed}"))
+            return
+        counts = seed(
+            options['surveys'],
+            options['questions'],
+            options['choices'],
+            options['respondents'],
+            random.Random(options['seed'])
+        )
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f"{name}: {count}" for name, count in counts.items())
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.exports import EXPORT_FORMATS, EXPORT_CHUNK_SIZE, iter_answer_rows
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все ответы опроса в CSV или NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey', type=int, help='ID опроса')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--output', help='Путь к файлу. По умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not Survey.objects.filter(pk=options['survey']).exists():
+            raise CommandError(f"Опрос {options['survey']} не найден")
+
+        write_rows, _ = EXPORT_FORMATS[options['export_format']]
+        lines = write_rows(iter_answer_rows(options['survey'], options['chunk_size']))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            self.stdout.ending = ''
+            for line in lines:
+                self.stdout.write(line)
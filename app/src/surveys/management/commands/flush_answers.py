@@ -0,0 +1,57 @@
+import fcntl
+import os
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.spool import get_answer_spool
+
+
+class Command(BaseCommand):
+    help = 'Загружает в базу ответы из журнала отложенной записи'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Загрузить накопленные ответы и завершиться')
+        parser.add_argument('--poll', type=float, default=0.2, help='Период проверки журнала, секунды')
+
+    def handle(self, *args, **options):
+        spool = get_answer_spool()
+        if spool is None:
+            raise CommandError('Отложенная запись ответов выключена: не задан SURVEYS__ANSWER_SPOOL_DIR')
+
+        lock = open(os.path.join(spool.directory, '.flush.lock'), 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise CommandError('Журнал уже обрабатывается другим процессом')
+
+        max_bytes = getattr(settings, 'SURVEYS_ANSWER_SPOOL_MAX_BYTES', 1024 * 1024)
+        interval = getattr(settings, 'SURVEYS_ANSWER_SPOOL_FLUSH_INTERVAL', 1.0)
+        self.stopped = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        last_flush = time.monotonic()
+        while True:
+            size = spool.active_size()
+            due = (
+                spool.segments()
+                or size >= max_bytes
+                or (size and time.monotonic() - last_flush >= interval)
+            )
+            if due or options['once'] or self.stopped:
+                try:
+                    count, lag = spool.flush()
+                except ValueError as error:
+                    raise CommandError(str(error))
+                last_flush = time.monotonic()
+                if count:
+                    self.stdout.write(f"Загружено ответов: {count}, задержка: {lag:.3f} с")
+            if options['once'] or self.stopped:
+                break
+            time.sleep(options['poll'])
+
+    def stop(self, signum, frame):
+        self.stopped = True
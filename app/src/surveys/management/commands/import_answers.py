@@ -0,0 +1,56 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.imports import (
+    IMPORT_FIELDS, IMPORT_CHUNK_SIZE, get_import_key, check_chunk_size, import_chunk, iter_chunks
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает ответы из CSV с колонками user_id, survey, question, choice, text. '
+        'Порции загружаются отдельными транзакциями, повторный запуск продолжает с незагруженной порции'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к CSV файлу')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument('--errors', help='Файл для строк с ошибками. По умолчанию <path>.errors.csv')
+        parser.add_argument('--key', help='Ключ загрузки. По умолчанию вычисляется по пути и размеру файла')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        key = options['key'] or get_import_key(path)
+        errors_path = options['errors'] or f"{path}.errors.csv"
+        try:
+            check_chunk_size(key, options['chunk_size'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        imported = skipped = failed = 0
+
+        with open(path, newline='', encoding='utf-8') as source, \
+                open(errors_path, 'a', newline='', encoding='utf-8') as errors_file:
+            reader = csv.DictReader(source)
+            missing = set(IMPORT_FIELDS) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f"В файле нет колонок: {', '.join(sorted(missing))}")
+
+            errors_writer = csv.writer(errors_file)
+            rows = ((reader.line_num, row) for row in reader)
+            for number, chunk in enumerate(iter_chunks(rows, options['chunk_size'])):
+                errors = import_chunk(key, number, chunk)
+                if errors is None:
+                    skipped += len(chunk)
+                    continue
+
+                for line, message, row in errors:
+                    errors_writer.writerow([line, message] + [row.get(field) for field in IMPORT_FIELDS])
+                errors_file.flush()
+                imported += len(chunk) - len(errors)
+                failed += len(errors)
+                self.stdout.write(f"Порция {number}: загружено {imported}, ошибок {failed}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено: {imported}, с ошибками: {failed}, пропущено ранее загруженных: {skipped}"
+        ))
@@ -0,0 +1,37 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.purge import PURGE_BATCH_SIZE, purge_survey, get_expired_surveys
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет опросы вместе с ответами порциями: ответы и документы результатов '
+        'удаляются диапазонами id отдельными транзакциями, опрос, вопросы и варианты - последними'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('surveys', type=int, nargs='*', help='ID опросов')
+        parser.add_argument('--ended-before', type=datetime.date.fromisoformat,
+                            help='Удалить опросы, завершившиеся раньше даты YYYY-MM-DD')
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0.1, help='Пауза между порциями, секунды')
+
+    def handle(self, *args, **options):
+        survey_ids = list(options['surveys'])
+        if options['ended_before']:
+            survey_ids += get_expired_surveys(options['ended_before'])
+        if not survey_ids:
+            raise CommandError('Укажите ID опросов или --ended-before')
+
+        for survey_id in sorted(set(survey_ids)):
+            deleted = purge_survey(
+                survey_id,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                progress=lambda table, count: self.stdout.write(f"Опрос {survey_id}: {table} удалено {count}")
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Опрос {survey_id} удален: " + ', '.join(f"{table} {count}" for table, count in deleted.items())
+            ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from surveys.documents import rebuild_result_documents, refresh_stale_result_documents
+
+
+class Command(BaseCommand):
+    help = 'Строит документы результатов пользователей по таблице ответов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', dest='surveys',
+                            help='ID опроса, можно указать несколько раз. По умолчанию все опросы')
+        parser.add_argument('--stale', action='store_true',
+                            help='Перестроить только документы опросов, измененных после построения документа')
+
+    def handle(self, *args, **options):
+        if options['stale']:
+            count = refresh_stale_result_documents(options['surveys'])
+        else:
+            count = rebuild_result_documents(options['surveys'])
+        self.stdout.write(self.style.SUCCESS(f"Построено документов: {count}"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from surveys.tallies import rebuild_tallies
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики ответов по таблице ответов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', dest='surveys',
+                            help='ID опроса, можно указать несколько раз. По умолчанию все опросы')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_tallies(options['surveys'])
+        self.stdout.write(self.style.SUCCESS(f"Записано счетчиков: {count}"))
@@ -0,0 +1,172 @@
+import contextlib
+import os
+import random
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+REQUEST_LATENCY = Histogram(
+    'surveys_request_duration_seconds',
+    'Время обработки запроса',
+    ['view', 'method'],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_STATUSES = Counter(
+    'surveys_responses',
+    'Ответы по кодам статуса',
+    ['view', 'method', 'status']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'surveys_requests_in_flight',
+    'Запросы в обработке',
+    ['view'],
+    multiprocess_mode='livesum'
+)
+REQUEST_QUERIES = Histogram(
+    'surveys_request_db_queries',
+    'Количество SQL запросов на запрос',
+    ['view', 'method'],
+    buckets=QUERY_BUCKETS
+)
+
+UNMATCHED_VIEW = 'unmatched'
+
+
+class AnswerSpoolCollector:
+    """
+    Состояние журнала отложенной записи, читается из директории журнала
+    при каждом запросе /metrics, поэтому не зависит от процесса flush_answers
+    """
+
+    def collect(self):
+        from surveys.spool import get_answer_spool
+
+        spool = get_answer_spool()
+        if spool is None:
+            return
+        yield GaugeMetricFamily(
+            'surveys_answer_spool_lag_seconds', 'Возраст самой старой незагруженной записи журнала', spool.lag()
+        )
+        yield GaugeMetricFamily(
+            'surveys_answer_spool_segments', 'Сегменты журнала, ожидающие загрузки', len(spool.segments())
+        )
+        yield GaugeMetricFamily(
+            'surveys_answer_spool_dead_letter_bytes', 'Размер файла незаписанных ответов', spool.dead_letter_size()
+        )
+
+
+ANSWER_SPOOL_COLLECTOR = AnswerSpoolCollector()
+REGISTRY.register(ANSWER_SPOOL_COLLECTOR)
+
+
+def get_view_label(view_func, request) -> str:
+    """
+    Метка представления: basename и действие viewset, например
+    survey-list, survey-detail, result-create, result-batch.
+    Для остальных представлений имя url
+    """
+    actions = getattr(view_func, 'actions', None)
+    initkwargs = getattr(view_func, 'initkwargs', None) or {}
+    if actions and initkwargs.get('basename'):
+        action = actions.get(request.method.lower())
+        if action:
+            return f"{initkwargs['basename']}-{'detail' if action == 'retrieve' else action}"
+    match = request.resolver_match
+    return match.url_name if match and match.url_name else UNMATCHED_VIEW
+
+
+class QueryCounter:
+    """ Обертка connection.execute_wrapper, считающая SQL запросы """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_sample_rate() -> float:
+    return getattr(settings, 'SURVEYS_METRICS_QUERY_SAMPLE_RATE', 0.1)
+
+
+class PrometheusMetricsMiddleware:
+    """
+    Метрики запросов для /metrics: время ответа, коды статуса,
+    запросы в обработке и количество SQL запросов по представлениям.
+    SQL запросы считаются в доле запросов SURVEYS_METRICS_QUERY_SAMPLE_RATE.
+    Время потокового ответа измеряется после отдачи последней части
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        counter = QueryCounter() if random.random() < query_sample_rate() else None
+        try:
+            with contextlib.ExitStack() as stack:
+                if counter is not None:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(counter))
+                response = self.get_response(request)
+        finally:
+            view = getattr(request, 'metrics_view', None)
+            if view is not None:
+                REQUESTS_IN_FLIGHT.labels(view).dec()
+
+        view = view or UNMATCHED_VIEW
+        REQUEST_STATUSES.labels(view, request.method, response.status_code).inc()
+        if counter is not None:
+            REQUEST_QUERIES.labels(view, request.method).observe(counter.count)
+        if response.streaming:
+            response.streaming_content = self.observe_streaming(response.streaming_content, view, request, started)
+        else:
+            REQUEST_LATENCY.labels(view, request.method).observe(time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def observe_streaming(content, view, request, started):
+        try:
+            yield from content
+        finally:
+            REQUEST_LATENCY.labels(view, request.method).observe(time.perf_counter() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = get_view_label(view_func, request)
+        REQUESTS_IN_FLIGHT.labels(request.metrics_view).inc()
+
+
+def get_registry():
+    """
+    Реестр для выдачи метрик
+    При нескольких процессах (gunicorn) каждый процесс пишет метрики
+    в файлы директории PROMETHEUS_MULTIPROC_DIR, а выдача их суммирует
+    """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(ANSWER_SPOOL_COLLECTOR)
+    return registry
+
+
+def metrics_view(request):
+    """ Метрики в формате Prometheus """
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,74 @@
+import contextlib
+import json
+import logging
+import random
+
+from django.conf import settings
+from django.db import connections
+
+from surveys.db_routers import get_replicas, is_user_pinned_to_primary, read_from_primary
+from surveys.timing import RequestTiming, activate_timing, deactivate_timing
+
+timing_logger = logging.getLogger('surveys.timing')
+
+
+class ServerTimingMiddleware:
+    """
+    Замеры запросов для production: количество и время SQL запросов,
+    время сериализации и общее время
+
+    В выборку попадает доля запросов SURVEYS_TIMING_SAMPLE_RATE (от 0 до 1).
+    Для них добавляется заголовок Server-Timing и пишется строка
+    в лог surveys.timing. Остальные запросы проходят без замеров
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, 'SURVEYS_TIMING_SAMPLE_RATE', 0)
+        if not sample_rate or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        timing = RequestTiming()
+        token = activate_timing(timing)
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            deactivate_timing(token)
+        timing.finish()
+
+        response['Server-Timing'] = timing.server_timing()
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timing.as_dict(),
+        }))
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Запросы на запись и чтение результатов пользователя, недавно
+    записавшего ответы, читают основную базу, а не реплики
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas() or not self.use_primary(request):
+            return self.get_response(request)
+        with read_from_primary():
+            return self.get_response(request)
+
+    def use_primary(self, request) -> bool:
+        if request.method not in self.SAFE_METHODS:
+            return True
+        user_id = request.GET.get('user_id')
+        return bool(user_id) and is_user_pinned_to_primary(user_id)
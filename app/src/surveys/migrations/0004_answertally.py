@@ -0,0 +1,36 @@
+# Generated by Django 2.2.10 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0003_survey_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerTally',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Шард')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество ответов')),
+                ('choice', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='surveys.Choice', verbose_name='Вариант ответа')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='surveys.Question', verbose_name='Вопрос')),
+            ],
+            options={
+                'verbose_name': 'Счетчик ответов',
+                'verbose_name_plural': 'Счетчики ответов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='answertally',
+            constraint=models.UniqueConstraint(fields=('question', 'choice', 'shard'), name='surveys_answertally_unique_choice'),
+        ),
+        migrations.AddConstraint(
+            model_name='answertally',
+            constraint=models.UniqueConstraint(condition=models.Q(choice=None), fields=('question', 'shard'), name='surveys_answertally_unique_text'),
+        ),
+    ]
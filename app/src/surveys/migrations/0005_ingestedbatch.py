@@ -0,0 +1,25 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0004_answertally'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedBatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Ключ партии')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')),
+            ],
+            options={
+                'verbose_name': 'Загруженная партия ответов',
+                'verbose_name_plural': 'Загруженные партии ответов',
+            },
+        ),
+    ]
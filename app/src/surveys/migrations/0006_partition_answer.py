@@ -0,0 +1,142 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:30
+
+from django.db import migrations, transaction
+
+# Границы секций совпадают с surveys.partitions.ANSWER_PARTITION_SURVEYS
+PARTITION_SURVEYS = 100
+PARTITIONS_AHEAD = 2
+COPY_BATCH_SIZE = 10000
+COLUMNS = 'id, text, survey_id, question_id, choice_id, user_id'
+
+
+def create_constraints(execute, table, primary_key, suffix):
+    """ Ключи и индексы новой таблицы, suffix отличает их имена от имен старой таблицы """
+    execute(f"ALTER TABLE {table} ADD CONSTRAINT surveys_answer_pkey{suffix} PRIMARY KEY ({primary_key})")
+    for column, target in (('survey_id', 'surveys_survey'), ('question_id', 'surveys_question'),
+                           ('choice_id', 'surveys_choice')):
+        execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT surveys_answer_{column}_fk{suffix} "
+            f"FOREIGN KEY ({column}) REFERENCES {target} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+    for column in ('survey_id', 'question_id', 'choice_id', 'user_id'):
+        execute(f"CREATE INDEX surveys_answer_{column}_idx{suffix} ON {table} ({column})")
+
+
+def copy_online(schema_editor, source, target):
+    """
+    Копирует строки source в target порциями по id, каждая порция - отдельная
+    транзакция, поэтому запись в source не останавливается. Пока идет копирование,
+    триггер повторяет в target вставки, изменения и удаления строк source.
+    Порция блокирует свои строки (FOR SHARE), поэтому удаление строки
+    не может проскочить между чтением порции и ее вставкой
+    """
+    execute = schema_editor.execute
+    execute(f"""
+        CREATE FUNCTION {source}_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {target} WHERE id = OLD.id AND survey_id = OLD.survey_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {target} ({COLUMNS}) VALUES (NEW.id, NEW.text, NEW.survey_id,
+                    NEW.question_id, NEW.choice_id, NEW.user_id) ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    execute(f"""
+        CREATE TRIGGER {source}_mirror AFTER INSERT OR UPDATE OR DELETE ON {source}
+        FOR EACH ROW EXECUTE PROCEDURE {source}_mirror()
+    """)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT coalesce(min(id), 0), coalesce(max(id), 0) FROM {source}")
+        first_id, last_id = cursor.fetchone()
+        for start in range(first_id, last_id + 1, COPY_BATCH_SIZE):
+            cursor.execute(
+                f"INSERT INTO {target} ({COLUMNS}) "
+                f"SELECT {COLUMNS} FROM {source} WHERE id >= %s AND id < %s FOR SHARE "
+                f"ON CONFLICT DO NOTHING",
+                [start, start + COPY_BATCH_SIZE]
+            )
+
+
+def swap_tables(schema_editor, source, target, renamed):
+    """
+    Одной короткой транзакцией подменяет source на target:
+    блокировка нужна только на переименование, строки уже скопированы
+    """
+    execute = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT pg_get_serial_sequence('{source}', 'id')")
+        sequence, = cursor.fetchone()
+    with transaction.atomic(using=schema_editor.connection.alias):
+        execute(f"LOCK TABLE {source} IN ACCESS EXCLUSIVE MODE")
+        execute(f"DROP TRIGGER {source}_mirror ON {source}")
+        execute(f"DROP FUNCTION {source}_mirror()")
+        execute(f"ALTER TABLE {source} RENAME TO {renamed}")
+        execute(f"ALTER TABLE {target} RENAME TO {source}")
+        execute(f"ALTER SEQUENCE {sequence} OWNED BY {source}.id")
+    execute(f"DROP TABLE {renamed}")
+
+
+def partition_answers(apps, schema_editor):
+    """
+    Переводит surveys_answer в таблицу, секционированную по диапазонам survey_id
+    (PostgreSQL): секция хранит ответы PARTITION_SURVEYS опросов подряд.
+    Первичный ключ секционированной таблицы должен включать ключ секционирования,
+    поэтому он становится (id, survey_id). Секции создаются для существующих
+    опросов и PARTITIONS_AHEAD диапазонов вперед, дальше их создает
+    manage.py answer_partitions ensure. Ответы без секции попадают в surveys_answer_default
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    Survey = apps.get_model('surveys', 'Survey')
+    execute = schema_editor.execute
+
+    execute(
+        "CREATE TABLE surveys_answer_partitioned (LIKE surveys_answer INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (survey_id)"
+    )
+    create_constraints(execute, 'surveys_answer_partitioned', 'id, survey_id', '_partitioned')
+    execute("CREATE TABLE surveys_answer_default PARTITION OF surveys_answer_partitioned DEFAULT")
+
+    starts = {survey_id // PARTITION_SURVEYS * PARTITION_SURVEYS
+              for survey_id in Survey.objects.values_list('id', flat=True).iterator()}
+    last_start = max(starts, default=0)
+    starts.update(last_start + number * PARTITION_SURVEYS for number in range(PARTITIONS_AHEAD + 1))
+    for start in sorted(starts):
+        execute(
+            f"CREATE TABLE surveys_answer_p{start} PARTITION OF surveys_answer_partitioned "
+            f"FOR VALUES FROM ({start}) TO ({start + PARTITION_SURVEYS})"
+        )
+
+    copy_online(schema_editor, 'surveys_answer', 'surveys_answer_partitioned')
+    swap_tables(schema_editor, 'surveys_answer', 'surveys_answer_partitioned', 'surveys_answer_unpartitioned')
+
+
+def unpartition_answers(apps, schema_editor):
+    """ Возвращает обычную таблицу surveys_answer тем же копированием порциями """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    execute = schema_editor.execute
+    execute("CREATE TABLE surveys_answer_plain (LIKE surveys_answer INCLUDING DEFAULTS)")
+    create_constraints(execute, 'surveys_answer_plain', 'id', '')
+    copy_online(schema_editor, 'surveys_answer', 'surveys_answer_plain')
+    swap_tables(schema_editor, 'surveys_answer', 'surveys_answer_plain', 'surveys_answer_partitioned')
+
+
+class Migration(migrations.Migration):
+    # Копирование идет порциями в отдельных транзакциях
+    atomic = False
+
+    dependencies = [
+        ('surveys', '0005_ingestedbatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_answers, unpartition_answers),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.10 on 2026-10-18 15:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0006_partition_answer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSurveyResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(verbose_name='ID пользователя')),
+                ('survey_updated_at', models.DateTimeField(null=True, verbose_name='Дата изменения опроса')),
+                ('document', models.TextField(default='', verbose_name='Результат в JSON')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_results', to='surveys.Survey', verbose_name='Опрос')),
+            ],
+            options={
+                'verbose_name': 'Результат пользователя',
+                'verbose_name_plural': 'Результаты пользователей',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='usersurveyresult',
+            constraint=models.UniqueConstraint(fields=('user_id', 'survey'), name='surveys_usersurveyresult_unique'),
+        ),
+    ]
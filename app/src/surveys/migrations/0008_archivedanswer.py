@@ -0,0 +1,33 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0007_usersurveyresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAnswer',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(null=True, verbose_name='Текст ответа')),
+                ('user_id', models.IntegerField(verbose_name='ID пользователя')),
+                ('choice', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_answers', to='surveys.Choice', verbose_name='Вариант ответа')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_answers', to='surveys.Question', verbose_name='Ответ')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_answers', to='surveys.Survey', verbose_name='Опрос')),
+            ],
+            options={
+                'verbose_name': 'Ответ в архиве',
+                'verbose_name_plural': 'Ответы в архиве',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedanswer',
+            index=models.Index(fields=['user_id', 'survey'], name='surveys_archivedanswer_user'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 2.2.10 on 2026-10-18 20:00
+
+from django.db import migrations, transaction
+
+# Границы секций совпадают с surveys.partitions.ANSWER_PARTITION_SURVEYS
+PARTITION_SURVEYS = 100
+# Совпадает с surveys.partitions.ANSWER_PARTITIONS_AHEAD
+PARTITIONS_AHEAD = 5
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('surveys_answer')")
+    return cursor.fetchone() is not None
+
+
+def partition_exists(cursor, name):
+    cursor.execute(
+        "SELECT 1 FROM pg_inherits WHERE inhparent = to_regclass('surveys_answer') AND inhrelid = to_regclass(%s)",
+        [name]
+    )
+    return cursor.fetchone() is not None
+
+
+def create_partition(cursor, start):
+    """ Секция диапазона [start, start + PARTITION_SURVEYS) с ответами этого диапазона из секции по умолчанию """
+    name = f"surveys_answer_p{start}"
+    end = start + PARTITION_SURVEYS
+    cursor.execute(f"CREATE TABLE {name} (LIKE surveys_answer INCLUDING DEFAULTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM surveys_answer_default WHERE survey_id >= %s AND survey_id < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        [start, end]
+    )
+    # Ограничение с границами секции избавляет ATTACH от проверки строк
+    cursor.execute(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+        f"CHECK (survey_id IS NOT NULL AND survey_id >= {start} AND survey_id < {end})"
+    )
+    cursor.execute(f"ALTER TABLE surveys_answer ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})")
+    cursor.execute(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds")
+
+
+def drop_default_partition(apps, schema_editor):
+    """
+    Удаляет секцию surveys_answer_default, созданную миграцией 0006:
+    при секции по умолчанию нельзя отключать секции через DETACH ... CONCURRENTLY.
+    Ответы, попавшие в секцию по умолчанию, переносятся в секции своих диапазонов,
+    секции создаются и на PARTITIONS_AHEAD диапазонов вперед. Секция удаляется,
+    только если после переноса в ней не осталось строк
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor) or not partition_exists(cursor, 'surveys_answer_default'):
+            return
+        cursor.execute("SELECT DISTINCT survey_id / %s FROM surveys_answer_default", [PARTITION_SURVEYS])
+        starts = {number * PARTITION_SURVEYS for number, in cursor.fetchall()}
+        cursor.execute("SELECT coalesce(max(id), 0) / %s FROM surveys_survey", [PARTITION_SURVEYS])
+        last_start = cursor.fetchone()[0] * PARTITION_SURVEYS
+        starts.update(last_start + number * PARTITION_SURVEYS for number in range(PARTITIONS_AHEAD + 1))
+
+    for start in sorted(starts):
+        # Каждая секция - отдельная транзакция, запись в остальные секции не останавливается
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            if not partition_exists(cursor, f"surveys_answer_p{start}"):
+                create_partition(cursor, start)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("LOCK TABLE surveys_answer IN ACCESS EXCLUSIVE MODE")
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM surveys_answer_default)")
+        if cursor.fetchone()[0]:
+            raise RuntimeError('В секции surveys_answer_default остались ответы, секция не удалена')
+        cursor.execute("ALTER TABLE surveys_answer DETACH PARTITION surveys_answer_default")
+        cursor.execute("DROP TABLE surveys_answer_default")
+
+
+def create_default_partition(apps, schema_editor):
+    """ Возвращает секцию по умолчанию, как после миграции 0006 """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor) and not partition_exists(cursor, 'surveys_answer_default'):
+            cursor.execute("CREATE TABLE surveys_answer_default PARTITION OF surveys_answer DEFAULT")
+
+
+class Migration(migrations.Migration):
+    # Секции создаются отдельными транзакциями
+    atomic = False
+
+    dependencies = [
+        ('surveys', '0008_archivedanswer'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_default_partition, create_default_partition),
+    ]
@@ -12,6 +12,7 @@ class Survey(models.Model):
     start_at = models.DateField(verbose_name='Дата старта')
     end_at = models.DateField(verbose_name='Дата окночания')
     description = models.TextField(null=True, verbose_name='Подробное описание')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата изменения')
 
     class Meta:
         verbose_name = "Опрос"
@@ -26,6 +27,16 @@ class Survey(models.Model):
         surveys = Survey.objects.filter(start_at__lte=date_now, end_at__gte=date_now)
         return surveys
 
+    @staticmethod
+    def touch(survey_id):
+        """ Отмечает изменение опроса при изменении вопросов и вариантов ответа """
+        Survey.objects.filter(pk=survey_id).update(updated_at=timezone.now())
+
+    @property
+    def result_answers(self) -> list:
+        """ Ответы опроса из основной таблицы и архива по возрастанию id """
+        return sorted([*self.answers.all(), *self.archived_answers.all()], key=lambda answer: answer.id)
+
     def clean(self):
         super().clean()
         self._date_validate()
@@ -113,3 +124,130 @@ class Answer(models.Model):
 
     def __str__(self):
         return f"ID {self.id}"
+
+
+class ArchivedAnswer(models.Model):
+    """
+    Ответ пользователя в архиве
+    Ответы завершившихся опросов переносятся сюда из Answer
+    с теми же id (manage.py archive_answers) и читаются вместе с ними
+    """
+    id = models.IntegerField(primary_key=True, verbose_name='ID')
+    text = models.TextField(null=True, verbose_name='Текст ответа')
+    survey = models.ForeignKey(
+        Survey,
+        on_delete=models.CASCADE,
+        related_name='archived_answers',
+        verbose_name='Опрос'
+    )
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='archived_answers',
+        verbose_name='Ответ'
+    )
+    choice = models.ForeignKey(
+        Choice,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='archived_answers',
+        verbose_name='Вариант ответа')
+    user_id = models.IntegerField(verbose_name='ID пользователя')
+
+    class Meta:
+        verbose_name = "Ответ в архиве"
+        verbose_name_plural = "Ответы в архиве"
+        indexes = [
+            models.Index(fields=['user_id', 'survey'], name='surveys_archivedanswer_user'),
+        ]
+
+    def __str__(self):
+        return f"ID {self.id}"
+
+
+class AnswerTally(models.Model):
+    """
+    Счетчик ответов по вопросу и варианту ответа
+    Счетчик разбит на несколько строк (шардов), чтобы параллельные
+    записи ответов не ждали блокировку одной строки
+    """
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='tallies',
+        verbose_name='Вопрос'
+    )
+    choice = models.ForeignKey(
+        Choice,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='tallies',
+        verbose_name='Вариант ответа'
+    )
+    shard = models.PositiveSmallIntegerField(verbose_name='Шард')
+    count = models.BigIntegerField(default=0, verbose_name='Количество ответов')
+
+    class Meta:
+        verbose_name = "Счетчик ответов"
+        verbose_name_plural = "Счетчики ответов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['question', 'choice', 'shard'],
+                name='surveys_answertally_unique_choice'
+            ),
+            models.UniqueConstraint(
+                fields=['question', 'shard'],
+                condition=models.Q(choice=None),
+                name='surveys_answertally_unique_text'
+            ),
+        ]
+
+    def __str__(self):
+        return f"ID {self.id}"
+
+
+class IngestedBatch(models.Model):
+    """
+    Партия ответов, загруженная в базу
+    Запись создается в одной транзакции с ответами партии
+    и не дает загрузить партию повторно
+    """
+    key = models.CharField(max_length=255, unique=True, verbose_name='Ключ партии')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')
+
+    class Meta:
+        verbose_name = "Загруженная партия ответов"
+        verbose_name_plural = "Загруженные партии ответов"
+
+    def __str__(self):
+        return self.key
+
+
+class UserSurveyResult(models.Model):
+    """
+    Готовый JSON результатов пользователя по опросу для GET /result/
+    Обновляется вместе с записью ответов пользователя, а после
+    изменения опроса (updated_at) перестраивается при чтении
+    """
+    user_id = models.IntegerField(verbose_name='ID пользователя')
+    survey = models.ForeignKey(
+        Survey,
+        on_delete=models.CASCADE,
+        related_name='user_results',
+        verbose_name='Опрос'
+    )
+    survey_updated_at = models.DateTimeField(null=True, verbose_name='Дата изменения опроса')
+    document = models.TextField(default='', verbose_name='Результат в JSON')
+
+    class Meta:
+        verbose_name = "Результат пользователя"
+        verbose_name_plural = "Результаты пользователей"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'survey'],
+                name='surveys_usersurveyresult_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"ID {self.id}"
@@ -0,0 +1,125 @@
+import bisect
+from collections import OrderedDict
+
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from surveys.renderers import render_json
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по id без OFFSET
+    Курсор - id последнего объекта предыдущей страницы,
+    поэтому любая страница стоит столько же, сколько первая
+    Принимает QuerySet (в том числе .values() с полем id) или список, отсортированный по id.
+    Представление может задать другое поле курсора атрибутом cursor_field
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_field = getattr(view, 'cursor_field', 'pk')
+        page_size = self.get_page_size(request)
+        cursor = self.get_cursor(request)
+
+        if isinstance(queryset, QuerySet):
+            if cursor is not None:
+                queryset = queryset.filter(**{f'{self.cursor_field}__gt': cursor})
+            items = list(queryset.order_by(self.cursor_field)[:page_size + 1])
+        else:
+            start = 0 if cursor is None else bisect.bisect_right(queryset, cursor, key=self.get_item_cursor)
+            items = queryset[start:start + page_size + 1]
+
+        self.next_cursor = self.get_item_cursor(items[page_size - 1]) if len(items) > page_size else None
+        return items[:page_size]
+
+    def paginate_rows(self, fetch, request):
+        """
+        Страница строк, которые выбирает сама функция fetch
+
+        :param fetch: fetch(cursor, limit) -> список пар (значение курсора, строка)
+        :return list: строки страницы
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        rows = fetch(self.get_cursor(request), page_size + 1)
+        self.next_cursor = rows[page_size - 1][0] if len(rows) > page_size else None
+        return [row for _, row in rows[:page_size]]
+
+    def get_item_cursor(self, item):
+        """ Значение поля курсора объекта или строки .values() """
+        field = 'id' if self.cursor_field == 'pk' else self.cursor_field
+        return item[field] if isinstance(item, dict) else getattr(item, self.cursor_field)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_prerendered_response(self, documents: list):
+        """
+        Ответ того же вида, что get_paginated_response,
+        из готовых JSON документов страницы
+
+        :param documents: документы в байтах
+        """
+        next_link = self.get_next_link()
+        content = b''.join([
+            b'{"next":', b'null' if next_link is None else render_json(next_link),
+            b',"results":[', b','.join(documents), b']}'
+        ])
+        return HttpResponse(content, content_type='application/json')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor is None:
+            return None
+        try:
+            return int(cursor)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, 'coreapi must be installed to use `get_schema_fields()`'
+        assert coreschema is not None, 'coreschema must be installed to use `get_schema_fields()`'
+        return [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.Integer(description='ID последнего объекта предыдущей страницы')
+            ),
+            coreapi.Field(
+                name=self.page_size_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.Integer(description='Количество объектов на странице')
+            ),
+        ]
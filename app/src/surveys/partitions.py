@@ -0,0 +1,211 @@
+from django.db import connection, transaction
+from django.db.models import Max
+
+from surveys.models import Answer, Survey
+
+ANSWER_TABLE = Answer._meta.db_table
+# Секция хранит ответы ANSWER_PARTITION_SURVEYS опросов подряд по id,
+# поэтому число секций растет в ANSWER_PARTITION_SURVEYS раз медленнее числа опросов.
+# Менять после создания секций нельзя: границы существующих секций не сдвигаются
+ANSWER_PARTITION_SURVEYS = 100
+# Сколько секций создается заранее после секции последнего опроса.
+# Секции по умолчанию нет (с ней нельзя DETACH ... CONCURRENTLY),
+# поэтому ответы опроса без секции не записываются
+ANSWER_PARTITIONS_AHEAD = 5
+# DETACH PARTITION ... CONCURRENTLY появился в PostgreSQL 14
+DETACH_CONCURRENTLY_VERSION = 140000
+
+
+def partition_bounds(survey_id: int) -> tuple:
+    """ Границы секции опроса: [начало, конец) диапазона survey_id """
+    start = int(survey_id) // ANSWER_PARTITION_SURVEYS * ANSWER_PARTITION_SURVEYS
+    return start, start + ANSWER_PARTITION_SURVEYS
+
+
+def partition_name(survey_id: int) -> str:
+    """ Имя секции таблицы ответов, в которую попадают ответы опроса """
+    start, _ = partition_bounds(survey_id)
+    return f"{ANSWER_TABLE}_p{start}"
+
+
+def is_partitioned() -> bool:
+    """ Таблица ответов разбита на секции по диапазонам опросов (только PostgreSQL) """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [ANSWER_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions() -> list:
+    """ Начала диапазонов подключенных секций по возрастанию """
+    prefix = f"{ANSWER_TABLE}_p"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [ANSWER_TABLE]
+        )
+        names = [name for name, in cursor.fetchall()]
+    return sorted(int(name[len(prefix):]) for name in names if name.startswith(prefix))
+
+
+def partition_exists(survey_id: int) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_inherits WHERE inhparent = to_regclass(%s) AND inhrelid = to_regclass(%s)",
+            [ANSWER_TABLE, partition_name(survey_id)]
+        )
+        return cursor.fetchone() is not None
+
+
+def can_detach_concurrently() -> bool:
+    """ DETACH ... CONCURRENTLY доступен: PostgreSQL 14 и нет открытой транзакции """
+    return connection.pg_version >= DETACH_CONCURRENTLY_VERSION and not connection.in_atomic_block
+
+
+def is_detach_pending(name: str) -> bool:
+    """ Прерванный DETACH ... CONCURRENTLY оставляет секцию в состоянии отключения """
+    if connection.pg_version < DETACH_CONCURRENTLY_VERSION:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT inhdetachpending FROM pg_inherits WHERE inhparent = to_regclass(%s) AND inhrelid = to_regclass(%s)",
+            [ANSWER_TABLE, name]
+        )
+        row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def create_answer_partition(survey_id: int) -> bool:
+    """
+    Создает секцию ответов для диапазона опросов, в который входит survey_id
+    Секция создается отдельной таблицей и подключается через ATTACH PARTITION,
+    которая не блокирует запись в остальные секции. Advisory-блокировка
+    по имени секции не дает двум процессам создавать одну секцию одновременно
+
+    :return bool: секция создана
+    """
+    if not is_partitioned() or partition_exists(survey_id):
+        return False
+
+    name = partition_name(survey_id)
+    start, end = partition_bounds(survey_id)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [name])
+        if partition_exists(survey_id):
+            return False
+        cursor.execute(f"CREATE TABLE {name} (LIKE {ANSWER_TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(f"ALTER TABLE {ANSWER_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})")
+    return True
+
+
+def create_missing_partitions(ahead: int = ANSWER_PARTITIONS_AHEAD) -> int:
+    """
+    Создает секции для диапазонов существующих опросов и ahead секций
+    после диапазона последнего опроса, чтобы у новых опросов уже была секция.
+    Вызывается миграцией и командой answer_partitions ensure по расписанию
+
+    :return int: количество созданных секций
+    """
+    if not is_partitioned():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT id / %s FROM {Survey._meta.db_table}", [ANSWER_PARTITION_SURVEYS]
+        )
+        starts = {number * ANSWER_PARTITION_SURVEYS for number, in cursor.fetchall()}
+    last_start, _ = partition_bounds(get_last_survey_id())
+    starts.update(last_start + number * ANSWER_PARTITION_SURVEYS for number in range(ahead + 1))
+    return sum(create_answer_partition(start) for start in sorted(starts))
+
+
+def ensure_survey_partitions(survey_id: int, ahead: int = ANSWER_PARTITIONS_AHEAD) -> int:
+    """
+    Создает секцию нового опроса и ahead секций после нее, если их нет.
+    Вызывается после создания опроса (signals.create_survey_partitions),
+    поэтому ответы опроса не зависят от запуска answer_partitions ensure
+
+    :return int: количество созданных секций
+    """
+    if not is_partitioned():
+        return 0
+    existing = set(get_partitions())
+    start, _ = partition_bounds(survey_id)
+    starts = [start + number * ANSWER_PARTITION_SURVEYS for number in range(ahead + 1)]
+    return sum(create_answer_partition(start) for start in starts if start not in existing)
+
+
+def get_last_survey_id() -> int:
+    return Survey.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+
+def partition_survey_ids(survey_id: int) -> list:
+    """ ID опросов, ответы которых хранятся в той же секции, что и ответы survey_id """
+    start, end = partition_bounds(survey_id)
+    return list(Survey.objects.filter(id__gte=start, id__lt=end).order_by('id').values_list('id', flat=True))
+
+
+def is_partition_closed(survey_id: int) -> bool:
+    """ В диапазон секции больше не попадут новые опросы: id опросов только растут """
+    _, end = partition_bounds(survey_id)
+    return get_last_survey_id() >= end
+
+
+def get_empty_partitions() -> list:
+    """ Начала диапазонов закрытых секций, опросы которых удалены """
+    if not is_partitioned():
+        return []
+    return [
+        start for start in get_partitions()
+        if is_partition_closed(start) and not partition_survey_ids(start)
+    ]
+
+
+def detach_answer_partition(survey_id: int) -> str:
+    """
+    Отключает от таблицы ответов секцию с ответами опроса survey_id
+    Операция не зависит от количества ответов: данные остаются
+    в отдельной таблице, которую можно выгрузить или удалить.
+    Секция хранит ответы всех опросов диапазона partition_bounds.
+    Вне транзакции на PostgreSQL 14 используется DETACH ... CONCURRENTLY:
+    он не берет ACCESS EXCLUSIVE на таблицу ответов и не останавливает
+    чтение и запись. Прерванное отключение завершается через FINALIZE
+
+    :return str: имя отключенной таблицы
+    """
+    name = partition_name(survey_id)
+    with connection.cursor() as cursor:
+        if is_detach_pending(name):
+            cursor.execute(f"ALTER TABLE {ANSWER_TABLE} DETACH PARTITION {name} FINALIZE")
+        elif can_detach_concurrently():
+            cursor.execute(f"ALTER TABLE {ANSWER_TABLE} DETACH PARTITION {name} CONCURRENTLY")
+        else:
+            cursor.execute(f"ALTER TABLE {ANSWER_TABLE} DETACH PARTITION {name}")
+    return name
+
+
+def drop_answer_partition(survey_id: int) -> None:
+    """
+    Отключает и удаляет секцию с ответами опроса survey_id
+    DROP выполняется после отключения и блокирует только саму секцию
+    """
+    name = detach_answer_partition(survey_id)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {name}")
+
+
+def drop_empty_partitions() -> int:
+    """
+    Удаляет секции, все опросы которых удалены
+
+    :return int: количество удаленных секций
+    """
+    starts = get_empty_partitions()
+    for start in starts:
+        drop_answer_partition(start)
+    return len(starts)
@@ -0,0 +1,87 @@
+import time
+
+from django.db import transaction
+
+from surveys.models import Survey, Question, Choice, Answer, ArchivedAnswer, AnswerTally, UserSurveyResult
+from surveys.partitions import (
+    is_partitioned,
+    partition_exists,
+    partition_survey_ids,
+    is_partition_closed,
+    drop_answer_partition,
+)
+from surveys.signals import suspend_structure_signals
+
+PURGE_BATCH_SIZE = 5000
+
+
+def purge_survey(survey_id: int, batch_size: int = PURGE_BATCH_SIZE, pause: float = 0.0, progress=None) -> dict:
+    """
+    Удаляет опрос порциями, чтобы не держать блокировки одной большой транзакцией
+    Секция ответов удаляется целиком, если в ней нет других опросов и новые
+    в нее не попадут (partitions.is_partition_closed). Остальные ответы, ответы из архива
+    и документы результатов удаляются диапазонами id по batch_size строк,
+    каждая порция - отдельная транзакция. Затем так же удаляются счетчики,
+    варианты и вопросы без обработчиков сигналов на каждую строку.
+    Опрос удаляется последним, его сигнал один раз сбрасывает кеши
+
+    :param pause: пауза между порциями в секундах
+    :param progress: функция, которая получает (таблица, количество удаленных строк)
+    :return dict: количество удаленных строк по таблицам
+    """
+    deleted = {}
+    if is_partitioned() and partition_exists(survey_id) and is_partition_closed(survey_id) \
+            and partition_survey_ids(survey_id) == [survey_id]:
+        drop_answer_partition(survey_id)
+        deleted['partition'] = 1
+
+    querysets = (
+        Answer.objects.filter(survey_id=survey_id),
+        ArchivedAnswer.objects.filter(survey_id=survey_id),
+        UserSurveyResult.objects.filter(survey_id=survey_id),
+        AnswerTally.objects.filter(question__survey_id=survey_id),
+        Choice.objects.filter(question__survey_id=survey_id),
+        Question.objects.filter(survey_id=survey_id),
+    )
+    with suspend_structure_signals():
+        for queryset in querysets:
+            table = queryset.model._meta.db_table
+            deleted[table] = delete_in_batches(
+                queryset, batch_size, pause,
+                lambda count, table=table: progress and progress(table, count)
+            )
+
+    with transaction.atomic():
+        _, counts = Survey.objects.filter(pk=survey_id).delete()
+    deleted.update({label: count for label, count in counts.items() if count})
+    return deleted
+
+
+def delete_in_batches(queryset, batch_size: int, pause: float = 0.0, progress=None) -> int:
+    """
+    Удаляет строки queryset диапазонами id, не больше batch_size строк за транзакцию
+
+    :param progress: функция, которая получает количество удаленных строк
+    :return int: количество удаленных строк
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            # id последней строки порции или None, если осталось меньше batch_size строк
+            last_id = next(iter(queryset.order_by('id').values_list('id', flat=True)[batch_size - 1:batch_size]), None)
+            batch = queryset.filter(id__lte=last_id) if last_id is not None else queryset
+            count, _ = batch.delete()
+        if not count:
+            return total
+        total += count
+        if progress:
+            progress(total)
+        if last_id is None:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+def get_expired_surveys(ended_before) -> list:
+    """ ID опросов, завершившихся раньше даты ended_before """
+    return list(Survey.objects.filter(end_at__lt=ended_before).order_by('id').values_list('id', flat=True))
@@ -1,21 +1,121 @@
-from django.db.models import QuerySet, Prefetch
+import json
 
-from surveys.models import Survey, Answer
+from django.db import connections, router
+from django.db.models import QuerySet, Prefetch, Exists, OuterRef, Q
 
+from surveys.models import Survey, Question, Choice, Answer, ArchivedAnswer
+from surveys.renderers import render_json
 
-def get_result_queryset(user_id: int) -> QuerySet:
+
+def user_answered(user_id: int, model=Answer, after: int = None) -> Exists:
+    """
+    Условие "пользователь отвечал на опрос" вместо JOIN с DISTINCT
+    С after подзапрос получает условие survey_id > after, по которому
+    PostgreSQL еще при планировании отбрасывает секции опросов до курсора
+    """
+    answers = model.objects.filter(user_id=user_id, survey_id=OuterRef('pk'))
+    if after is not None:
+        answers = answers.filter(survey_id__gt=after)
+    return Exists(answers)
+
+
+def get_answered_surveys(user_id: int, after: int = None) -> QuerySet:
+    """
+    Опросы, на которые пользователь отвечал, с ответами в основной таблице или в архиве
+
+    :param after: курсор страницы, ID последнего опроса предыдущей страницы
+    """
+    surveys = Survey.objects.all() if after is None else Survey.objects.filter(pk__gt=after)
+    return surveys.annotate(
+        answered=user_answered(user_id, after=after),
+        answered_archived=user_answered(user_id, ArchivedAnswer, after=after)
+    ).filter(Q(answered=True) | Q(answered_archived=True))
+
+
+def get_result_queryset(user_id: int, after: int = None) -> QuerySet:
     """
     Возвращает QuerySet результатов всех опросов
     Пройденных пользователем user_id
+    Поиск опросов ограничен курсором страницы after, а ответы подгружаются
+    с фильтром по survey_id опросов страницы, поэтому PostgreSQL читает
+    только их секции таблицы ответов.
+    Ответы из архива подгружаются так же и объединяются в Survey.result_answers
 
     :param user_id: ID пользователя
+    :param after: курсор страницы, ID последнего опроса предыдущей страницы
     :return QuerySet:
     """
-    queryset = Survey.objects.filter(
-        answers__user_id=user_id).distinct().prefetch_related(
+    queryset = get_answered_surveys(user_id, after).prefetch_related(
         Prefetch('answers',
                  queryset=Answer.objects.filter(user_id=user_id)
                  .select_related('question')
-                 .select_related('choice'))
+                 .select_related('choice')
+                 .order_by('id')),
+        Prefetch('archived_answers',
+                 queryset=ArchivedAnswer.objects.filter(user_id=user_id)
+                 .select_related('question')
+                 .select_related('choice')
+                 .order_by('id'))
     )
     return queryset
+
+
+def result_json_supported() -> bool:
+    """ Результаты можно собрать в JSON на стороне базы (PostgreSQL) """
+    return connections[router.db_for_read(Answer)].vendor == 'postgresql'
+
+
+def get_result_json(user_id: int, cursor, limit: int) -> list:
+    """
+    Страница результатов пользователя одним запросом к PostgreSQL
+    Опрос с ответами собирается в JSON через json_build_object и json_agg
+    в формате ResultHandleSerializer, ответы читаются из основной таблицы и архива.
+    PostgreSQL выводит JSON с пробелами и без экранирования \u2028, поэтому
+    документ перекодируется render_json и совпадает с ответом API побайтно.
+    Условие на survey_id по курсору отбрасывает секции опросов предыдущих страниц
+
+    :param user_id: ID пользователя
+    :param cursor: ID последнего опроса предыдущей страницы или None
+    :param limit: количество опросов
+    :return list: пары (ID опроса, JSON опроса с ответами в байтах)
+    """
+    answers = f"""(
+        SELECT id, user_id, survey_id, question_id, choice_id, text FROM {Answer._meta.db_table}
+        UNION ALL
+        SELECT id, user_id, survey_id, question_id, choice_id, text FROM {ArchivedAnswer._meta.db_table}
+    )"""
+    sql = f"""
+        SELECT s.id, json_build_object(
+            'id', s.id,
+            'name', s.name,
+            'start_at', s.start_at,
+            'end_at', s.end_at,
+            'description', s.description,
+            'answers', (
+                SELECT coalesce(json_agg(json_build_object(
+                    'id', a.id,
+                    'user_id', a.user_id,
+                    'survey', a.survey_id,
+                    'question', json_build_object('id', q.id, 'text', q.text, 'type', q.type),
+                    'choice', CASE WHEN c.id IS NULL THEN NULL
+                                   ELSE json_build_object('id', c.id, 'text', c.text) END,
+                    'text', a.text
+                ) ORDER BY a.id), '[]')
+                FROM {answers} a
+                JOIN {Question._meta.db_table} q ON q.id = a.question_id
+                LEFT JOIN {Choice._meta.db_table} c ON c.id = a.choice_id
+                WHERE a.user_id = %(user_id)s AND a.survey_id = s.id
+            )
+        )::text
+        FROM {Survey._meta.db_table} s
+        WHERE EXISTS (
+            SELECT 1 FROM {answers} a WHERE a.user_id = %(user_id)s AND a.survey_id = s.id
+                AND (%(cursor)s::bigint IS NULL OR a.survey_id > %(cursor)s::bigint)
+        ) AND (%(cursor)s::bigint IS NULL OR s.id > %(cursor)s::bigint)
+        ORDER BY s.id
+        LIMIT %(limit)s
+    """
+    with connections[router.db_for_read(Answer)].cursor() as db_cursor:
+        db_cursor.execute(sql, {'user_id': user_id, 'cursor': cursor, 'limit': limit})
+        rows = db_cursor.fetchall()
+    return [(survey_id, render_json(json.loads(document))) for survey_id, document in rows]
@@ -0,0 +1,37 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson
+    Вывод совпадает с JSONRenderer побайтно: компактные разделители,
+    UTF-8 без экранирования, экранированные \\u2028 и \\u2029.
+    Даты и остальные типы, которые orjson выводит иначе,
+    передаются кодировщику DRF. Если orjson не установлен,
+    запрошен отступ или изменены настройки UNICODE_JSON и COMPACT_JSON,
+    рендеринг выполняет JSONRenderer
+    """
+    orjson_options = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.orjson_options)
+        except TypeError:
+            # Например, целые числа больше 64 бит
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def render_json(data) -> bytes:
+    """ JSON тела ответа, как его отдает API """
+    return FastJSONRenderer().render(data)
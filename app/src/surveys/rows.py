@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.db.models import QuerySet
+
+from surveys.models import Answer, ArchivedAnswer
+from surveys.querysets import get_answered_surveys
+
+SURVEY_FIELDS = ('id', 'name', 'start_at', 'end_at', 'description')
+ANSWER_FIELDS = (
+    'id', 'user_id', 'survey_id', 'question_id', 'question__text', 'question__type',
+    'choice_id', 'choice__text', 'text',
+)
+
+
+def fast_reads_enabled() -> bool:
+    """
+    Списки опросов и результатов строятся из .values() без сериализаторов DRF
+    Вывод повторяет SurveysSerializer и ResultHandleSerializer поле в поле
+    """
+    return getattr(settings, 'SURVEYS_FAST_READS', False)
+
+
+def survey_row(survey) -> dict:
+    """
+    Опрос в формате SurveysSerializer
+
+    :param survey: объект Survey или словарь .values(*SURVEY_FIELDS)
+    """
+    if not isinstance(survey, dict):
+        survey = {field: getattr(survey, field) for field in SURVEY_FIELDS}
+    return {
+        'id': survey['id'],
+        'name': survey['name'],
+        'start_at': survey['start_at'].isoformat(),
+        'end_at': survey['end_at'].isoformat(),
+        'description': survey['description'],
+    }
+
+
+def survey_rows(surveys) -> list:
+    return [survey_row(survey) for survey in surveys]
+
+
+def get_result_values(user_id: int, after: int = None) -> QuerySet:
+    """ Опросы, пройденные пользователем, только с нужными колонками """
+    return get_answered_surveys(user_id, after).values(*SURVEY_FIELDS)
+
+
+def result_rows(surveys: list, user_id: int) -> list:
+    """
+    Результаты опросов в формате ResultHandleSerializer
+    Ответы всех опросов страницы читаются одним запросом
+
+    :param surveys: словари get_result_values
+    :param user_id: ID пользователя
+    """
+    answers = answer_rows([user_id], [survey['id'] for survey in surveys]) if surveys else {}
+    rows = []
+    for survey in surveys:
+        row = survey_row(survey)
+        row['answers'] = answers.get((user_id, survey['id']), [])
+        rows.append(row)
+    return rows
+
+
+def answer_rows(user_ids, survey_ids) -> dict:
+    """
+    Ответы пользователей на опросы из основной таблицы и архива
+    в формате AnswersSerializer одним запросом (UNION ALL)
+
+    :return dict: {(user_id, survey_id): [ответы по возрастанию id]}
+    """
+    answers = {}
+    live, archived = (
+        model.objects.filter(
+            user_id__in=list(user_ids), survey_id__in=list(survey_ids)
+        ).order_by().values_list(*ANSWER_FIELDS)
+        for model in (Answer, ArchivedAnswer)
+    )
+    queryset = live.union(archived, all=True).order_by('id')
+    for (answer_id, user_id, survey_id, question_id, question_text, question_type,
+         choice_id, choice_text, text) in queryset:
+        answers.setdefault((user_id, survey_id), []).append({
+            'id': answer_id,
+            'user_id': user_id,
+            'survey': survey_id,
+            'question': {'id': question_id, 'text': question_text, 'type': question_type},
+            'choice': None if choice_id is None else {'id': choice_id, 'text': choice_text},
+            'text': text,
+        })
+    return answers
@@ -1,6 +1,14 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
+from surveys.db_routers import read_from_primary
+from surveys.documents import refresh_result_documents
 from surveys.models import Survey, Question, Choice, Answer
+from surveys.structure import get_survey_structure
+from surveys.tallies import increment_tallies
+
+SURVEY_DOES_NOT_EXIST = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
 
 
 class ChoicesSerializer(serializers.ModelSerializer):
@@ -57,15 +65,40 @@ class AnswersSerializer(serializers.ModelSerializer):
 
 class ResultHandleSerializer(serializers.ModelSerializer):
     """ Результаты всех пройденных опросов пользователем """
-    answers = AnswersSerializer(read_only=True, many=True)
+    answers = AnswersSerializer(source='result_answers', read_only=True, many=True)
 
     class Meta:
         model = Survey
         fields = ('id', 'name', 'start_at', 'end_at', 'description', 'answers')
 
 
+def check_answer_structure(structure: dict, question_id: int, choice_id) -> dict:
+    """
+    Проверяет по индексу опроса, что вопрос относится к опросу,
+    а вариант ответа к вопросу
+
+    :return dict: ошибки по полям, пустой словарь если ошибок нет
+    """
+    question = structure['questions'].get(question_id)
+    if question is None:
+        return {'question': ["Вопрос не относится к опросу."]}
+    if choice_id and choice_id not in question['choices']:
+        return {'choice': ["Вариант ответа не относится к вопросу."]}
+    return {}
+
+
+def get_structure_or_error(survey_id: int) -> dict:
+    structure = get_survey_structure(survey_id)
+    if structure is None:
+        raise serializers.ValidationError({'survey': [SURVEY_DOES_NOT_EXIST.format(pk_value=survey_id)]})
+    return structure
+
+
 class CreateAnswerSerializer(serializers.ModelSerializer):
     """ Ответы пользователя для записи в базу """
+    survey = serializers.IntegerField(source='survey_id')
+    question = serializers.IntegerField(source='question_id')
+    choice = serializers.IntegerField(source='choice_id', required=False, allow_null=True)
 
     class Meta:
         model = Answer
@@ -74,6 +107,194 @@ class CreateAnswerSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         message = "Введите текст или выберите подходящий вариант ответа."
 
-        if not any([attrs.get('text'), attrs.get('choice')]):
+        if not any([attrs.get('text'), attrs.get('choice_id')]):
             raise serializers.ValidationError(message, code='required')
+
+        structure = get_structure_or_error(attrs['survey_id'])
+        errors = check_answer_structure(structure, attrs['question_id'], attrs.get('choice_id'))
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            answer = super().create(validated_data)
+            increment_tallies([answer])
+            refresh_result_documents([answer])
+        return answer
+
+    def get_answer_records(self) -> list:
+        """ Ответ в виде словаря полей Answer для отложенной записи """
+        data = self.validated_data
+        return [{
+            'survey_id': data['survey_id'],
+            'question_id': data['question_id'],
+            'choice_id': data.get('choice_id'),
+            'text': data.get('text'),
+            'user_id': data['user_id'],
+        }]
+
+
+class BatchAnswerItemSerializer(serializers.Serializer):
+    """ Ответ на один вопрос в составе пакетной отправки """
+    question = serializers.IntegerField(source='question_id')
+    choice = serializers.IntegerField(source='choice_id', required=False, allow_null=True)
+    text = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+    def validate(self, attrs):
+        message = "Введите текст или выберите подходящий вариант ответа."
+
+        if not any([attrs.get('text'), attrs.get('choice_id')]):
+            raise serializers.ValidationError(message, code='required')
+        return attrs
+
+
+class CreateSurveyAnswersSerializer(serializers.Serializer):
+    """ Все ответы пользователя на опрос одним запросом """
+    survey = serializers.IntegerField(source='survey_id')
+    user_id = serializers.IntegerField()
+    answers = BatchAnswerItemSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        structure = get_structure_or_error(attrs['survey_id'])
+        errors = [
+            check_answer_structure(structure, answer['question_id'], answer.get('choice_id'))
+            for answer in attrs['answers']
+        ]
+        if any(errors):
+            raise serializers.ValidationError({'answers': errors})
+        return attrs
+
+    def create(self, validated_data):
+        survey_id = validated_data['survey_id']
+        user_id = validated_data['user_id']
+        answers = [
+            Answer(
+                survey_id=survey_id,
+                user_id=user_id,
+                question_id=item['question_id'],
+                choice_id=item.get('choice_id'),
+                text=item.get('text'),
+            )
+            for item in validated_data['answers']
+        ]
+        with transaction.atomic():
+            Answer.objects.bulk_create(answers)
+            increment_tallies(answers)
+            refresh_result_documents(answers)
+        return {'survey_id': survey_id, 'user_id': user_id, 'answers': answers}
+
+    def get_answer_records(self) -> list:
+        """ Ответы в виде словарей полей Answer для отложенной записи """
+        data = self.validated_data
+        return [
+            {
+                'survey_id': data['survey_id'],
+                'question_id': item['question_id'],
+                'choice_id': item.get('choice_id'),
+                'text': item.get('text'),
+                'user_id': data['user_id'],
+            }
+            for item in data['answers']
+        ]
+
+
+class ChoiceTallySerializer(serializers.Serializer):
+    """ Количество ответов на вариант ответа """
+    id = serializers.IntegerField()
+    total = serializers.IntegerField()
+
+
+class QuestionTallySerializer(serializers.Serializer):
+    """ Количество ответов на вопрос и его варианты """
+    id = serializers.IntegerField()
+    total = serializers.IntegerField()
+    choices = ChoiceTallySerializer(many=True)
+
+
+class SurveyTallySerializer(serializers.Serializer):
+    """ Количество ответов на вопросы опроса """
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    questions = QuestionTallySerializer(many=True)
+
+
+class ChoiceDocumentSerializer(serializers.Serializer):
+    """ Вариант ответа в документе опроса, с id - существующий """
+    id = serializers.IntegerField(required=False)
+    text = serializers.CharField(max_length=100)
+
+
+class QuestionDocumentSerializer(serializers.Serializer):
+    """ Вопрос в документе опроса, с id - существующий """
+    id = serializers.IntegerField(required=False)
+    text = serializers.CharField()
+    type = serializers.ChoiceField(choices=Question.TYPES)
+    choices = ChoiceDocumentSerializer(many=True, required=False)
+
+
+class SurveyDocumentSerializer(serializers.Serializer):
+    """ Опрос с вопросами и вариантами ответа для записи одним запросом """
+    name = serializers.CharField(max_length=255)
+    start_at = serializers.DateField()
+    end_at = serializers.DateField()
+    description = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    questions = QuestionDocumentSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        # Как и в панели администратора, дата старта не меняется после создания опроса
+        if self.instance is not None and attrs.get('start_at', self.instance.start_at) != self.instance.start_at:
+            raise serializers.ValidationError({'start_at': ["Дату старта нельзя изменить после создания опроса."]})
+
+        start_at = attrs.get('start_at', getattr(self.instance, 'start_at', None))
+        end_at = attrs.get('end_at', getattr(self.instance, 'end_at', None))
+        if start_at > end_at:
+            raise serializers.ValidationError("Дата начала опроса не может быть позже даты окончания опроса")
+
+        if 'questions' in attrs:
+            errors = self._check_ids(attrs['questions'])
+            if any(errors):
+                raise serializers.ValidationError({'questions': errors})
+        return attrs
+
+    def _check_ids(self, questions: list) -> list:
+        """ Вопросы и варианты с id должны относиться к изменяемому опросу и не повторяться """
+        existing = {}
+        if self.instance is not None:
+            with read_from_primary():
+                rows = Question.objects.filter(survey=self.instance).values_list('id', 'choices__id')
+            for question_id, choice_id in rows:
+                existing.setdefault(question_id, set()).add(choice_id)
+
+        errors, seen_questions, seen_choices = [], set(), set()
+        for question in questions:
+            question_id = question.get('id')
+            if question_id is not None and (question_id not in existing or question_id in seen_questions):
+                errors.append({'id': ["Вопрос не относится к опросу."]})
+                continue
+            seen_questions.add(question_id)
+            choice_ids = [choice['id'] for choice in question.get('choices', []) if 'id' in choice]
+            choices = existing.get(question_id, set())
+            if any(choice_id not in choices or choice_id in seen_choices for choice_id in choice_ids):
+                errors.append({'choices': ["Вариант ответа не относится к вопросу."]})
+                continue
+            seen_choices.update(choice_ids)
+            errors.append({})
+        return errors
+
+    def to_representation(self, instance):
+        with read_from_primary():
+            prefetch_related_objects([instance], 'questions__choices')
+        return SurveysRetrieveSerializer(instance).data
+
+
+class SurveyCloneSerializer(serializers.Serializer):
+    """ Новые даты и название копии опроса """
+    name = serializers.CharField(max_length=255, required=False)
+    start_at = serializers.DateField()
+    end_at = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['start_at'] > attrs['end_at']:
+            raise serializers.ValidationError("Дата начала опроса не может быть позже даты окончания опроса")
         return attrs
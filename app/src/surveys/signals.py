@@ -0,0 +1,92 @@
+import contextlib
+import contextvars
+import logging
+
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from surveys.cache import invalidate_active_surveys
+from surveys.models import Survey, Question, Choice, Answer
+from surveys.partitions import ensure_survey_partitions
+from surveys.structure import invalidate_survey_structure
+
+logger = logging.getLogger(__name__)
+
+_suspended = contextvars.ContextVar('surveys_signals_suspended', default=False)
+
+
+@contextlib.contextmanager
+def suspend_structure_signals():
+    """
+    Отключает обработчики вопросов и вариантов ответа, например при удалении
+    опроса целиком: без них удаление не делает запросов на каждую строку,
+    а кеши сбрасываются один раз при удалении самого опроса
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+@receiver([post_save, post_delete], sender=Survey)
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=Choice)
+def survey_structure_changed(sender, instance, **kwargs):
+    """ Сброс кешей при изменении опроса, вопросов или вариантов ответа """
+    if _suspended.get():
+        return
+    invalidate_active_surveys()
+    survey_id = get_survey_id(instance)
+    if survey_id:
+        if sender is not Survey:
+            Survey.touch(survey_id)
+        invalidate_survey_structure(survey_id)
+
+
+def get_survey_id(instance):
+    """ ID опроса, к которому относится опрос, вопрос или вариант ответа """
+    if isinstance(instance, Survey):
+        return instance.pk
+    if isinstance(instance, Question):
+        return instance.survey_id
+    return Question.objects.filter(pk=instance.question_id).values_list('survey_id', flat=True).first()
+
+
+@receiver(post_save, sender=Survey)
+def create_survey_partitions(sender, instance, created, **kwargs):
+    """
+    Секции таблицы ответов для нового опроса (PostgreSQL). Опросы создаются
+    через API, копированием и в админке; секция создается после коммита,
+    вне транзакции запроса, чтобы ATTACH PARTITION не держал ее блокировки
+    """
+    if created:
+        transaction.on_commit(lambda: _ensure_partitions(instance.pk))
+
+
+def _ensure_partitions(survey_id):
+    try:
+        ensure_survey_partitions(survey_id)
+    except DatabaseError:
+        # Опрос уже сохранен, секцию создаст answer_partitions ensure
+        logger.exception('Не удалось создать секцию ответов для опроса %s', survey_id)
+
+
+@receiver(pre_delete, sender=Question)
+@receiver(pre_delete, sender=Choice)
+def delete_answers(sender, instance, **kwargs):
+    """
+    Удаляет ответы на вопрос или вариант с условием на survey_id,
+    чтобы удаление читало одну секцию таблицы ответов. Каскадное удаление
+    Django после этого ищет ответы по question_id и choice_id во всех секциях
+    по индексу и ничего не находит. Счетчики этих ответов (AnswerTally)
+    удаляются каскадно вместе с вопросом или вариантом, поэтому не уменьшаются
+    """
+    if _suspended.get():
+        return
+    survey_id = get_survey_id(instance)
+    if survey_id is None:
+        return
+    field = 'question_id' if sender is Question else 'choice_id'
+    Answer.objects.filter(survey_id=survey_id, **{field: instance.pk}).delete()
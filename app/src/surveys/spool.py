@@ -0,0 +1,283 @@
+import fcntl
+import glob
+import itertools
+import json
+import logging
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from surveys.documents import refresh_result_documents
+from surveys.models import Answer, IngestedBatch
+from surveys.tallies import increment_tallies
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerSpool:
+    """
+    Журнал принятых, но еще не записанных в базу ответов
+
+    Воркеры дописывают ответы в файл answers.spool и делают fsync
+    до ответа клиенту. Журнал больше max_bytes переименовывается в сегмент
+    сразу при записи. Фоновый процесс (manage.py flush_answers) переименовывает
+    журнал в сегмент и загружает сегмент порциями по chunk_size ответов,
+    каждая порция - одна транзакция вместе с записью IngestedBatch, поэтому
+    после перезапуска незагруженные порции догружаются, а загруженные
+    не повторяются. Ответы, которые не удалось записать (IntegrityError),
+    переносятся в файл dead-letter.spool
+    """
+    ACTIVE_NAME = 'answers.spool'
+    DEAD_LETTER_NAME = 'dead-letter.spool'
+    SEGMENT_PATTERN = 'segment-*.spool'
+
+    def __init__(self, directory: str, fsync: bool = True, max_bytes: int = 1024 * 1024, chunk_size: int = 1000):
+        self.directory = directory
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.active_path = os.path.join(directory, self.ACTIVE_NAME)
+        self.dead_letter_path = os.path.join(directory, self.DEAD_LETTER_NAME)
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, records: list) -> None:
+        """
+        Дописывает ответы в журнал
+
+        :param records: словари с полями survey_id, question_id, choice_id, text, user_id
+        """
+        now = time.time()
+        data = ''.join(json.dumps({'ts': now, 'answer': record}, ensure_ascii=False) + '\n' for record in records)
+        data = data.encode()
+
+        while True:
+            fd = os.open(self.active_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o640)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                # Файл могли переименовать в сегмент, пока ждали блокировку
+                if not self._is_active(fd):
+                    continue
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b'\n':
+                    # Хвост недописанной строки упавшего воркера
+                    data = b'\n' + data
+                os.write(fd, data)
+                if self.fsync:
+                    os.fsync(fd)
+                if size + len(data) >= self.max_bytes:
+                    self._rename_active()
+                return
+            finally:
+                os.close(fd)
+
+    def rotate(self):
+        """
+        Переименовывает непустой журнал в сегмент
+
+        :return: путь к сегменту или None, если журнал пуст
+        """
+        try:
+            fd = os.open(self.active_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if not self._is_active(fd) or not os.fstat(fd).st_size:
+                return None
+            return self._rename_active()
+        finally:
+            os.close(fd)
+
+    def _rename_active(self) -> str:
+        """ Переименовывает журнал в сегмент, вызывается под блокировкой журнала """
+        name = f"segment-{time.time_ns():020d}-{socket.gethostname()}-{os.getpid()}.spool"
+        path = os.path.join(self.directory, name)
+        os.rename(self.active_path, path)
+        return path
+
+    def segments(self) -> list:
+        """ Сегменты, ожидающие загрузки, от старых к новым """
+        return sorted(glob.glob(os.path.join(self.directory, self.SEGMENT_PATTERN)))
+
+    def active_size(self) -> int:
+        try:
+            return os.stat(self.active_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def dead_letter_size(self) -> int:
+        try:
+            return os.stat(self.dead_letter_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def flush_segment(self, path: str) -> tuple:
+        """
+        Загружает сегмент в базу порциями по chunk_size ответов и удаляет его
+        Сегмент читается построчно и не загружается в память целиком
+
+        :param path: путь к сегменту
+        :return tuple: (количество ответов, задержка самой старой записи в секундах)
+        :raise ValueError: загрузка сегмента начата с другим размером порции
+        """
+        key = f"spool:{os.path.basename(path)}"
+        count, oldest = 0, None
+        # Сегмент целиком загружен до перехода на порции
+        if not IngestedBatch.objects.filter(key=key).exists():
+            self._check_chunk_size(key)
+            entries = self._read_segment(path)
+            for number in itertools.count():
+                chunk = list(itertools.islice(entries, self.chunk_size))
+                if not chunk:
+                    break
+                chunk_oldest = min(entry['ts'] for entry in chunk)
+                oldest = chunk_oldest if oldest is None else min(oldest, chunk_oldest)
+                count += self._flush_chunk(f"{key}:{number}", chunk)
+
+        os.remove(path)
+        lag = time.time() - oldest if oldest else 0.0
+        return count, lag
+
+    def _check_chunk_size(self, key: str) -> None:
+        """
+        Закрепляет размер порции за сегментом
+        Загруженные порции отмечаются номерами, а они зависят от размера порции:
+        продолжение с другим размером загрузило бы часть ответов повторно
+        или пропустило незагруженные
+        """
+        prefix = f"{key}:chunk-size:"
+        stored = IngestedBatch.objects.filter(key__startswith=prefix).values_list('key', flat=True).first()
+        if stored is None:
+            IngestedBatch.objects.get_or_create(key=f"{prefix}{self.chunk_size}")
+        elif stored != f"{prefix}{self.chunk_size}":
+            raise ValueError(
+                f"Загрузка сегмента {key} начата с размером порции {stored[len(prefix):]}, "
+                f"продолжите ее с тем же SURVEYS__ANSWER_SPOOL_CHUNK_SIZE"
+            )
+
+    def _flush_chunk(self, key: str, entries: list) -> int:
+        """
+        Записывает порцию ответов одной транзакцией
+        Если порция не записывается целиком из-за IntegrityError, ответы
+        записываются по одному, а не записанные переносятся в dead-letter.spool
+
+        :return int: количество записанных ответов
+        """
+        answers = [Answer(**entry['answer']) for entry in entries]
+        with transaction.atomic():
+            _, created = IngestedBatch.objects.get_or_create(key=key)
+            if not created:
+                return 0
+            try:
+                with transaction.atomic():
+                    Answer.objects.bulk_create(answers, batch_size=1000)
+                    self._check_constraints()
+            except IntegrityError:
+                answers = self._create_one_by_one(entries)
+            increment_tallies(answers)
+            refresh_result_documents(answers)
+        return len(answers)
+
+    def _create_one_by_one(self, entries: list) -> list:
+        created, rejected = [], []
+        for entry in entries:
+            answer = Answer(**entry['answer'])
+            try:
+                with transaction.atomic():
+                    answer.save(force_insert=True)
+                    self._check_constraints()
+            except IntegrityError as error:
+                rejected.append(dict(entry, error=str(error)))
+            else:
+                created.append(answer)
+        if rejected:
+            logger.error("Ответов перенесено в %s: %s", self.dead_letter_path, len(rejected))
+            self._write_dead_letter(rejected)
+        return created
+
+    @staticmethod
+    def _check_constraints():
+        """ Внешние ключи проверяются при коммите, здесь они проверяются сразу """
+        connection.check_constraints(table_names=[Answer._meta.db_table])
+
+    def _write_dead_letter(self, entries: list) -> None:
+        data = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries).encode()
+        fd = os.open(self.dead_letter_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        try:
+            os.write(fd, data)
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def flush(self) -> tuple:
+        """
+        Переименовывает журнал и загружает все сегменты
+
+        :return tuple: (количество ответов, наибольшая задержка в секундах)
+        """
+        self.rotate()
+        total, max_lag = 0, 0.0
+        for path in self.segments():
+            count, lag = self.flush_segment(path)
+            total += count
+            max_lag = max(max_lag, lag)
+        return total, max_lag
+
+    def lag(self) -> float:
+        """ Возраст самой старой незагруженной записи в секундах """
+        for path in self.segments() + [self.active_path]:
+            oldest = self._first_timestamp(path)
+            if oldest:
+                return time.time() - oldest
+        return 0.0
+
+    def _is_active(self, fd) -> bool:
+        try:
+            return os.fstat(fd).st_ino == os.stat(self.active_path).st_ino
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _read_segment(path):
+        """ Записи сегмента по одной """
+        with open(path, encoding='utf-8') as segment:
+            for line in segment:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning("Пропущена недописанная строка в %s", path)
+                    continue
+                yield entry
+
+    @staticmethod
+    def _first_timestamp(path):
+        try:
+            with open(path, encoding='utf-8') as segment:
+                line = segment.readline()
+        except FileNotFoundError:
+            return None
+        try:
+            return json.loads(line)['ts']
+        except (ValueError, KeyError):
+            return None
+
+
+def get_answer_spool():
+    """
+    Журнал ответов, если включена отложенная запись
+
+    :return: AnswerSpool или None
+    """
+    directory = getattr(settings, 'SURVEYS_ANSWER_SPOOL_DIR', None)
+    if not directory:
+        return None
+    return AnswerSpool(
+        directory,
+        fsync=getattr(settings, 'SURVEYS_ANSWER_SPOOL_FSYNC', True),
+        max_bytes=getattr(settings, 'SURVEYS_ANSWER_SPOOL_MAX_BYTES', 1024 * 1024),
+        chunk_size=getattr(settings, 'SURVEYS_ANSWER_SPOOL_CHUNK_SIZE', 1000),
+    )
@@ -0,0 +1,70 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from surveys.db_routers import read_from_primary
+from surveys.models import Survey
+
+SURVEY_STRUCTURE_KEY = 'surveys:structure:{}:{}'
+SURVEY_STRUCTURE_VERSION_KEY = 'surveys:structure:{}:version'
+# Индекс хранится под версией опроса, индексы старых версий истекают сами
+SURVEY_STRUCTURE_TIMEOUT = 24 * 60 * 60
+# Отсутствие опроса кешируется ненадолго, чтобы запросы
+# со случайными ID не заполняли кеш бессрочными записями
+MISSING_SURVEY_TIMEOUT = 60
+
+
+def get_survey_structure(survey_id: int):
+    """
+    Возвращает индекс опрос -> вопросы -> варианты ответа из кеша
+    Строится по тем же данным, что и SurveysRetrieveSerializer.
+    Ключ индекса содержит версию опроса, которая меняется при изменении опроса,
+    вопросов или вариантов ответа, поэтому индекс, построенный до коммита
+    изменения и записанный после него, не будет прочитан
+
+    :param survey_id: ID опроса
+    :return: словарь {'id', 'questions': {id: {'type', 'choices'}}}
+             или None, если опроса нет
+    """
+    key = SURVEY_STRUCTURE_KEY.format(survey_id, get_survey_structure_version(survey_id))
+    structure = cache.get(key)
+    if structure is None:
+        with read_from_primary():
+            survey = Survey.objects.filter(pk=survey_id).prefetch_related('questions__choices').first()
+        structure = build_survey_structure(survey) if survey else False
+        cache.set(key, structure, timeout=SURVEY_STRUCTURE_TIMEOUT if structure else MISSING_SURVEY_TIMEOUT)
+    return structure or None
+
+
+def build_survey_structure(survey: Survey) -> dict:
+    return {
+        'id': survey.id,
+        'questions': {
+            question.id: {
+                'type': question.type,
+                'choices': frozenset(choice.id for choice in question.choices.all()),
+            }
+            for question in survey.questions.all()
+        },
+    }
+
+
+def get_survey_structure_version(survey_id: int) -> str:
+    """ Текущая версия индекса опроса, при потере в кеше выдается новая """
+    key = SURVEY_STRUCTURE_VERSION_KEY.format(survey_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_survey_structure(survey_id: int) -> None:
+    """
+    Меняет версию индекса опроса сразу и повторно после коммита:
+    индекс, построенный по данным до коммита, остается под старой версией
+    """
+    key = SURVEY_STRUCTURE_VERSION_KEY.format(survey_id)
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, timeout=None))
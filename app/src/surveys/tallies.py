@@ -0,0 +1,131 @@
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Sum, Count
+
+from surveys.models import Answer, AnswerTally, ArchivedAnswer, Question
+
+
+def get_shards_count() -> int:
+    return getattr(settings, 'SURVEYS_TALLY_SHARDS', 8)
+
+
+def increment_tallies(answers) -> None:
+    """
+    Увеличивает счетчики ответов
+    Вызывается в той же транзакции, что и запись ответов
+
+    :param answers: записанные ответы
+    """
+    _add_to_tallies(answers, 1)
+
+
+def decrement_tallies(answers) -> None:
+    """
+    Уменьшает счетчики ответов. Шард выбирается случайно и может уйти
+    в минус, сумма по шардам при этом остается верной.
+    Вызывается в той же транзакции, что и удаление или изменение ответов
+
+    :param answers: удаленные ответы или их прежние значения
+    """
+    _add_to_tallies(answers, -1)
+
+
+def _add_to_tallies(answers, sign: int) -> None:
+    counter = Counter((answer.question_id, answer.choice_id) for answer in answers)
+    shards = get_shards_count()
+    # Одинаковый порядок обновления строк исключает взаимные блокировки
+    keys = sorted(counter, key=lambda key: (key[0], key[1] or 0))
+    targets = [(question_id, choice_id, random.randrange(shards)) for question_id, choice_id in keys]
+
+    missing = [target for target in targets if not _update_tally(target, sign * counter[target[:2]])]
+    if missing:
+        AnswerTally.objects.bulk_create(
+            [AnswerTally(question_id=question_id, choice_id=choice_id, shard=shard)
+             for question_id, choice_id, shard in missing],
+            ignore_conflicts=True
+        )
+        for target in missing:
+            _update_tally(target, sign * counter[target[:2]])
+
+
+def get_survey_tallies(survey_id: int) -> list:
+    """
+    Количество ответов на вопросы и варианты ответов опроса
+    Стоимость зависит от количества вариантов ответа, а не ответов
+
+    :param survey_id: ID опроса
+    :return list: вопросы с количеством ответов на них и на их варианты
+    """
+    totals = {
+        (row['question_id'], row['choice_id']): row['total']
+        for row in AnswerTally.objects.filter(question__survey_id=survey_id)
+        .values('question_id', 'choice_id').annotate(total=Sum('count'))
+    }
+    question_totals = Counter()
+    for (question_id, _), total in totals.items():
+        question_totals[question_id] += total
+
+    questions = Question.objects.filter(survey_id=survey_id).order_by('id').prefetch_related('choices')
+    return [
+        {
+            'id': question.id,
+            'total': question_totals[question.id],
+            'choices': [
+                {'id': choice.id, 'total': totals.get((question.id, choice.id), 0)}
+                for choice in question.choices.all()
+            ],
+        }
+        for question in questions
+    ]
+
+
+def rebuild_tallies(survey_ids=None) -> int:
+    """
+    Пересчитывает счетчики по таблице ответов и архиву
+    На PostgreSQL таблица счетчиков блокируется до подсчета и до конца
+    транзакции: запись ответов ждет пересчета, и ответы, записанные
+    между подсчетом и заменой счетчиков, не теряются
+
+    :param survey_ids: ID опросов, по умолчанию все
+    :return int: количество записанных счетчиков
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {AnswerTally._meta.db_table} IN EXCLUSIVE MODE")
+        return _rebuild_tallies(survey_ids)
+
+
+def _rebuild_tallies(survey_ids) -> int:
+    tallies = AnswerTally.objects.all()
+    if survey_ids:
+        tallies = tallies.filter(question__survey_id__in=survey_ids)
+
+    totals = Counter()
+    for model in (Answer, ArchivedAnswer):
+        answers = model.objects.all()
+        if survey_ids:
+            answers = answers.filter(survey_id__in=survey_ids)
+        rows = answers.order_by().values('question_id', 'choice_id').annotate(total=Count('id'))
+        for row in rows.iterator():
+            totals[(row['question_id'], row['choice_id'])] += row['total']
+
+    tallies.delete()
+    created = AnswerTally.objects.bulk_create(
+        (AnswerTally(question_id=question_id, choice_id=choice_id, shard=0, count=total)
+         for (question_id, choice_id), total in totals.items()),
+        batch_size=1000
+    )
+    return len(created)
+
+
+def _update_tally(target, count) -> int:
+    question_id, choice_id, shard = target
+    return AnswerTally.objects.filter(
+        question_id=question_id,
+        choice_id=choice_id,
+        shard=shard
+    ).update(count=F('count') + count)
@@ -0,0 +1,99 @@
+import datetime
+
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from surveys.changelists import estimate_count
+from surveys.models import Survey, Question, Choice, Answer
+from surveys.tallies import increment_tallies, get_survey_tallies
+
+
+class AnswersAdminTestCase(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.choice = Choice.objects.create(text='Вариант 1', question=self.question)
+
+    def create_answers(self, count: int):
+        Answer.objects.bulk_create([
+            Answer(user_id=user_id, survey=self.survey, question=self.question, choice=self.choice)
+            for user_id in range(count)
+        ])
+
+    def get_changelist_queries(self, **params) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:surveys_answer_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        self.create_answers(5)
+        small = self.get_changelist_queries()
+        self.create_answers(150)
+        self.assertEqual(self.get_changelist_queries(), small)
+
+    def test_cursor_pages(self):
+        self.create_answers(150)
+        url = reverse('admin:surveys_answer_changelist')
+        response = self.client.get(url)
+        first_page = [answer.id for answer in response.context['cl'].result_list]
+        next_cursor = response.context['cl'].next_cursor
+        self.assertEqual(len(first_page), 100)
+        self.assertEqual(next_cursor, first_page[-1])
+
+        response = self.client.get(url, {'cursor': next_cursor})
+        second_page = [answer.id for answer in response.context['cl'].result_list]
+        self.assertEqual(len(second_page), 50)
+        self.assertTrue(max(second_page) < min(first_page))
+        self.assertIsNone(response.context['cl'].next_cursor)
+
+    def test_estimate_count(self):
+        self.create_answers(3)
+        self.assertEqual(estimate_count(Answer.objects.all()), 3)
+        self.assertEqual(estimate_count(Answer.objects.filter(user_id=1)), 1)
+
+    def test_change_form_uses_raw_id_widgets(self):
+        self.create_answers(1)
+        answer = Answer.objects.get()
+        response = self.client.get(reverse('admin:surveys_answer_change', args=(answer.id,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'vForeignKeyRawIdAdminField', count=2)
+
+    def choice_totals(self):
+        return {choice['id']: choice['total'] for choice in get_survey_tallies(self.survey.id)[0]['choices']}
+
+    def test_change_answer_moves_tally(self):
+        other = Choice.objects.create(text='Вариант 2', question=self.question)
+        self.create_answers(2)
+        increment_tallies(Answer.objects.all())
+        answer = Answer.objects.first()
+
+        response = self.client.post(reverse('admin:surveys_answer_change', args=(answer.id,)), {
+            'user_id': answer.user_id, 'survey': self.survey.id, 'question': self.question.id,
+            'choice': other.id, 'text': 'Текст',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual({self.choice.id: 1, other.id: 1}, self.choice_totals())
+
+    def test_delete_answers_decrements_tallies(self):
+        self.create_answers(3)
+        increment_tallies(Answer.objects.all())
+        answers = list(Answer.objects.order_by('id'))
+
+        self.client.post(reverse('admin:surveys_answer_delete', args=(answers[0].id,)), {'post': 'yes'})
+        self.assertEqual({self.choice.id: 2}, self.choice_totals())
+        self.client.post(reverse('admin:surveys_answer_changelist'), {
+            'action': 'delete_selected', 'post': 'yes', helpers.ACTION_CHECKBOX_NAME: [answers[1].id],
+        })
+        self.assertEqual({self.choice.id: 1}, self.choice_totals())
@@ -1,9 +1,16 @@
 import datetime
 import json
+from unittest import mock
 
+from django.db import connection
 from django.db.models import Prefetch
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
 from surveys.models import Survey, Question, Choice, Answer
@@ -79,14 +86,89 @@ class SurveysApiTestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         expected_data = SurveysSerializer([self.survey_1, self.survey_2], many=True).data
-        self.assertEqual(expected_data, response.data)
+        self.assertEqual(expected_data, response.data['results'])
 
     def test_get_detail(self):
         url = reverse('survey-detail', args=(self.survey_1.id,))
         response = self.client.get(url)
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         expected_data = SurveysRetrieveSerializer(self.survey_1).data
-        self.assertEqual(expected_data, response.data)
+        self.assertEqual(JSONRenderer().render(expected_data), response.content)
+
+    def test_get_detail_not_active(self):
+        url = reverse('survey-detail', args=(self.survey_3.id,))
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_get_detail_after_choice_update(self):
+        url = reverse('survey-detail', args=(self.survey_1.id,))
+        self.client.get(url)
+        self.choice_1.text = 'Choice 1 updated'
+        self.choice_1.save()
+        response = self.client.get(url)
+        self.assertEqual('Choice 1 updated', response.json()['questions'][0]['choices'][0]['text'])
+
+    def test_get_list_paginated(self):
+        url = reverse('survey-list')
+        response = self.client.get(url, {'page_size': 1})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([self.survey_1.id], [item['id'] for item in response.data['results']])
+        self.assertIn(f"cursor={self.survey_1.id}", response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([self.survey_2.id], [item['id'] for item in response.data['results']])
+        self.assertIsNone(response.data['next'])
+
+    def test_get_list_invalid_cursor(self):
+        url = reverse('survey-list')
+        response = self.client.get(url, {'cursor': 'abc'})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_get_list_not_modified(self):
+        url = reverse('survey-list')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(b'', response.content)
+
+    def test_get_list_modified_after_delete(self):
+        url = reverse('survey-list')
+        last_modified = self.client.get(url)['Last-Modified']
+        later = datetime.datetime.now() + datetime.timedelta(seconds=2)
+        with mock.patch('surveys.cache.timezone.now', return_value=later):
+            self.survey_2.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([self.survey_1.id], [survey['id'] for survey in response.json()['results']])
+
+    def test_last_modified_in_local_time(self):
+        url = reverse('survey-detail', args=(self.survey_1.id,))
+        response = self.client.get(url)
+        expected = int(timezone.make_aware(self.survey_1.updated_at).timestamp())
+        self.assertEqual(http_date(expected), response['Last-Modified'])
+
+    def test_get_detail_not_modified(self):
+        url = reverse('survey-detail', args=(self.survey_1.id,))
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_get_detail_if_modified_since(self):
+        url = reverse('survey-detail', args=(self.survey_1.id,))
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_get_detail_etag_changed_by_question(self):
+        url = reverse('survey-detail', args=(self.survey_1.id,))
+        etag = self.client.get(url)['ETag']
+        self.question_1.text = 'Текст 1 изменен'
+        self.question_1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
 
     def test_content_type(self):
         url = reverse('survey-list')
@@ -100,11 +182,26 @@ class SurveysApiTestCase(APITestCase):
         with self.assertNumQueries(3):
             self.client.get(url)
 
+    def test_num_queries_survey_retrieve_cached(self):
+        url = reverse('survey-detail', args=(self.survey_1.id,))
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
     def test_num_queries_surveys_list(self):
         url = reverse('survey-list')
         with self.assertNumQueries(1):
             self.client.get(url)
 
+    def test_num_queries_surveys_list_cached(self):
+        url = reverse('survey-list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        expected_data = SurveysSerializer([self.survey_1, self.survey_2], many=True).data
+        self.assertEqual(expected_data, response.data['results'])
+
 
 class ResultApiTestCase(APITestCase):
     def setUp(self) -> None:
@@ -177,7 +274,7 @@ class ResultApiTestCase(APITestCase):
         data = {
             "user_id": 1,
             "survey": self.survey_1.id,
-            "question": self.question_2.id,
+            "question": self.question_1.id,
             "choice": self.choice_1.id
         }
         json_data = json.dumps(data)
@@ -219,6 +316,73 @@ class ResultApiTestCase(APITestCase):
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
         self.assertEqual(3, Answer.objects.all().count())
 
+    def test_create_batch_result(self):
+        url = reverse('result-batch')
+        data = {
+            "user_id": 2,
+            "survey": self.survey_1.id,
+            "answers": [
+                {"question": self.question_1.id, "choice": self.choice_1.id},
+                {"question": self.question_2.id, "text": "Some text"},
+            ]
+        }
+        json_data = json.dumps(data)
+
+        response = self.client.post(url, data=json_data, content_type='application/json')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(2, Answer.objects.filter(user_id=2, survey=self.survey_1).count())
+
+    def test_create_batch_result_foreign_question(self):
+        url = reverse('result-batch')
+        data = {
+            "user_id": 2,
+            "survey": self.survey_1.id,
+            "answers": [
+                {"question": self.question_1.id, "choice": self.choice_1.id},
+                {"question": self.question_3.id, "choice": self.choice_4.id},
+            ]
+        }
+        json_data = json.dumps(data)
+
+        response = self.client.post(url, data=json_data, content_type='application/json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual({}, response.data['answers'][0])
+        self.assertIn('question', response.data['answers'][1])
+        self.assertEqual(0, Answer.objects.filter(user_id=2).count())
+
+    def test_create_batch_result_foreign_choice(self):
+        url = reverse('result-batch')
+        data = {
+            "user_id": 2,
+            "survey": self.survey_1.id,
+            "answers": [
+                {"question": self.question_1.id, "choice": self.choice_4.id},
+            ]
+        }
+        json_data = json.dumps(data)
+
+        response = self.client.post(url, data=json_data, content_type='application/json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('choice', response.data['answers'][0])
+        self.assertEqual(0, Answer.objects.filter(user_id=2).count())
+
+    @override_settings(SURVEYS_TALLY_SHARDS=1)
+    def test_num_queries_batch_result(self):
+        url = reverse('result-batch')
+        data = {
+            "user_id": 2,
+            "survey": self.survey_1.id,
+            "answers": [
+                {"question": self.question_1.id, "choice": self.choice_1.id},
+                {"question": self.question_2.id, "text": "Some text"},
+            ]
+        }
+        json_data = json.dumps(data)
+        self.client.post(url, data=json_data, content_type='application/json')
+
+        with self.assertNumQueries(5):
+            self.client.post(url, data=json_data, content_type='application/json')
+
     def test_get_result(self):
         url = reverse('result-list')
         url_user_id = f"{url}?user_id=1"
@@ -231,7 +395,20 @@ class ResultApiTestCase(APITestCase):
                      .select_related('question')
                      .select_related('choice')))
         expected_data = ResultHandleSerializer(queryset, many=True).data
-        self.assertEqual(expected_data, response.data)
+        self.assertEqual(expected_data, response.json()['results'])
+
+    def test_get_result_paginated(self):
+        url = reverse('result-list')
+        response = self.client.get(url, {'user_id': 1, 'page_size': 1}).json()
+        self.assertEqual([self.survey_1.id], [item['id'] for item in response['results']])
+        self.assertEqual(2, len(response['results'][0]['answers']))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(response['next']).json()
+        self.assertEqual([self.survey_2.id], [item['id'] for item in response['results']])
+        self.assertIsNone(response['next'])
+        self.assertEqual(2, len(queries))
+        self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
 
     def test_get_without_query_params(self):
         url = reverse('result-list')
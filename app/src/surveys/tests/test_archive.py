@@ -0,0 +1,111 @@
+import datetime
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from surveys.archive import get_archivable_surveys, archive_survey_answers
+from surveys.documents import rebuild_result_documents
+from surveys.exports import iter_answer_rows
+from surveys.models import Survey, Question, Choice, Answer, ArchivedAnswer, UserSurveyResult
+from surveys.tallies import rebuild_tallies, get_survey_tallies
+
+
+class ArchiveFixtureMixin:
+    def setUp(self) -> None:
+        cache.clear()
+        self.ended = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today() - datetime.timedelta(days=7),
+            end_at=datetime.date.today() - datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.active = Survey.objects.create(
+            name='Название 2',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description=None
+        )
+        self.question_1 = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.ended)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.active)
+        self.choice = Choice.objects.create(text='Вариант 1', question=self.question_1)
+        for user_id in (1, 1, 2):
+            Answer.objects.create(user_id=user_id, survey=self.ended, question=self.question_1, choice=self.choice)
+        Answer.objects.create(user_id=1, survey=self.active, question=self.question_2, text='Ответ')
+        self.ended_ids = list(Answer.objects.filter(survey=self.ended).order_by('id').values_list('id', flat=True))
+
+
+class ArchiveTestCase(ArchiveFixtureMixin, TestCase):
+    def test_archivable_surveys(self):
+        self.assertEqual([self.ended.id], get_archivable_surveys())
+
+    def test_archive_in_batches(self):
+        progress = []
+        self.assertEqual(3, archive_survey_answers(self.ended.id, batch_size=2, progress=progress.append))
+        self.assertEqual([2, 3], progress)
+        self.assertFalse(Answer.objects.filter(survey=self.ended).exists())
+        self.assertEqual(self.ended_ids, list(ArchivedAnswer.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(1, Answer.objects.filter(survey=self.active).count())
+        self.assertEqual([], get_archivable_surveys())
+        self.assertEqual(0, archive_survey_answers(self.ended.id))
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('archive_answers', stdout=out)
+        self.assertIn('Перенесено в архив ответов: 3', out.getvalue())
+        self.assertEqual(3, ArchivedAnswer.objects.count())
+
+    def test_command_refuses_active_survey(self):
+        self.assertRaises(CommandError, call_command, 'archive_answers', '--survey', str(self.active.id))
+        self.assertFalse(ArchivedAnswer.objects.exists())
+
+    def test_export_reads_archive(self):
+        Answer.objects.create(user_id=3, survey=self.ended, question=self.question_1, choice=self.choice)
+        archive_survey_answers(self.ended.id, batch_size=2)
+        Answer.objects.create(user_id=4, survey=self.ended, question=self.question_1, choice=self.choice)
+        rows = list(iter_answer_rows(self.ended.id, chunk_size=2))
+        self.assertEqual(5, len(rows))
+        self.assertEqual(sorted(row[0] for row in rows), [row[0] for row in rows])
+
+    def test_rebuild_tallies_counts_archive(self):
+        archive_survey_answers(self.ended.id)
+        rebuild_tallies([self.ended.id])
+        self.assertEqual(3, get_survey_tallies(self.ended.id)[0]['total'])
+
+    @override_settings(SURVEYS_RESULT_DOCUMENTS=True)
+    def test_rebuild_documents_keeps_archived(self):
+        rebuild_result_documents()
+        archive_survey_answers(self.ended.id)
+        self.assertEqual(3, rebuild_result_documents())
+        self.assertEqual(3, UserSurveyResult.objects.count())
+
+
+class ArchiveResultApiTestCase(ArchiveFixtureMixin, APITestCase):
+    def get_results(self):
+        return self.client.get(reverse('result-list'), {'user_id': 1}).json()
+
+    def assert_same_results(self):
+        expected = self.get_results()
+        archive_survey_answers(self.ended.id)
+        cache.clear()
+        self.assertEqual(expected, self.get_results())
+        self.assertEqual(2, len(expected['results'][0]['answers']))
+
+    @override_settings(SURVEYS_RESULT_DOCUMENTS=False, SURVEYS_FAST_READS=False)
+    def test_serializer(self):
+        self.assert_same_results()
+
+    @override_settings(SURVEYS_RESULT_DOCUMENTS=False, SURVEYS_FAST_READS=True)
+    def test_fast_reads(self):
+        self.assert_same_results()
+
+    @override_settings(SURVEYS_RESULT_DOCUMENTS=True)
+    def test_documents(self):
+        rebuild_result_documents()
+        self.assert_same_results()
+        Survey.touch(self.ended.id)
+        self.assertEqual(2, len(self.get_results()['results'][0]['answers']))
@@ -0,0 +1,147 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from surveys.models import Survey, Question, Choice
+
+
+class SurveyAuthoringApiTestCase(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(self.admin)
+        self.document = {
+            'name': 'Название 1',
+            'start_at': str(datetime.date.today()),
+            'end_at': str(datetime.date.today() + datetime.timedelta(days=1)),
+            'description': 'Описание 1',
+            'questions': [
+                {
+                    'text': f'Вопрос {number}',
+                    'type': Question.TYPE_RADIO,
+                    'choices': [{'text': f'Вариант {number}.{choice}'} for choice in range(3)],
+                }
+                for number in range(3)
+            ],
+        }
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(reverse('authoring-list'), self.document, format='json')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertFalse(Survey.objects.exists())
+
+    def test_create(self):
+        response = self.client.post(reverse('authoring-list'), self.document, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        survey = Survey.objects.get()
+        self.assertEqual(response.data['id'], survey.id)
+        self.assertEqual(
+            [question['text'] for question in response.data['questions']],
+            ['Вопрос 0', 'Вопрос 1', 'Вопрос 2']
+        )
+        self.assertEqual(Choice.objects.filter(question__survey=survey).count(), 9)
+        self.assertEqual(
+            list(Choice.objects.filter(question__text='Вопрос 1').values_list('text', flat=True).order_by('id')),
+            ['Вариант 1.0', 'Вариант 1.1', 'Вариант 1.2']
+        )
+
+    def test_create_queries_do_not_grow(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(reverse('authoring-list'), self.document, format='json')
+        self.document['questions'] *= 10
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(reverse('authoring-list'), self.document, format='json')
+        self.assertEqual(len(large), len(small))
+
+    def test_update_diff(self):
+        self.client.post(reverse('authoring-list'), self.document, format='json')
+        survey = Survey.objects.get()
+        questions = list(survey.questions.order_by('id'))
+        kept_choice = questions[0].choices.order_by('id').first()
+
+        response = self.client.put(reverse('authoring-detail', args=(survey.id,)), {
+            **self.document,
+            'name': 'Название 2',
+            'questions': [
+                {
+                    'id': questions[0].id,
+                    'text': 'Вопрос 0 изменен',
+                    'type': Question.TYPE_RADIO,
+                    'choices': [{'id': kept_choice.id, 'text': kept_choice.text}, {'text': 'Новый вариант'}],
+                },
+                {'id': questions[1].id, 'text': 'Вопрос 1', 'type': Question.TYPE_RADIO, 'choices': []},
+                {'text': 'Новый вопрос', 'type': Question.TYPE_TEXT},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        survey.refresh_from_db()
+        self.assertEqual(survey.name, 'Название 2')
+        self.assertEqual(
+            list(survey.questions.order_by('id').values_list('text', flat=True)),
+            ['Вопрос 0 изменен', 'Вопрос 1', 'Новый вопрос']
+        )
+        self.assertFalse(Question.objects.filter(pk=questions[2].id).exists())
+        self.assertEqual(
+            list(questions[0].choices.order_by('id').values_list('text', flat=True)),
+            [kept_choice.text, 'Новый вариант']
+        )
+        self.assertEqual(questions[0].choices.order_by('id').first().id, kept_choice.id)
+        self.assertFalse(questions[1].choices.exists())
+
+    def test_update_invalidates_snapshot(self):
+        self.client.post(reverse('authoring-list'), self.document, format='json')
+        survey = Survey.objects.get()
+        self.client.force_authenticate(None)
+        self.client.get(reverse('survey-detail', args=(survey.id,)))
+        self.client.force_authenticate(self.admin)
+
+        self.client.patch(reverse('authoring-detail', args=(survey.id,)), {
+            'questions': [{'text': 'Единственный вопрос', 'type': Question.TYPE_TEXT}],
+        }, format='json')
+
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('survey-detail', args=(survey.id,)))
+        self.assertEqual([question['text'] for question in response.json()['questions']], ['Единственный вопрос'])
+
+    def test_foreign_ids_rejected(self):
+        other = Survey.objects.create(
+            name='Другой', start_at=datetime.date.today(), end_at=datetime.date.today(), description=None
+        )
+        foreign = Question.objects.create(text='Чужой', type=Question.TYPE_TEXT, survey=other)
+        self.client.post(reverse('authoring-list'), self.document, format='json')
+        survey = Survey.objects.exclude(pk=other.pk).get()
+
+        response = self.client.patch(reverse('authoring-detail', args=(survey.id,)), {
+            'questions': [{'id': foreign.id, 'text': 'Текст', 'type': Question.TYPE_TEXT}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Question.objects.get(pk=foreign.pk).text, 'Чужой')
+
+    def test_invalid_dates(self):
+        self.document['start_at'], self.document['end_at'] = self.document['end_at'], self.document['start_at']
+        response = self.client.post(reverse('authoring-list'), self.document, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_start_at_read_only_on_update(self):
+        self.client.post(reverse('authoring-list'), self.document, format='json')
+        survey = Survey.objects.get()
+
+        response = self.client.put(reverse('authoring-detail', args=(survey.id,)), {
+            **self.document, 'start_at': str(survey.start_at - datetime.timedelta(days=1))
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start_at', response.data)
+        self.assertEqual(Survey.objects.get().start_at, survey.start_at)
+
+        response = self.client.put(reverse('authoring-detail', args=(survey.id,)), {
+            **self.document, 'name': 'Название 2'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from surveys.bench import ENDPOINTS, BENCH_USER_ID_BASE, seed, run, compare, percentile, remove_bench_data
+from surveys.models import Survey, Answer
+
+
+class BenchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed(self):
+        counts = seed(2, 3, 2, 4, random.Random(0))
+        self.assertEqual({'surveys': 2, 'questions': 6, 'choices': 12, 'answers': 24}, counts)
+        self.assertEqual(2, Survey.now_active().count())
+        self.assertEqual(24, Answer.objects.count())
+        self.assertFalse(Answer.objects.filter(user_id__lte=BENCH_USER_ID_BASE).exists())
+
+    def test_run(self):
+        seed(2, 3, 2, 4, random.Random(0))
+        report = run(ENDPOINTS, 3, 4, random.Random(0), warmup=1)
+
+        self.assertEqual(set(ENDPOINTS), set(report['endpoints']))
+        for summary in report['endpoints'].values():
+            self.assertEqual(3, summary['count'])
+            self.assertIsNotNone(summary['latency_ms']['p99'])
+            self.assertIsNotNone(summary['queries_per_request']['mean'])
+        self.assertEqual({'200': 3}, report['endpoints']['survey-detail']['statuses'])
+        self.assertEqual({'201': 3}, report['endpoints']['result-batch']['statuses'])
+        self.assertEqual(24, Answer.objects.count())
+
+    def test_run_keeps_answers(self):
+        seed(1, 2, 2, 2, random.Random(0))
+        run(('result-batch',), 2, 2, random.Random(0), warmup=0, cleanup=False)
+        self.assertGreater(Answer.objects.count(), 4)
+
+    def test_remove_bench_data(self):
+        seed(2, 3, 2, 4, random.Random(0))
+        Survey.objects.create(name='Настоящий опрос', start_at='2020-01-01', end_at='2020-02-01')
+
+        self.assertEqual(2, remove_bench_data())
+        self.assertEqual(['Настоящий опрос'], list(Survey.objects.values_list('name', flat=True)))
+        self.assertFalse(Answer.objects.exists())
+
+    def test_run_without_data(self):
+        self.assertRaises(ValueError, run, ENDPOINTS, 1, 1, random.Random(0))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(95, percentile(values, 95))
+        self.assertEqual(100, percentile(values, 99.5))
+        self.assertIsNone(percentile([], 50))
+
+    def test_commands(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, 'report.json')
+
+        call_command('bench_seed', '--surveys', '1', '--questions', '2', '--respondents', '2', stdout=io.StringIO())
+        call_command('bench_run', '--requests', '2', '--respondents', '2', '--endpoint', 'survey-list',
+                     '--output', output, stdout=io.StringIO())
+        with open(output, encoding='utf-8') as report_file:
+            report = json.load(report_file)
+
+        self.assertEqual(['survey-list'], list(report['endpoints']))
+        changes = compare(report, report)
+        self.assertEqual(report['endpoints']['survey-list']['latency_ms']['p95'], changes['survey-list']['p95'][1])
@@ -0,0 +1,126 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from surveys.cache import (
+    ACTIVE_SURVEYS_KEY,
+    SURVEY_SNAPSHOT_KEY,
+    get_active_surveys,
+    get_survey_snapshot,
+    invalidate_active_surveys,
+)
+from surveys.models import Survey, Question
+from surveys.structure import (
+    SURVEY_STRUCTURE_KEY,
+    MISSING_SURVEY_TIMEOUT,
+    get_survey_structure,
+    get_survey_structure_version,
+    invalidate_survey_structure,
+)
+
+
+class ActiveSurveysCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey_1 = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.survey_2 = Survey.objects.create(
+            name='Название 2',
+            start_at=datetime.date.today() + datetime.timedelta(days=3),
+            end_at=datetime.date.today() + datetime.timedelta(days=5),
+            description='Описание 2'
+        )
+
+    def test_active_surveys(self):
+        self.assertEqual([self.survey_1], get_active_surveys())
+
+    def test_cached_without_queries(self):
+        get_active_surveys()
+        with self.assertNumQueries(0):
+            self.assertEqual([self.survey_1], get_active_surveys())
+
+    def test_invalidate_on_survey_save(self):
+        get_active_surveys()
+        self.survey_2.start_at = datetime.date.today()
+        self.survey_2.save()
+        self.assertEqual([self.survey_1, self.survey_2], get_active_surveys())
+
+    def test_invalidate_on_question_save(self):
+        get_active_surveys()
+        Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey_1)
+        with self.assertNumQueries(1):
+            get_active_surveys()
+
+    def test_invalidate_on_survey_delete(self):
+        get_active_surveys()
+        self.survey_1.delete()
+        self.assertEqual([], get_active_surveys())
+
+    def test_list_built_before_change_not_served(self):
+        get_active_surveys()
+        stale = cache.get(ACTIVE_SURVEYS_KEY)
+        self.survey_2.start_at = datetime.date.today()
+        self.survey_2.save()
+        invalidate_active_surveys()
+        # Запрос, начатый до изменения, записывает список после сброса
+        cache.set(ACTIVE_SURVEYS_KEY, stale)
+        self.assertEqual([self.survey_1, self.survey_2], get_active_surveys())
+
+    def test_expire_at_next_boundary(self):
+        get_active_surveys()
+        later = datetime.datetime.now() + datetime.timedelta(days=2)
+        with mock.patch('surveys.cache.timezone.now', return_value=later):
+            self.assertEqual([], get_active_surveys())
+        later = datetime.datetime.now() + datetime.timedelta(days=3)
+        with mock.patch('surveys.cache.timezone.now', return_value=later):
+            self.assertEqual([self.survey_2], get_active_surveys())
+
+
+class SurveyStructureCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_missing_survey_cached_briefly(self):
+        with mock.patch('surveys.structure.cache.set') as cache_set:
+            self.assertIsNone(get_survey_structure(999))
+        cache_set.assert_called_once_with(
+            SURVEY_STRUCTURE_KEY.format(999, get_survey_structure_version(999)), False, timeout=MISSING_SURVEY_TIMEOUT
+        )
+
+    def test_structure_built_before_change_not_served(self):
+        survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+        )
+        stale_key = SURVEY_STRUCTURE_KEY.format(survey.id, get_survey_structure_version(survey.id))
+        question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=survey)
+        # Запрос, начатый до изменения, записывает индекс после сброса
+        invalidate_survey_structure(survey.id)
+        cache.set(stale_key, {'id': survey.id, 'questions': {}})
+        self.assertIn(question.id, get_survey_structure(survey.id)['questions'])
+
+
+class SurveySnapshotCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+        )
+
+    def test_snapshot_built_before_change_not_served(self):
+        stale = get_survey_snapshot(self.survey)
+        Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+        # Запрос, начатый до изменения, записывает документ после коммита
+        cache.set(SURVEY_SNAPSHOT_KEY.format(self.survey.id, self.survey.updated_at.timestamp()), stale)
+
+        self.survey.refresh_from_db()
+        self.assertIn('Текст 1', get_survey_snapshot(self.survey).decode())
@@ -0,0 +1,104 @@
+import datetime
+
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from surveys.cloning import clone_survey
+from surveys.models import Survey, Question, Choice, Answer
+
+
+class CloningFixtureMixin:
+    def setUp(self) -> None:
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question_1 = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.survey)
+        self.choice_1 = Choice.objects.create(text='Вариант 1', question=self.question_1)
+        self.choice_2 = Choice.objects.create(text='Вариант 2', question=self.question_1)
+        Answer.objects.create(user_id=1, survey=self.survey, question=self.question_1, choice=self.choice_1)
+        self.start_at = datetime.date.today() + datetime.timedelta(days=90)
+        self.end_at = self.start_at + datetime.timedelta(days=30)
+
+    def get_tree(self, survey):
+        return [
+            (question.text, question.type, [choice.text for choice in question.choices.order_by('id')])
+            for question in survey.questions.order_by('id')
+        ]
+
+
+class CloneSurveyTestCase(CloningFixtureMixin, TestCase):
+    def test_clone(self):
+        clone = clone_survey(self.survey, self.start_at, self.end_at)
+
+        self.assertNotEqual(clone.id, self.survey.id)
+        self.assertEqual((clone.name, clone.description), (self.survey.name, self.survey.description))
+        self.assertEqual((clone.start_at, clone.end_at), (self.start_at, self.end_at))
+        self.assertEqual(self.get_tree(clone), self.get_tree(self.survey))
+        self.assertEqual(self.get_tree(clone), [
+            ('Текст 1', Question.TYPE_RADIO, ['Вариант 1', 'Вариант 2']),
+            ('Текст 2', Question.TYPE_TEXT, []),
+        ])
+        self.assertFalse(Answer.objects.filter(survey=clone).exists())
+        self.assertEqual(Question.objects.filter(survey=self.survey).count(), 2)
+
+    def test_queries_do_not_grow(self):
+        with CaptureQueriesContext(connection) as small:
+            clone_survey(self.survey, self.start_at, self.end_at)
+        Question.objects.bulk_create([
+            Question(text=f'Вопрос {number}', type=Question.TYPE_TEXT, survey=self.survey) for number in range(50)
+        ])
+        with CaptureQueriesContext(connection) as large:
+            clone_survey(self.survey, self.start_at, self.end_at)
+        self.assertEqual(len(large), len(small))
+
+
+class CloneSurveyApiTestCase(CloningFixtureMixin, APITestCase):
+    def test_clone(self):
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.post(reverse('authoring-clone', args=(self.survey.id,)), {
+            'name': 'Название 2', 'start_at': str(self.start_at), 'end_at': str(self.end_at)
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        clone = Survey.objects.get(pk=response.data['id'])
+        self.assertEqual(clone.name, 'Название 2')
+        self.assertEqual(len(response.data['questions']), 2)
+        self.assertEqual(self.get_tree(clone), self.get_tree(self.survey))
+
+    def test_requires_admin(self):
+        response = self.client.post(reverse('authoring-clone', args=(self.survey.id,)), {
+            'start_at': str(self.start_at), 'end_at': str(self.end_at)
+        }, format='json')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertEqual(Survey.objects.count(), 1)
+
+
+class CloneSurveyAdminTestCase(CloningFixtureMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.data = {'action': 'clone_surveys', helpers.ACTION_CHECKBOX_NAME: [self.survey.id]}
+
+    def test_asks_for_dates(self):
+        response = self.client.post(reverse('admin:surveys_survey_changelist'), self.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'name="start_at"')
+        self.assertEqual(Survey.objects.count(), 1)
+
+    def test_apply(self):
+        response = self.client.post(reverse('admin:surveys_survey_changelist'), {
+            **self.data, 'apply': '1', 'start_at': str(self.start_at), 'end_at': str(self.end_at)
+        })
+        self.assertEqual(response.status_code, 302)
+        clone = Survey.objects.exclude(pk=self.survey.pk).get()
+        self.assertEqual(clone.start_at, self.start_at)
+        self.assertEqual(self.get_tree(clone), self.get_tree(self.survey))
@@ -0,0 +1,159 @@
+import datetime
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from surveys.checks import check_replica_cache
+from surveys.db_routers import PrimaryReplicaRouter, read_from_primary, pin_user_to_primary
+from surveys.middleware import ReplicaStickinessMiddleware
+from surveys.models import Survey, Question, Answer
+
+REPLICAS = ['replica_1', 'replica_2']
+
+
+def get_read_db(request):
+    """ get_response для middleware: возвращает базу, из которой читался бы ответ """
+    return PrimaryReplicaRouter().db_for_read(Answer)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class PrimaryReplicaRouterTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+
+    def test_read_from_replica(self):
+        self.assertIn(self.router.db_for_read(Answer), REPLICAS)
+        self.assertEqual('default', self.router.db_for_write(Answer))
+
+    def test_read_from_primary(self):
+        with read_from_primary():
+            self.assertEqual('default', self.router.db_for_read(Answer))
+        self.assertIn(self.router.db_for_read(Answer), REPLICAS)
+
+    def test_instance_db(self):
+        instance = Answer()
+        instance._state.db = 'replica_2'
+        self.assertEqual('replica_2', self.router.db_for_read(Answer, instance=instance))
+
+    def test_allow_migrate(self):
+        self.assertTrue(self.router.allow_migrate('default', 'surveys'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'surveys'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual('default', self.router.db_for_read(Answer))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaStickinessMiddlewareTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaStickinessMiddleware(get_read_db)
+
+    def test_get(self):
+        self.assertIn(self.middleware(self.factory.get('/result/', {'user_id': 1})), REPLICAS)
+
+    def test_post(self):
+        self.assertEqual('default', self.middleware(self.factory.post('/result/')))
+
+    def test_pinned_user(self):
+        pin_user_to_primary(1)
+        self.assertEqual('default', self.middleware(self.factory.get('/result/', {'user_id': 1})))
+        self.assertIn(self.middleware(self.factory.get('/result/', {'user_id': 2})), REPLICAS)
+
+    @override_settings(SURVEYS_REPLICA_STICKY_SECONDS=-1)
+    def test_pin_expired(self):
+        pin_user_to_primary(1)
+        self.assertIn(self.middleware(self.factory.get('/result/', {'user_id': 1})), REPLICAS)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReadYourWritesTestCase(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+
+    def test_result_create_pins_user(self):
+        middleware = ReplicaStickinessMiddleware(get_read_db)
+        request = RequestFactory().get('/result/', {'user_id': 7})
+        self.assertIn(middleware(request), REPLICAS)
+
+        response = self.client.post(reverse('result-list'), {
+            'user_id': 7, 'survey': self.survey.id, 'question': self.question.id, 'text': 'Ответ'
+        }, format='json')
+        self.assertEqual(201, response.status_code)
+        self.assertEqual('default', middleware(request))
+
+
+def answer_selects(context) -> list:
+    return [query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'surveys_answer' in query['sql']]
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaMirrorTestCase(TransactionTestCase):
+    """ Реплика replica в тестах - зеркало основной базы """
+    databases = {'default', 'replica'}
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+        Answer.objects.create(user_id=1, survey=self.survey, question=self.question, text='Ответ 1')
+
+    def get_results(self, user_id):
+        with CaptureQueriesContext(connections['replica']) as replica, \
+                CaptureQueriesContext(connections['default']) as primary:
+            response = self.client.get(reverse('result-list'), {'user_id': user_id})
+        self.assertEqual(200, response.status_code)
+        return response, answer_selects(replica), answer_selects(primary)
+
+    def test_reads_from_replica(self):
+        response, replica, primary = self.get_results(1)
+        self.assertContains(response, 'Ответ 1')
+        self.assertTrue(replica)
+        self.assertFalse(primary)
+
+    def test_reads_from_primary_after_write(self):
+        response = self.client.post(reverse('result-list'), {
+            'user_id': 2, 'survey': self.survey.id, 'question': self.question.id, 'text': 'Ответ 2'
+        }, format='json')
+        self.assertEqual(201, response.status_code)
+
+        response, replica, primary = self.get_results(2)
+        self.assertContains(response, 'Ответ 2')
+        self.assertFalse(replica)
+        self.assertTrue(primary)
+
+
+class ReplicaCacheCheckTestCase(TestCase):
+    @override_settings(DATABASE_REPLICAS=REPLICAS)
+    def test_process_local_cache(self):
+        self.assertEqual(['surveys.E001'], [error.id for error in check_replica_cache(None)])
+
+    @override_settings(DATABASE_REPLICAS=REPLICAS, CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': 'memcached:11211'}
+    })
+    def test_shared_cache(self):
+        self.assertEqual([], check_replica_cache(None))
+
+    def test_without_replicas(self):
+        self.assertEqual([], check_replica_cache(None))
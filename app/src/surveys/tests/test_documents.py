@@ -0,0 +1,128 @@
+import datetime
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from surveys.documents import refresh_result_documents, rebuild_result_documents
+from surveys.models import Survey, Question, Choice, Answer, UserSurveyResult
+
+
+class DocumentsFixtureMixin:
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey_1 = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.survey_2 = Survey.objects.create(
+            name='Название 2',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description=None
+        )
+        self.question_1 = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey_1)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.survey_2)
+        self.choice_1 = Choice.objects.create(text='Вариант 1', question=self.question_1)
+
+
+@override_settings(SURVEYS_RESULT_DOCUMENTS=True)
+class ResultDocumentsApiTestCase(DocumentsFixtureMixin, APITestCase):
+    def post_answers(self):
+        self.client.post(reverse('result-list'), {
+            'user_id': 1, 'survey': self.survey_1.id, 'question': self.question_1.id, 'choice': self.choice_1.id
+        }, format='json')
+        self.client.post(reverse('result-batch'), {
+            'user_id': 1, 'survey': self.survey_2.id, 'answers': [
+                {'question': self.question_2.id, 'text': 'Ответ 1'},
+                {'question': self.question_2.id, 'text': 'Ответ 2'},
+            ]
+        }, format='json')
+
+    def get_results(self, params):
+        response = self.client.get(reverse('result-list'), params)
+        with override_settings(SURVEYS_RESULT_DOCUMENTS=False, SURVEYS_FAST_READS=False):
+            expected = self.client.get(reverse('result-list'), params)
+        return expected, response
+
+    def test_documents_written_with_answers(self):
+        self.post_answers()
+        self.assertEqual(2, UserSurveyResult.objects.filter(user_id=1).count())
+
+        for params in ({'user_id': 1}, {'user_id': 1, 'page_size': 1}, {'user_id': 2}):
+            with self.subTest(params=params):
+                expected, response = self.get_results(params)
+                self.assertEqual(expected.content, response.content)
+
+    def test_cursor(self):
+        self.post_answers()
+        response = self.client.get(reverse('result-list'), {'user_id': 1, 'page_size': 1}).json()
+        self.assertEqual([self.survey_1.id], [item['id'] for item in response['results']])
+        response = self.client.get(response['next']).json()
+        self.assertEqual([self.survey_2.id], [item['id'] for item in response['results']])
+        self.assertIsNone(response['next'])
+
+    def test_single_query(self):
+        self.post_answers()
+        with self.assertNumQueries(1):
+            self.client.get(reverse('result-list'), {'user_id': 1})
+
+    def test_stale_document_after_survey_change(self):
+        self.post_answers()
+        self.question_1.text = 'Новый текст'
+        self.question_1.save()
+
+        expected, response = self.get_results({'user_id': 1})
+        self.assertEqual(expected.content, response.content)
+        self.assertNotIn('Новый текст', UserSurveyResult.objects.get(survey=self.survey_1).document)
+
+        out = io.StringIO()
+        call_command('rebuild_result_documents', '--stale', stdout=out)
+        self.assertIn('Построено документов: 1', out.getvalue())
+        self.assertIn('Новый текст', UserSurveyResult.objects.get(survey=self.survey_1).document)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('result-list'), {'user_id': 1})
+
+    def test_read_does_not_write(self):
+        self.post_answers()
+        self.question_1.text = 'Новый текст'
+        self.question_1.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('result-list'), {'user_id': 1})
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries))
+
+
+@override_settings(SURVEYS_RESULT_DOCUMENTS=True)
+class ResultDocumentsTestCase(DocumentsFixtureMixin, TestCase):
+    def test_refresh_removes_empty_document(self):
+        answer = Answer.objects.create(user_id=1, survey=self.survey_2, question=self.question_2, text='Ответ')
+        refresh_result_documents([answer])
+        self.assertTrue(UserSurveyResult.objects.filter(user_id=1, survey=self.survey_2).exists())
+
+        answer.delete()
+        refresh_result_documents([(1, self.survey_2.id)])
+        self.assertFalse(UserSurveyResult.objects.exists())
+
+    def test_rebuild(self):
+        Answer.objects.create(user_id=1, survey=self.survey_1, question=self.question_1, choice=self.choice_1)
+        Answer.objects.create(user_id=2, survey=self.survey_2, question=self.question_2, text='Ответ')
+        UserSurveyResult.objects.create(user_id=3, survey=self.survey_1, document='{}')
+
+        self.assertEqual(2, rebuild_result_documents())
+        self.assertEqual(
+            [(1, self.survey_1.id), (2, self.survey_2.id)],
+            list(UserSurveyResult.objects.order_by('user_id').values_list('user_id', 'survey_id'))
+        )
+
+    @override_settings(SURVEYS_RESULT_DOCUMENTS=False)
+    def test_disabled(self):
+        answer = Answer.objects.create(user_id=1, survey=self.survey_2, question=self.question_2, text='Ответ')
+        refresh_result_documents([answer])
+        self.assertFalse(UserSurveyResult.objects.exists())
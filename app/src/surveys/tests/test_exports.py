@@ -0,0 +1,96 @@
+import csv
+import datetime
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from surveys.models import Survey, Question, Choice, Answer
+
+
+class ExportApiTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question_1 = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.survey)
+        self.choice = Choice.objects.create(text='Choice 1', question=self.question_1)
+        self.answer_1 = Answer.objects.create(
+            user_id=1,
+            survey=self.survey,
+            question=self.question_1,
+            choice=self.choice
+        )
+        self.answer_2 = Answer.objects.create(
+            user_id=1,
+            survey=self.survey,
+            question=self.question_2,
+            text='Текст, "с запятой"'
+        )
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(self.admin)
+
+    def test_export_csv(self):
+        url = reverse('report-export', args=(self.survey.id,))
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertEqual('text/csv; charset=utf-8', response['Content-Type'])
+
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(
+            ['id', 'user_id', 'survey_id', 'question_id', 'question_text',
+             'question_type', 'choice_id', 'choice_text', 'text'],
+            rows[0]
+        )
+        self.assertEqual(
+            [str(self.answer_1.id), '1', str(self.survey.id), str(self.question_1.id), 'Текст 1',
+             Question.TYPE_RADIO, str(self.choice.id), 'Choice 1', ''],
+            rows[1]
+        )
+        self.assertEqual('Текст, "с запятой"', rows[2][8])
+
+    def test_export_ndjson(self):
+        url = reverse('report-export', args=(self.survey.id,))
+        response = self.client.get(url, {'export_format': 'ndjson'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertEqual({
+            'id': self.answer_2.id,
+            'user_id': 1,
+            'survey_id': self.survey.id,
+            'question_id': self.question_2.id,
+            'question_text': 'Текст 2',
+            'question_type': Question.TYPE_TEXT,
+            'choice_id': None,
+            'choice_text': None,
+            'text': 'Текст, "с запятой"',
+        }, json.loads(lines[1]))
+
+    def test_export_unknown_format(self):
+        url = reverse('report-export', args=(self.survey.id,))
+        response = self.client.get(url, {'export_format': 'xml'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_export_command(self):
+        output = io.StringIO()
+        call_command('export_answers', self.survey.id, '--format', 'ndjson', stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual([self.answer_1.id, self.answer_2.id], [json.loads(line)['id'] for line in lines])
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(None)
+        for url in (reverse('report-export', args=(self.survey.id,)), reverse('report-detail', args=(self.survey.id,))):
+            response = self.client.get(url)
+            self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
@@ -0,0 +1,84 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from surveys.checks import check_idempotency_cache, check_invalidation_cache
+from surveys.idempotency import IDEMPOTENCY_LOCK_KEY, get_idempotency_digest
+from surveys.models import Survey, Question, Answer
+
+
+class IdempotencyTestCase(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+        self.data = {'user_id': 1, 'survey': self.survey.id, 'question': self.question.id, 'text': 'Ответ'}
+
+    def post(self, url, data, key):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay(self):
+        first = self.post(reverse('result-list'), self.data, 'key-1')
+        with self.assertNumQueries(0):
+            second = self.post(reverse('result-list'), self.data, 'key-1')
+
+        self.assertEqual(status.HTTP_201_CREATED, second.status_code)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual('true', second['Idempotent-Replayed'])
+        self.assertEqual(1, Answer.objects.count())
+
+    def test_batch_replay(self):
+        data = {'user_id': 1, 'survey': self.survey.id, 'answers': [{'question': self.question.id, 'text': 'Ответ'}]}
+        self.post(reverse('result-batch'), data, 'key-1')
+        response = self.post(reverse('result-batch'), data, 'key-1')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(1, Answer.objects.count())
+
+    def test_different_keys(self):
+        self.post(reverse('result-list'), self.data, 'key-1')
+        self.post(reverse('result-list'), self.data, 'key-2')
+        self.client.post(reverse('result-list'), self.data, format='json')
+        self.assertEqual(3, Answer.objects.count())
+
+    def test_key_reused_with_other_body(self):
+        self.post(reverse('result-list'), self.data, 'key-1')
+        response = self.post(reverse('result-list'), dict(self.data, text='Другой ответ'), 'key-1')
+        self.assertEqual(status.HTTP_422_UNPROCESSABLE_ENTITY, response.status_code)
+        self.assertEqual(1, Answer.objects.count())
+
+    def test_validation_error_not_stored(self):
+        response = self.post(reverse('result-list'), dict(self.data, text=''), 'key-1')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.post(reverse('result-list'), dict(self.data, text=''), 'key-1')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+
+    def test_in_progress(self):
+        url = reverse('result-list')
+        cache.add(IDEMPOTENCY_LOCK_KEY.format(get_idempotency_digest(url, 'key-1')), True)
+        response = self.post(url, self.data, 'key-1')
+        self.assertEqual(status.HTTP_409_CONFLICT, response.status_code)
+        self.assertEqual(0, Answer.objects.count())
+
+    def test_too_long_key(self):
+        response = self.post(reverse('result-list'), self.data, 'k' * 256)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(0, Answer.objects.count())
+
+    def test_process_local_cache(self):
+        self.assertEqual(['surveys.E003'], [error.id for error in check_idempotency_cache(None)])
+        self.assertEqual(['surveys.E004'], [error.id for error in check_invalidation_cache(None)])
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': 'memcached:11211'}
+        }):
+            self.assertEqual([], check_idempotency_cache(None))
+            self.assertEqual([], check_invalidation_cache(None))
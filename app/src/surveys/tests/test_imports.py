@@ -0,0 +1,93 @@
+import csv
+import datetime
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from surveys.imports import validate_rows
+from surveys.models import Survey, Question, Choice, Answer
+from surveys.structure import get_survey_structure
+from surveys.tallies import get_survey_tallies
+
+
+class ImportAnswersTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'answers.csv')
+
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question_1 = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.survey)
+        self.choice_1 = Choice.objects.create(text='Choice 1', question=self.question_1)
+        self.choice_2 = Choice.objects.create(text='Choice 2', question=self.question_2)
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as output:
+            writer = csv.writer(output)
+            writer.writerow(['user_id', 'survey', 'question', 'choice', 'text'])
+            writer.writerows(rows)
+
+    def import_answers(self, *args):
+        call_command('import_answers', self.path, *args, stdout=io.StringIO())
+
+    def test_import(self):
+        self.write_csv([
+            [1, self.survey.id, self.question_1.id, self.choice_1.id, ''],
+            [1, self.survey.id, self.question_2.id, '', 'Текст ответа'],
+            [2, self.survey.id, self.question_1.id, self.choice_2.id, ''],
+            [3, self.survey.id + 1, self.question_1.id, self.choice_1.id, ''],
+            ['x', self.survey.id, self.question_1.id, self.choice_1.id, ''],
+            [4, self.survey.id, self.question_1.id, '', ''],
+        ])
+        self.import_answers('--chunk-size', '2')
+
+        self.assertEqual(2, Answer.objects.count())
+        self.assertEqual('Текст ответа', Answer.objects.get(question=self.question_2).text)
+        self.assertEqual(1, get_survey_tallies(self.survey.id)[0]['total'])
+
+        with open(f"{self.path}.errors.csv", encoding='utf-8') as errors_file:
+            errors = list(csv.reader(errors_file))
+        self.assertEqual(['4', '5', '6', '7'], [error[0] for error in errors])
+        self.assertEqual('Вариант ответа не относится к вопросу.', errors[0][1])
+
+    def test_structure_read_once_per_chunk(self):
+        row = {'user_id': '1', 'survey': str(self.survey.id), 'question': str(self.question_1.id),
+               'choice': str(self.choice_1.id), 'text': ''}
+        missing = dict(row, survey=str(self.survey.id + 1))
+        with mock.patch('surveys.imports.get_survey_structure', wraps=get_survey_structure) as lookup:
+            answers, errors = validate_rows([(line, row) for line in range(10)] + [(10, missing), (11, missing)])
+        self.assertEqual(10, len(answers))
+        self.assertEqual(2, len(errors))
+        self.assertEqual(2, lookup.call_count)
+
+    def test_import_resume(self):
+        self.write_csv([
+            [user_id, self.survey.id, self.question_1.id, self.choice_1.id, '']
+            for user_id in range(5)
+        ])
+        self.import_answers('--chunk-size', '2')
+        self.import_answers('--chunk-size', '2')
+
+        self.assertEqual(5, Answer.objects.count())
+        self.assertEqual(5, get_survey_tallies(self.survey.id)[0]['total'])
+
+    def test_resume_with_other_chunk_size(self):
+        self.write_csv([
+            [user_id, self.survey.id, self.question_1.id, self.choice_1.id, '']
+            for user_id in range(5)
+        ])
+        self.import_answers('--chunk-size', '2')
+        self.assertRaises(CommandError, self.import_answers, '--chunk-size', '3')
+        self.assertEqual(5, Answer.objects.count())
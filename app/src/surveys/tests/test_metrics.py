@@ -0,0 +1,96 @@
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+
+from surveys.metrics import PrometheusMetricsMiddleware
+from surveys.models import Survey, Question
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class PrometheusMetricsTestCase(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+
+    def test_view_labels(self):
+        requests = [
+            ('survey-list', 'GET', lambda: self.client.get(reverse('survey-list'))),
+            ('survey-detail', 'GET', lambda: self.client.get(reverse('survey-detail', args=(self.survey.id,)))),
+            ('result-list', 'GET', lambda: self.client.get(reverse('result-list'), {'user_id': 1})),
+            ('result-create', 'POST', lambda: self.client.post(reverse('result-list'), {
+                'user_id': 1, 'survey': self.survey.id, 'question': self.question.id, 'text': 'Ответ'
+            }, format='json')),
+        ]
+        for view, method, send in requests:
+            with self.subTest(view=view):
+                count = sample('surveys_request_duration_seconds_count', view=view, method=method)
+                response = send()
+                status = str(response.status_code)
+                statuses = sample('surveys_responses_total', view=view, method=method, status=status)
+                send()
+                self.assertEqual(
+                    count + 2, sample('surveys_request_duration_seconds_count', view=view, method=method)
+                )
+                self.assertEqual(
+                    statuses + 1, sample('surveys_responses_total', view=view, method=method, status=status)
+                )
+                self.assertEqual(0, sample('surveys_requests_in_flight', view=view))
+
+    @override_settings(SURVEYS_METRICS_QUERY_SAMPLE_RATE=1)
+    def test_db_queries(self):
+        queries = sample('surveys_request_db_queries_sum', view='result-list', method='GET')
+        self.client.get(reverse('result-list'), {'user_id': 1})
+        self.assertGreater(sample('surveys_request_db_queries_sum', view='result-list', method='GET'), queries)
+
+    @override_settings(SURVEYS_METRICS_QUERY_SAMPLE_RATE=0)
+    def test_db_queries_not_sampled(self):
+        count = sample('surveys_request_db_queries_count', view='result-list', method='GET')
+        self.client.get(reverse('result-list'), {'user_id': 1})
+        self.assertEqual(count, sample('surveys_request_db_queries_count', view='result-list', method='GET'))
+
+    def test_streaming_latency(self):
+        middleware = PrometheusMetricsMiddleware(lambda request: StreamingHttpResponse(iter([b'a', b'b'])))
+        count = sample('surveys_request_duration_seconds_count', view='unmatched', method='GET')
+        response = middleware(RequestFactory().get('/export/'))
+        self.assertEqual(count, sample('surveys_request_duration_seconds_count', view='unmatched', method='GET'))
+
+        self.assertEqual(b'ab', b''.join(response.streaming_content))
+        self.assertEqual(count + 1, sample('surveys_request_duration_seconds_count', view='unmatched', method='GET'))
+
+    def test_unmatched(self):
+        count = sample('surveys_responses_total', view='unmatched', method='GET', status='404')
+        self.client.get('/missing/')
+        self.assertEqual(count + 1, sample('surveys_responses_total', view='unmatched', method='GET', status='404'))
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('survey-list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(200, response.status_code)
+        self.assertIn(b'surveys_request_duration_seconds_bucket{le="0.005",method="GET",view="survey-list"}',
+                      response.content)
+
+    def test_multiprocess_registry(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+            response = self.client.get(reverse('metrics'))
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn(b'surveys_request_duration_seconds', response.content)
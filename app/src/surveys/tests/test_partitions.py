@@ -0,0 +1,123 @@
+import datetime
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from surveys.models import Survey, Question, Choice, Answer
+from surveys.partitions import (
+    ANSWER_PARTITION_SURVEYS,
+    ANSWER_PARTITIONS_AHEAD,
+    partition_name,
+    partition_bounds,
+    is_partitioned,
+    create_answer_partition,
+    create_missing_partitions,
+    drop_answer_partition,
+    drop_empty_partitions,
+)
+from surveys.querysets import get_result_queryset
+
+
+class PartitionsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+
+    def test_partition_name(self):
+        self.assertEqual('surveys_answer_p0', partition_name(ANSWER_PARTITION_SURVEYS - 1))
+        self.assertEqual(f"surveys_answer_p{ANSWER_PARTITION_SURVEYS}", partition_name(ANSWER_PARTITION_SURVEYS))
+        self.assertEqual((ANSWER_PARTITION_SURVEYS, 2 * ANSWER_PARTITION_SURVEYS),
+                         partition_bounds(ANSWER_PARTITION_SURVEYS + 1))
+        self.assertRaises(ValueError, partition_name, '1; DROP TABLE surveys_answer')
+
+    def test_not_partitioned_backend(self):
+        if is_partitioned():
+            self.skipTest('Таблица ответов секционирована')
+        self.assertFalse(create_answer_partition(self.survey.id))
+        self.assertEqual(0, create_missing_partitions())
+        self.assertEqual(0, drop_empty_partitions())
+        self.assertRaises(CommandError, call_command, 'answer_partitions', 'ensure')
+
+    def test_partitions_created_ahead(self):
+        if not is_partitioned():
+            self.skipTest('Таблица ответов не секционирована')
+        create_missing_partitions()
+        self.assertFalse(create_answer_partition(self.survey.id))
+        self.assertFalse(create_answer_partition(self.survey.id + ANSWER_PARTITION_SURVEYS))
+
+    def _drop_partition_queries(self, pg_version, in_atomic_block, detach_pending=False):
+        with mock.patch('surveys.partitions.connection') as db:
+            db.pg_version = pg_version
+            db.in_atomic_block = in_atomic_block
+            cursor = db.cursor.return_value.__enter__.return_value
+            cursor.fetchone.return_value = (detach_pending,)
+            drop_answer_partition(self.survey.id)
+        return [call.args[0] for call in cursor.execute.call_args_list if call.args[0].startswith(('ALTER', 'DROP'))]
+
+    def test_drop_partition_detaches_concurrently(self):
+        name = partition_name(self.survey.id)
+        self.assertEqual(
+            [f"ALTER TABLE surveys_answer DETACH PARTITION {name} CONCURRENTLY", f"DROP TABLE {name}"],
+            self._drop_partition_queries(140000, in_atomic_block=False)
+        )
+        self.assertEqual(
+            [f"ALTER TABLE surveys_answer DETACH PARTITION {name} FINALIZE", f"DROP TABLE {name}"],
+            self._drop_partition_queries(140000, in_atomic_block=False, detach_pending=True)
+        )
+        # В транзакции и до PostgreSQL 14 остается обычный DETACH
+        plain = [f"ALTER TABLE surveys_answer DETACH PARTITION {name}", f"DROP TABLE {name}"]
+        self.assertEqual(plain, self._drop_partition_queries(140000, in_atomic_block=True))
+        self.assertEqual(plain, self._drop_partition_queries(130000, in_atomic_block=False))
+
+    def test_delete_question_answers_by_survey(self):
+        question = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        choice = Choice.objects.create(text='Вариант 1', question=question)
+        Answer.objects.create(user_id=1, survey=self.survey, question=question, choice=choice)
+
+        with CaptureQueriesContext(connection) as context:
+            question.delete()
+        self.assertFalse(Answer.objects.exists())
+        deletes = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('DELETE FROM "surveys_answer"')]
+        self.assertIn('"survey_id" = ', deletes[0])
+
+    def test_result_queryset_after_cursor(self):
+        question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+        Answer.objects.create(user_id=1, survey=self.survey, question=question, text='Ответ')
+        other = Survey.objects.create(name='Название 2', start_at=self.survey.start_at, end_at=self.survey.end_at)
+        Answer.objects.create(user_id=1, survey=other, question=question, text='Ответ')
+
+        queryset = get_result_queryset(1, after=self.survey.id)
+        self.assertEqual([other.id], [survey.id for survey in queryset])
+        self.assertIn(f'U0."survey_id" > {self.survey.id}', str(queryset.query))
+
+
+class SurveyPartitionTestCase(TransactionTestCase):
+    """ Секция нового опроса создается после коммита, on_commit в TestCase не вызывается """
+
+    def test_answer_to_survey_past_partitions_ahead(self):
+        survey = Survey.objects.create(
+            id=ANSWER_PARTITION_SURVEYS * (ANSWER_PARTITIONS_AHEAD + 1),
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+        )
+        question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=survey)
+        if is_partitioned():
+            self.assertFalse(create_answer_partition(survey.id))
+
+        response = APIClient().post(reverse('result-list'), {
+            'user_id': 1, 'survey': survey.id, 'question': question.id, 'text': 'Ответ'
+        }, format='json')
+        self.assertEqual(201, response.status_code)
+        self.assertTrue(Answer.objects.filter(survey=survey).exists())
@@ -0,0 +1,88 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from surveys.archive import archive_survey_answers
+from surveys.models import Survey, Question, Choice, Answer, ArchivedAnswer, UserSurveyResult
+from surveys.purge import purge_survey, delete_in_batches
+
+
+class PurgeTestCase(TestCase):
+    def setUp(self) -> None:
+        self.survey_1 = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today() - datetime.timedelta(days=30),
+            end_at=datetime.date.today() - datetime.timedelta(days=10),
+            description='Описание 1'
+        )
+        self.survey_2 = Survey.objects.create(
+            name='Название 2',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description=None
+        )
+        self.question_1 = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey_1)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.survey_2)
+        self.choice = Choice.objects.create(text='Вариант 1', question=self.question_1)
+        Answer.objects.bulk_create([
+            Answer(user_id=user_id, survey=self.survey_1, question=self.question_1, choice=self.choice)
+            for user_id in range(7)
+        ])
+        Answer.objects.create(user_id=1, survey=self.survey_2, question=self.question_2, text='Ответ')
+        UserSurveyResult.objects.create(user_id=1, survey=self.survey_1, document='{}')
+
+    def test_delete_in_batches(self):
+        progress = []
+        count = delete_in_batches(Answer.objects.filter(survey=self.survey_1), 3, progress=progress.append)
+        self.assertEqual(7, count)
+        self.assertEqual([3, 6, 7], progress)
+        self.assertEqual(1, Answer.objects.count())
+
+    def test_batches_are_bounded(self):
+        with CaptureQueriesContext(connection) as queries:
+            delete_in_batches(Answer.objects.filter(survey=self.survey_1), 3)
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(3, len(deletes))
+        self.assertTrue(all('"id" <=' in sql for sql in deletes[:-1]))
+
+    def test_purge_survey(self):
+        archive_survey_answers(self.survey_1.id, batch_size=4)
+        Answer.objects.create(user_id=9, survey=self.survey_1, question=self.question_1, choice=self.choice)
+
+        deleted = purge_survey(self.survey_1.id, batch_size=3)
+        self.assertEqual(1, deleted[Answer._meta.db_table])
+        self.assertEqual(7, deleted[ArchivedAnswer._meta.db_table])
+        self.assertEqual(1, deleted[UserSurveyResult._meta.db_table])
+        self.assertFalse(Survey.objects.filter(pk=self.survey_1.pk).exists())
+        self.assertFalse(Question.objects.filter(pk=self.question_1.pk).exists())
+        self.assertFalse(Choice.objects.exists())
+        self.assertEqual(1, Answer.objects.filter(survey=self.survey_2).count())
+
+    def purge_queries(self, questions: int) -> list:
+        survey = Survey.objects.create(name='Название 3', start_at=self.survey_1.start_at, end_at=self.survey_1.end_at)
+        for number in range(questions):
+            question = Question.objects.create(text=f"Текст {number}", type=Question.TYPE_RADIO, survey=survey)
+            Choice.objects.bulk_create([Choice(text='Вариант', question=question) for _ in range(3)])
+        with CaptureQueriesContext(connection) as context:
+            purge_survey(survey.id)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_purge_queries_do_not_grow_with_questions(self):
+        small = self.purge_queries(1)
+        large = self.purge_queries(10)
+        self.assertEqual(len(small), len(large))
+        self.assertFalse([sql for sql in large if sql.startswith('UPDATE "surveys_survey"')])
+
+    def test_command_ended_before(self):
+        out = io.StringIO()
+        call_command('purge_surveys', '--ended-before', str(datetime.date.today()), '--pause', '0', stdout=out)
+        self.assertIn(f"Опрос {self.survey_1.id} удален", out.getvalue())
+        self.assertEqual([self.survey_2.id], list(Survey.objects.values_list('id', flat=True)))
+
+    def test_command_requires_surveys(self):
+        self.assertRaises(CommandError, call_command, 'purge_surveys')
@@ -1,10 +1,14 @@
 import datetime
-from django.test import TestCase
+import json
+from django.test import TestCase, RequestFactory
 
 from django.db.models import Prefetch
+from rest_framework.request import Request
 
 from surveys.models import Survey, Question, Choice, Answer
-from surveys.querysets import get_result_queryset
+from surveys.pagination import KeysetPagination
+from surveys.querysets import get_result_queryset, result_json_supported, get_result_json
+from surveys.serializers import ResultHandleSerializer
 
 
 class SurveysApiTestCase(TestCase):
@@ -88,3 +92,28 @@ class SurveysApiTestCase(TestCase):
             [repr(item) for item in expected_queryset],
             ordered=False,
         )
+
+    def test_get_result_queryset_without_distinct(self):
+        sql = str(get_result_queryset(1).query).upper()
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+
+    def test_get_result_json(self):
+        if not result_json_supported():
+            self.skipTest('Сборка JSON в базе только для PostgreSQL')
+        expected = ResultHandleSerializer(get_result_queryset(1).order_by('pk'), many=True).data
+        rows = get_result_json(1, None, 10)
+        self.assertEqual([self.survey_1.id, self.survey_2.id], [survey_id for survey_id, _ in rows])
+        self.assertEqual(json.loads(json.dumps(expected)), [json.loads(document) for _, document in rows])
+        self.assertEqual([self.survey_2.id], [survey_id for survey_id, _ in get_result_json(1, self.survey_1.id, 10)])
+
+    def test_paginate_rows(self):
+        rows = [(1, 'a'), (2, 'b'), (3, 'c')]
+        paginator = KeysetPagination()
+        request = Request(RequestFactory().get('/result/', {'page_size': 2, 'cursor': 1}))
+
+        page = paginator.paginate_rows(
+            lambda cursor, limit: [row for row in rows if row[0] > cursor][:limit], request
+        )
+        self.assertEqual(['b', 'c'], page)
+        self.assertIsNone(paginator.next_cursor)
@@ -0,0 +1,126 @@
+import datetime
+import decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from surveys.models import Survey, Question, Choice, Answer
+from surveys.querysets import get_result_queryset, result_json_supported
+from surveys.renderers import FastJSONRenderer
+from surveys.rows import survey_rows, get_result_values, result_rows
+from surveys.serializers import SurveysSerializer, ResultHandleSerializer
+
+
+class RowsFixtureMixin:
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey_1 = Survey.objects.create(
+            name='Название "1"\u2028',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание \\ 1'
+        )
+        self.survey_2 = Survey.objects.create(
+            name='Name 2 ✓',
+            start_at=datetime.date.today() - datetime.timedelta(days=1),
+            end_at=datetime.date.today() + datetime.timedelta(days=2),
+            description=None
+        )
+        self.question_1 = Question.objects.create(text='Текст\n1', type=Question.TYPE_RADIO, survey=self.survey_1)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.survey_2)
+        self.choice_1 = Choice.objects.create(text='Вариант\t1', question=self.question_1)
+        Answer.objects.create(
+            user_id=1, survey=self.survey_1, question=self.question_1, choice=self.choice_1
+        )
+        Answer.objects.create(user_id=1, survey=self.survey_2, question=self.question_2, text='Ответ \u2029 "2"')
+        Answer.objects.create(user_id=1, survey=self.survey_1, question=self.question_1, text='Свой вариант')
+        Answer.objects.create(user_id=2, survey=self.survey_2, question=self.question_2, text='Ответ 3')
+
+
+class RowsTestCase(RowsFixtureMixin, TestCase):
+    def test_survey_rows(self):
+        surveys = list(Survey.objects.order_by('id'))
+        self.assertEqual(
+            JSONRenderer().render(SurveysSerializer(surveys, many=True).data),
+            FastJSONRenderer().render(survey_rows(surveys))
+        )
+
+    def test_result_rows(self):
+        for user_id in (1, 2, 3):
+            with self.subTest(user_id=user_id):
+                expected = ResultHandleSerializer(get_result_queryset(user_id).order_by('pk'), many=True).data
+                rows = result_rows(list(get_result_values(user_id).order_by('pk')), user_id)
+                self.assertEqual(JSONRenderer().render(expected), FastJSONRenderer().render(rows))
+
+    def test_result_rows_queries(self):
+        surveys = list(get_result_values(1).order_by('pk'))
+        with self.assertNumQueries(1):
+            result_rows(surveys, 1)
+
+
+@override_settings(SURVEYS_RESULT_DOCUMENTS=False)
+class FastReadsApiTestCase(RowsFixtureMixin, APITestCase):
+    def get_both(self, path, params=None):
+        with override_settings(SURVEYS_FAST_READS=False):
+            cache.clear()
+            expected = self.client.get(path, params)
+        with override_settings(SURVEYS_FAST_READS=True):
+            cache.clear()
+            response = self.client.get(path, params)
+        return expected, response
+
+    def test_survey_list(self):
+        for params in ({}, {'page_size': 1}, {'page_size': 1, 'cursor': self.survey_1.id}):
+            with self.subTest(params=params):
+                expected, response = self.get_both(reverse('survey-list'), params)
+                self.assertEqual(expected.content, response.content)
+
+    def test_result_list(self):
+        for params in ({'user_id': 1}, {'user_id': 1, 'page_size': 1}, {'user_id': 2}, {'user_id': 4}):
+            with self.subTest(params=params):
+                expected, response = self.get_both(reverse('result-list'), params)
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(expected.content, response.content)
+
+    def test_result_json_list(self):
+        if not result_json_supported():
+            self.skipTest('Сборка JSON в базе только для PostgreSQL')
+        for params in ({'user_id': 1}, {'user_id': 1, 'page_size': 1}, {'user_id': 2}, {'user_id': 4}):
+            with self.subTest(params=params):
+                with override_settings(SURVEYS_FAST_READS=False), \
+                        mock.patch('surveys.views.result_json_supported', return_value=False):
+                    expected = self.client.get(reverse('result-list'), params)
+                response = self.client.get(reverse('result-list'), params)
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(expected.content, response.content)
+
+
+class FastJSONRendererTestCase(TestCase):
+    def test_same_as_json_renderer(self):
+        data = {
+            'date': datetime.date(2022, 1, 2),
+            'datetime': datetime.datetime(2022, 1, 2, 3, 4, 5, 123456),
+            'decimal': decimal.Decimal('1.10'),
+            'lazy': gettext_lazy('Опрос'),
+            'list': [None, True, 1, 'Строка\u2028\u2029', {'nested': 'é'}],
+        }
+        self.assertEqual(JSONRenderer().render(data), FastJSONRenderer().render(data))
+
+    def test_fallback(self):
+        data = {'big': 2 ** 70}
+        self.assertEqual(JSONRenderer().render(data), FastJSONRenderer().render(data))
+
+    def test_indent(self):
+        data = {'id': 1, 'questions': []}
+        self.assertEqual(
+            JSONRenderer().render(data, 'application/json; indent=4'),
+            FastJSONRenderer().render(data, 'application/json; indent=4')
+        )
+
+    def test_none(self):
+        self.assertEqual(b'', FastJSONRenderer().render(None))
@@ -313,7 +313,7 @@ class SerializersTestCase(TestCase):
     def test_create_answer_serializer(self):
         test_w_choice = CreateAnswerSerializer(data={
             'survey': self.survey_1.id,
-            'question': self.question_2.id,
+            'question': self.question_1.id,
             'choice': self.choice_2.id,
             'user_id': 1
         })
@@ -328,6 +328,62 @@ class SerializersTestCase(TestCase):
         self.assertTrue(test_w_choice.is_valid())
         self.assertTrue(test_w_text.is_valid())
 
+    def test_create_answer_foreign_choice_serializer(self):
+        serializer = CreateAnswerSerializer(data={
+            'survey': self.survey_1.id,
+            'question': self.question_1.id,
+            'choice': self.choice_4.id,
+            'user_id': 1
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('choice', serializer.errors)
+
+    def test_create_answer_foreign_question_serializer(self):
+        serializer = CreateAnswerSerializer(data={
+            'survey': self.survey_1.id,
+            'question': self.question_3.id,
+            'choice': self.choice_4.id,
+            'user_id': 1
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('question', serializer.errors)
+
+    def test_create_answer_unknown_survey_serializer(self):
+        serializer = CreateAnswerSerializer(data={
+            'survey': self.survey_2.id + 1,
+            'question': self.question_1.id,
+            'text': "Текст 1",
+            'user_id': 1
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('survey', serializer.errors)
+
+    def test_create_answer_serializer_without_queries(self):
+        data = {
+            'survey': self.survey_1.id,
+            'question': self.question_1.id,
+            'choice': self.choice_2.id,
+            'user_id': 1
+        }
+        CreateAnswerSerializer(data=data).is_valid()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(CreateAnswerSerializer(data=data).is_valid())
+
+    def test_create_answer_serializer_new_choice(self):
+        data = {
+            'survey': self.survey_1.id,
+            'question': self.question_2.id,
+            'user_id': 1
+        }
+        CreateAnswerSerializer(data=dict(data, text="Текст 1")).is_valid()
+        choice = Choice.objects.create(text='Choice 6', question=self.question_2)
+
+        self.assertTrue(CreateAnswerSerializer(data=dict(data, choice=choice.id)).is_valid())
+
     def test_create_answer_without_text_or_choice_serializer(self):
         data = CreateAnswerSerializer(data={
             'survey': self.survey_1.id,
@@ -0,0 +1,195 @@
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from surveys.models import Survey, Question, Choice, Answer, IngestedBatch
+from surveys.spool import AnswerSpool
+from surveys.tallies import get_survey_tallies
+
+
+class SpoolTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.spool = AnswerSpool(self.directory, fsync=False)
+
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.choice = Choice.objects.create(text='Choice 1', question=self.question)
+
+    def record(self, user_id):
+        return {
+            'survey_id': self.survey.id,
+            'question_id': self.question.id,
+            'choice_id': self.choice.id,
+            'text': None,
+            'user_id': user_id,
+        }
+
+    def test_flush(self):
+        self.spool.append([self.record(1), self.record(2)])
+        self.spool.append([self.record(3)])
+
+        count, lag = self.spool.flush()
+        self.assertEqual(3, count)
+        self.assertGreaterEqual(lag, 0)
+        self.assertEqual([1, 2, 3], list(Answer.objects.order_by('id').values_list('user_id', flat=True)))
+        self.assertEqual(3, get_survey_tallies(self.survey.id)[0]['total'])
+        self.assertEqual([], self.spool.segments())
+        self.assertEqual(0, self.spool.lag())
+
+    def test_flush_segment_once(self):
+        self.spool.append([self.record(1)])
+        path = self.spool.rotate()
+        with open(path) as segment:
+            content = segment.read()
+
+        self.spool.flush_segment(path)
+        # Процесс упал после коммита, но до удаления сегмента
+        with open(path, 'w') as segment:
+            segment.write(content)
+        count, _ = self.spool.flush_segment(path)
+        self.assertEqual(0, count)
+
+        self.assertEqual(1, Answer.objects.count())
+        self.assertEqual(1, IngestedBatch.objects.exclude(key__contains=':chunk-size:').count())
+
+    def test_append_after_torn_write(self):
+        self.spool.append([self.record(1)])
+        with open(self.spool.active_path, 'a') as active:
+            active.write('{"ts": 1, "answ')
+        self.spool.append([self.record(2)])
+
+        count, _ = self.spool.flush()
+        self.assertEqual(2, count)
+
+    def test_lag(self):
+        self.spool.append([self.record(1)])
+        self.assertGreaterEqual(self.spool.lag(), 0)
+        self.spool.rotate()
+        self.assertEqual(1, len(self.spool.segments()))
+        self.assertGreater(self.spool.lag(), 0)
+
+    def test_flush_in_chunks(self):
+        spool = AnswerSpool(self.directory, fsync=False, chunk_size=2)
+        spool.append([self.record(user_id) for user_id in range(1, 6)])
+
+        count, _ = spool.flush()
+        self.assertEqual(5, count)
+        self.assertEqual(5, Answer.objects.count())
+        self.assertEqual(3, IngestedBatch.objects.exclude(key__contains=':chunk-size:').count())
+
+    def test_resume_with_other_chunk_size(self):
+        self.spool.append([self.record(user_id) for user_id in range(1, 6)])
+        path = self.spool.rotate()
+        IngestedBatch.objects.create(key=f"spool:{os.path.basename(path)}:chunk-size:2")
+
+        self.assertRaises(ValueError, self.spool.flush_segment, path)
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(Answer.objects.exists())
+
+    def test_rotate_on_max_bytes(self):
+        spool = AnswerSpool(self.directory, fsync=False, max_bytes=1)
+        spool.append([self.record(1)])
+        spool.append([self.record(2)])
+
+        self.assertEqual(2, len(spool.segments()))
+        self.assertEqual(0, spool.active_size())
+        self.assertEqual(2, spool.flush()[0])
+
+    def test_dead_letter(self):
+        missing = dict(self.record(2), question_id=self.question.id + 100)
+        self.spool.append([self.record(1), missing, self.record(3)])
+
+        count, _ = self.spool.flush()
+        self.assertEqual(2, count)
+        self.assertEqual([1, 3], list(Answer.objects.order_by('id').values_list('user_id', flat=True)))
+        self.assertEqual([], self.spool.segments())
+        with open(self.spool.dead_letter_path, encoding='utf-8') as dead_letter:
+            entries = [json.loads(line) for line in dead_letter]
+        self.assertEqual([missing], [entry['answer'] for entry in entries])
+        self.assertIn('error', entries[0])
+
+    def test_flush_command(self):
+        self.spool.append([self.record(1)])
+        output = io.StringIO()
+        with override_settings(SURVEYS_ANSWER_SPOOL_DIR=self.directory):
+            call_command('flush_answers', '--once', stdout=output)
+        self.assertEqual(1, Answer.objects.count())
+        self.assertIn('Загружено ответов: 1', output.getvalue())
+
+
+class SpoolApiTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.choice = Choice.objects.create(text='Choice 1', question=self.question)
+
+    def test_create_result_spooled(self):
+        url = reverse('result-list')
+        data = {
+            "user_id": 1,
+            "survey": self.survey.id,
+            "question": self.question.id,
+            "choice": self.choice.id
+        }
+        with override_settings(SURVEYS_ANSWER_SPOOL_DIR=self.directory):
+            response = self.client.post(url, data=json.dumps(data), content_type='application/json')
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+        self.assertEqual(dict(data, text=None), response.data)
+        self.assertEqual(0, Answer.objects.count())
+        self.assertTrue(os.path.getsize(os.path.join(self.directory, AnswerSpool.ACTIVE_NAME)))
+
+        AnswerSpool(self.directory).flush()
+        self.assertEqual(1, Answer.objects.filter(user_id=1, choice=self.choice).count())
+
+    def test_create_batch_result_spooled(self):
+        url = reverse('result-batch')
+        data = {
+            "user_id": 1,
+            "survey": self.survey.id,
+            "answers": [{"question": self.question.id, "choice": self.choice.id}]
+        }
+        with override_settings(SURVEYS_ANSWER_SPOOL_DIR=self.directory):
+            response = self.client.post(url, data=json.dumps(data), content_type='application/json')
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+        self.assertEqual(0, Answer.objects.count())
+
+        AnswerSpool(self.directory).flush()
+        self.assertEqual(1, Answer.objects.count())
+
+    def test_metrics(self):
+        AnswerSpool(self.directory).append([{
+            'survey_id': self.survey.id,
+            'question_id': self.question.id,
+            'choice_id': self.choice.id,
+            'text': None,
+            'user_id': 1,
+        }])
+        with override_settings(SURVEYS_ANSWER_SPOOL_DIR=self.directory):
+            response = self.client.get(reverse('metrics'))
+        self.assertIn(b'surveys_answer_spool_lag_seconds', response.content)
+        self.assertIn(b'surveys_answer_spool_segments 0.0', response.content)
+        self.assertNotIn(b'surveys_answer_spool', self.client.get(reverse('metrics')).content)
@@ -0,0 +1,148 @@
+import datetime
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from surveys.models import Survey, Question, Choice, Answer, AnswerTally
+from surveys.tallies import increment_tallies, decrement_tallies, get_survey_tallies, rebuild_tallies
+
+
+class TalliesTestCase(TestCase):
+    def setUp(self) -> None:
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question_1 = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.question_2 = Question.objects.create(text='Текст 2', type=Question.TYPE_TEXT, survey=self.survey)
+        self.choice_1 = Choice.objects.create(text='Choice 1', question=self.question_1)
+        self.choice_2 = Choice.objects.create(text='Choice 2', question=self.question_1)
+
+    def create_answers(self):
+        answers = [
+            Answer(user_id=user_id, survey=self.survey, question=self.question_1, choice=self.choice_1)
+            for user_id in range(5)
+        ] + [
+            Answer(user_id=user_id, survey=self.survey, question=self.question_2, text='Текст')
+            for user_id in range(3)
+        ]
+        Answer.objects.bulk_create(answers)
+        return answers
+
+    def expected_tallies(self, choice_1, choice_2, text):
+        return [
+            {
+                'id': self.question_1.id,
+                'total': choice_1 + choice_2,
+                'choices': [
+                    {'id': self.choice_1.id, 'total': choice_1},
+                    {'id': self.choice_2.id, 'total': choice_2},
+                ],
+            },
+            {
+                'id': self.question_2.id,
+                'total': text,
+                'choices': [],
+            },
+        ]
+
+    def test_increment_tallies(self):
+        for answer in self.create_answers():
+            increment_tallies([answer])
+        self.assertEqual(self.expected_tallies(5, 0, 3), get_survey_tallies(self.survey.id))
+
+    @override_settings(SURVEYS_TALLY_SHARDS=4)
+    def test_increment_tallies_sharded(self):
+        for answer in self.create_answers() * 10:
+            increment_tallies([answer])
+        self.assertEqual(self.expected_tallies(50, 0, 30), get_survey_tallies(self.survey.id))
+        self.assertTrue(AnswerTally.objects.filter(choice=self.choice_1).count() <= 4)
+
+    @override_settings(SURVEYS_TALLY_SHARDS=4)
+    def test_decrement_tallies(self):
+        answers = self.create_answers()
+        increment_tallies(answers)
+        decrement_tallies(answers[:2] + answers[-1:])
+        self.assertEqual(self.expected_tallies(3, 0, 2), get_survey_tallies(self.survey.id))
+
+    def test_delete_choice_removes_its_tallies(self):
+        increment_tallies(self.create_answers())
+        self.choice_1.delete()
+        self.assertEqual(
+            [{'id': self.question_1.id, 'total': 0, 'choices': [{'id': self.choice_2.id, 'total': 0}]},
+             self.expected_tallies(0, 0, 3)[1]],
+            get_survey_tallies(self.survey.id)
+        )
+
+    def test_rebuild_tallies(self):
+        self.create_answers()
+        AnswerTally.objects.create(question=self.question_1, choice=self.choice_2, shard=0, count=100)
+
+        self.assertEqual(2, rebuild_tallies([self.survey.id]))
+        self.assertEqual(self.expected_tallies(5, 0, 3), get_survey_tallies(self.survey.id))
+
+    def test_rebuild_tallies_command(self):
+        self.create_answers()
+        call_command('rebuild_tallies', stdout=io.StringIO())
+        self.assertEqual(self.expected_tallies(5, 0, 3), get_survey_tallies(self.survey.id))
+
+    def test_num_queries_survey_tallies(self):
+        increment_tallies(self.create_answers())
+        with self.assertNumQueries(3):
+            get_survey_tallies(self.survey.id)
+
+
+class ReportApiTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_RADIO, survey=self.survey)
+        self.choice_1 = Choice.objects.create(text='Choice 1', question=self.question)
+        self.choice_2 = Choice.objects.create(text='Choice 2', question=self.question)
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(self.admin)
+
+    def test_report_counts_created_answers(self):
+        url = reverse('result-list')
+        for choice in (self.choice_1, self.choice_2, self.choice_2):
+            data = {
+                "user_id": 1,
+                "survey": self.survey.id,
+                "question": self.question.id,
+                "choice": choice.id
+            }
+            self.client.post(url, data=json.dumps(data), content_type='application/json')
+
+        response = self.client.get(reverse('report-detail', args=(self.survey.id,)))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        expected_data = {
+            'id': self.survey.id,
+            'name': 'Название 1',
+            'questions': [
+                {
+                    'id': self.question.id,
+                    'total': 3,
+                    'choices': [
+                        {'id': self.choice_1.id, 'total': 1},
+                        {'id': self.choice_2.id, 'total': 2},
+                    ],
+                },
+            ],
+        }
+        self.assertEqual(expected_data, response.json())
+
+    def test_report_not_found(self):
+        response = self.client.get(reverse('report-detail', args=(self.survey.id + 1,)))
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
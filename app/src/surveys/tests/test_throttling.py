@@ -0,0 +1,95 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from surveys.checks import check_throttle_cache
+from surveys.models import Survey, Question, Answer
+from surveys.throttling import WRITES_IN_FLIGHT_KEY
+
+
+class AnswerThrottlingTestCase(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        self.question = Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+
+    def post(self, user_id, url_name='result-list'):
+        if url_name == 'result-batch':
+            data = {'user_id': user_id, 'survey': self.survey.id,
+                    'answers': [{'question': self.question.id, 'text': 'Ответ'}]}
+        else:
+            data = {'user_id': user_id, 'survey': self.survey.id, 'question': self.question.id, 'text': 'Ответ'}
+        return self.client.post(reverse(url_name), data, format='json')
+
+    @override_settings(SURVEYS_THROTTLE_USER_RATE=0.5, SURVEYS_THROTTLE_USER_BURST=2)
+    def test_user_rate(self):
+        with mock.patch('surveys.throttling.time.time', return_value=1002.0):
+            self.assertEqual(status.HTTP_201_CREATED, self.post(1).status_code)
+            self.assertEqual(status.HTTP_201_CREATED, self.post(1, 'result-batch').status_code)
+
+            response = self.post(1)
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+            self.assertEqual('2', response['Retry-After'])
+            self.assertEqual(status.HTTP_201_CREATED, self.post(2).status_code)
+        self.assertEqual(3, Answer.objects.count())
+
+    @override_settings(SURVEYS_THROTTLE_USER_RATE=1, SURVEYS_THROTTLE_USER_BURST=1)
+    def test_refill(self):
+        now = 1000.0
+        with mock.patch('surveys.throttling.time.time', return_value=now):
+            self.assertEqual(status.HTTP_201_CREATED, self.post(1).status_code)
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, self.post(1).status_code)
+        with mock.patch('surveys.throttling.time.time', return_value=now + 1):
+            self.assertEqual(status.HTTP_201_CREATED, self.post(1).status_code)
+
+    @override_settings(SURVEYS_THROTTLE_GLOBAL_RATE=1, SURVEYS_THROTTLE_GLOBAL_BURST=2)
+    def test_global_rate(self):
+        with mock.patch('surveys.throttling.time.time', return_value=1000.0):
+            self.assertEqual(status.HTTP_201_CREATED, self.post(1).status_code)
+            self.assertEqual(status.HTTP_201_CREATED, self.post(2).status_code)
+            self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, self.post(3).status_code)
+
+    @override_settings(SURVEYS_THROTTLE_GLOBAL_RATE=1, SURVEYS_THROTTLE_GLOBAL_BURST=1)
+    def test_reads_not_throttled(self):
+        self.post(1)
+        self.post(1)
+        response = self.client.get(reverse('result-list'), {'user_id': 1})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    @override_settings(SURVEYS_WRITE_CONCURRENCY=1, SURVEYS_WRITE_RETRY_AFTER=3)
+    def test_concurrency_cap(self):
+        # Запись в другом процессе
+        cache.set(WRITES_IN_FLIGHT_KEY, 1)
+        with self.assertNumQueries(0):
+            response = self.post(1)
+        self.assertEqual(status.HTTP_503_SERVICE_UNAVAILABLE, response.status_code)
+        self.assertEqual('3', response['Retry-After'])
+        self.assertEqual(1, cache.get(WRITES_IN_FLIGHT_KEY))
+
+        cache.decr(WRITES_IN_FLIGHT_KEY)
+        self.assertEqual(status.HTTP_201_CREATED, self.post(1).status_code)
+        self.assertEqual(0, cache.get(WRITES_IN_FLIGHT_KEY))
+
+    @override_settings(SURVEYS_WRITE_CONCURRENCY=1)
+    def test_concurrency_counter_expired(self):
+        self.assertEqual(status.HTTP_201_CREATED, self.post(1).status_code)
+        cache.delete(WRITES_IN_FLIGHT_KEY)
+        self.assertEqual(status.HTTP_201_CREATED, self.post(1).status_code)
+
+    @override_settings(SURVEYS_THROTTLE_USER_RATE=1)
+    def test_process_local_cache(self):
+        self.assertEqual(['surveys.E002'], [error.id for error in check_throttle_cache(None)])
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': 'memcached:11211'}
+        }):
+            self.assertEqual([], check_throttle_cache(None))
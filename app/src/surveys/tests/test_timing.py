@@ -0,0 +1,70 @@
+import datetime
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from surveys.models import Survey, Question
+from surveys.timing import RequestTiming, activate_timing, deactivate_timing, timed
+
+
+class ServerTimingMiddlewareTestCase(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.survey = Survey.objects.create(
+            name='Название 1',
+            start_at=datetime.date.today(),
+            end_at=datetime.date.today() + datetime.timedelta(days=1),
+            description='Описание 1'
+        )
+        Question.objects.create(text='Текст 1', type=Question.TYPE_TEXT, survey=self.survey)
+
+    @override_settings(SURVEYS_TIMING_SAMPLE_RATE=1)
+    def test_server_timing(self):
+        with self.assertLogs('surveys.timing', 'INFO') as logs:
+            response = self.client.get(reverse('survey-detail', args=(self.survey.id,)))
+
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(['db', 'serialize', 'total'], metrics)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual('GET', record['method'])
+        self.assertEqual(200, record['status'])
+        self.assertGreater(record['db_queries'], 0)
+        self.assertIn('serialize_ms', record)
+        self.assertIn('total_ms', record)
+
+    @override_settings(SURVEYS_TIMING_SAMPLE_RATE=1)
+    def test_cached_response_without_serialize(self):
+        self.client.get(reverse('survey-detail', args=(self.survey.id,)))
+        with self.assertLogs('surveys.timing', 'INFO'):
+            response = self.client.get(reverse('survey-detail', args=(self.survey.id,)))
+        self.assertTrue(response['Server-Timing'].startswith('db;dur=0.00;desc="0 queries"'))
+        self.assertNotIn('serialize', response['Server-Timing'])
+
+    @override_settings(SURVEYS_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get(reverse('survey-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class TimedTestCase(TestCase):
+    def test_timed_without_timing(self):
+        with timed('serialize') as block:
+            pass
+        self.assertIsNone(block.timing)
+
+    def test_timed(self):
+        timing = RequestTiming()
+        token = activate_timing(timing)
+        try:
+            with timed('serialize'):
+                pass
+            with timed('serialize'):
+                pass
+        finally:
+            deactivate_timing(token)
+        timing.finish()
+        self.assertEqual({'db_queries', 'db_ms', 'serialize_ms', 'total_ms'}, set(timing.as_dict()))
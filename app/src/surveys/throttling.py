@@ -0,0 +1,130 @@
+import functools
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions, status
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_KEY = 'surveys:throttle:{}:{}:{}'
+WRITES_IN_FLIGHT_KEY = 'surveys:writes:in-flight'
+# Счетчик одновременных записей создается заново раз в WRITES_IN_FLIGHT_TIMEOUT
+# секунд, поэтому записи упавших процессов не занимают лимит дольше
+WRITES_IN_FLIGHT_TIMEOUT = 60
+
+
+def increment(key: str, timeout: int) -> int:
+    """
+    Атомарно увеличивает счетчик в кеше, создавая его с timeout
+
+    :return int: новое значение счетчика
+    """
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=timeout):
+            return 1
+        return cache.incr(key)
+
+
+def decrement(key: str) -> None:
+    try:
+        cache.decr(key)
+    except ValueError:
+        # Счетчик уже истек
+        pass
+
+
+class WindowThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов счетчиком в общем кеше
+    Время делится на окна по burst / rate секунд, в окне разрешено burst
+    запросов, поэтому в среднем выходит rate запросов в секунду.
+    Счетчик окна увеличивается атомарно (cache.add и cache.incr),
+    поэтому лимит соблюдается всеми процессами. На границе окон
+    может пройти до 2 * burst запросов подряд
+    """
+    scope = None
+    rate_setting = None
+    burst_setting = None
+
+    def __init__(self):
+        self.rate = getattr(settings, self.rate_setting, None)
+        self.burst = getattr(settings, self.burst_setting, None) or max(self.rate or 1, 1)
+        self.wait_seconds = None
+
+    def get_bucket_id(self, request, view):
+        """ :return: идентификатор счетчика или None, чтобы не ограничивать запрос """
+        raise NotImplementedError('.get_bucket_id() must be overridden')
+
+    def allow_request(self, request, view):
+        if not self.rate:
+            return True
+        bucket_id = self.get_bucket_id(request, view)
+        if bucket_id is None:
+            return True
+
+        window = self.burst / self.rate
+        number, elapsed = divmod(time.time(), window)
+        key = THROTTLE_KEY.format(self.scope, bucket_id, int(number))
+        if increment(key, timeout=math.ceil(window) + 1) <= self.burst:
+            return True
+        self.wait_seconds = window - elapsed
+        return False
+
+    def wait(self):
+        return math.ceil(self.wait_seconds) if self.wait_seconds is not None else None
+
+
+class AnswerUserThrottle(WindowThrottle):
+    """ Записи ответов одного пользователя: SURVEYS_THROTTLE_USER_RATE в секунду """
+    scope = 'user'
+    rate_setting = 'SURVEYS_THROTTLE_USER_RATE'
+    burst_setting = 'SURVEYS_THROTTLE_USER_BURST'
+
+    def get_bucket_id(self, request, view):
+        try:
+            return int(request.data.get('user_id'))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+
+class AnswerGlobalThrottle(WindowThrottle):
+    """ Все записи ответов: SURVEYS_THROTTLE_GLOBAL_RATE в секунду """
+    scope = 'global'
+    rate_setting = 'SURVEYS_THROTTLE_GLOBAL_RATE'
+    burst_setting = 'SURVEYS_THROTTLE_GLOBAL_BURST'
+
+    def get_bucket_id(self, request, view):
+        return 'all'
+
+
+class WritesOverloaded(exceptions.Throttled):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервис перегружен, повторите запрос позже.'
+    default_code = 'overloaded'
+
+
+def limit_write_concurrency(action):
+    """
+    Не больше SURVEYS_WRITE_CONCURRENCY одновременных записей ответов
+    во всех процессах: число записей хранится в общем кеше.
+    Лишние запросы сразу получают 503 с Retry-After,
+    не занимая подключение к базе
+    """
+
+    @functools.wraps(action)
+    def wrapper(view, request, *args, **kwargs):
+        limit = getattr(settings, 'SURVEYS_WRITE_CONCURRENCY', None)
+        if not limit:
+            return action(view, request, *args, **kwargs)
+        if increment(WRITES_IN_FLIGHT_KEY, timeout=WRITES_IN_FLIGHT_TIMEOUT) > limit:
+            decrement(WRITES_IN_FLIGHT_KEY)
+            raise WritesOverloaded(wait=getattr(settings, 'SURVEYS_WRITE_RETRY_AFTER', 1))
+        try:
+            return action(view, request, *args, **kwargs)
+        finally:
+            decrement(WRITES_IN_FLIGHT_KEY)
+
+    return wrapper
@@ -0,0 +1,94 @@
+import contextvars
+import time
+
+_current_timing = contextvars.ContextVar('surveys_request_timing', default=None)
+
+
+class RequestTiming:
+    """
+    Замеры одного запроса: количество и время SQL запросов,
+    время сериализации и общее время
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.durations = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """ Обертка connection.execute_wrapper """
+        begin = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - begin
+
+    def add(self, name: str, duration: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def finish(self) -> None:
+        self.total = time.perf_counter() - self.started
+
+    def as_dict(self) -> dict:
+        """ Замеры в миллисекундах """
+        data = {
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 2),
+        }
+        data.update((f"{name}_ms", round(duration * 1000, 2)) for name, duration in self.durations.items())
+        if self.total is not None:
+            data['total_ms'] = round(self.total * 1000, 2)
+        return data
+
+    def server_timing(self) -> str:
+        """ Значение заголовка Server-Timing """
+        metrics = [f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"']
+        metrics.extend(f"{name};dur={duration * 1000:.2f}" for name, duration in self.durations.items())
+        if self.total is not None:
+            metrics.append(f"total;dur={self.total * 1000:.2f}")
+        return ', '.join(metrics)
+
+
+def get_current_timing():
+    """
+    Замеры текущего запроса
+
+    :return: RequestTiming или None, если запрос не попал в выборку
+    """
+    return _current_timing.get()
+
+
+def activate_timing(timing):
+    """ :return: токен для deactivate_timing """
+    return _current_timing.set(timing)
+
+
+def deactivate_timing(token) -> None:
+    _current_timing.reset(token)
+
+
+class timed:
+    """
+    Замер участка кода, который добавляется к замерам текущего запроса
+    Если запрос не попал в выборку, ничего не делает
+
+        with timed('serialize'):
+            data = serializer.data
+    """
+    __slots__ = ('name', 'timing', 'begin')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timing = _current_timing.get()
+        if self.timing is not None:
+            self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timing is not None:
+            self.timing.add(self.name, time.perf_counter() - self.begin)
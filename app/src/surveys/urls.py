@@ -1,8 +1,10 @@
 from rest_framework.routers import SimpleRouter
 
-from surveys.views import ActiveSurveysViewSet, ResultViewSet
+from surveys.views import ActiveSurveysViewSet, ResultViewSet, SurveyReportViewSet, SurveyAuthoringViewSet
 
 router = SimpleRouter()
 
 router.register(r'survey', ActiveSurveysViewSet, basename='survey')
 router.register(r'result', ResultViewSet, basename='result')
+router.register(r'report', SurveyReportViewSet, basename='report')
+router.register(r'authoring', SurveyAuthoringViewSet, basename='authoring')
@@ -1,17 +1,39 @@
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-from rest_framework import viewsets, exceptions
-from rest_framework.mixins import CreateModelMixin, ListModelMixin
+from rest_framework import viewsets, exceptions, status
+from rest_framework.decorators import action
+from rest_framework.mixins import CreateModelMixin, ListModelMixin, UpdateModelMixin
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
+from surveys.authoring import save_survey_document
+from surveys.cache import get_active_surveys, get_active_surveys_modified, get_survey_snapshot
+from surveys.cloning import clone_survey
+from surveys.conditional import conditional_response, survey_validators, surveys_list_validators
+from surveys.db_routers import pin_user_to_primary
+from surveys.documents import result_documents_enabled, get_result_documents, get_fresh_documents
+from surveys.exports import EXPORT_FORMATS, iter_answer_rows
+from surveys.idempotency import idempotent
 from surveys.models import Survey
-from surveys.querysets import get_result_queryset
+from surveys.querysets import get_result_queryset, result_json_supported, get_result_json
+from surveys.rows import fast_reads_enabled, survey_rows, get_result_values, result_rows
 from surveys.serializers import (
     SurveysSerializer,
     SurveysRetrieveSerializer,
     CreateAnswerSerializer,
-    ResultHandleSerializer
+    CreateSurveyAnswersSerializer,
+    ResultHandleSerializer,
+    SurveyTallySerializer,
+    SurveyDocumentSerializer,
+    SurveyCloneSerializer
 )
+from surveys.spool import get_answer_spool
+from surveys.tallies import get_survey_tallies
+from surveys.throttling import AnswerUserThrottle, AnswerGlobalThrottle, limit_write_concurrency
+from surveys.timing import timed
 
 
 class ActiveSurveysViewSet(viewsets.ReadOnlyModelViewSet):
@@ -19,6 +41,33 @@ class ActiveSurveysViewSet(viewsets.ReadOnlyModelViewSet):
         Активные опросы
     """
 
+    def list(self, request, *args, **kwargs):
+        surveys = get_active_surveys()
+        etag, last_modified = surveys_list_validators(
+            surveys, timezone.now().date(), get_active_surveys_modified(), request.get_full_path()
+        )
+        return conditional_response(request, etag, last_modified, lambda: self._render_list(surveys))
+
+    def _render_list(self, surveys):
+        page = self.paginate_queryset(surveys)
+        with timed('serialize'):
+            if fast_reads_enabled():
+                data = survey_rows(page)
+            else:
+                data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        surveys = {str(survey.id): survey for survey in get_active_surveys()}
+        survey = surveys.get(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if survey is None:
+            raise Http404
+        etag, last_modified = survey_validators(survey)
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: HttpResponse(get_survey_snapshot(survey), content_type='application/json')
+        )
+
     def get_serializer_class(self):
         if 'list' in self.action:
             return SurveysSerializer
@@ -46,20 +95,174 @@ class ResultViewSet(
         description="Обязательный параметр user_id",
         type=openapi.TYPE_INTEGER)
 
+    idempotency_key_param = openapi.Parameter(
+        'Idempotency-Key',
+        openapi.IN_HEADER,
+        description="Ключ повтора: запрос с тем же ключом вернет сохраненный ответ",
+        type=openapi.TYPE_STRING)
+
     @swagger_auto_schema(manual_parameters=[user_id_param])
     def list(self, request, *args, **kwargs):
-        return super().list(self, request, *args, **kwargs)
+        if result_documents_enabled():
+            user_id = self.get_user_id()
+            self.cursor_field = 'survey_id'
+            page = self.paginate_queryset(get_result_documents(user_id))
+            documents = get_fresh_documents(page, user_id)
+            with timed('serialize'):
+                return self.paginator.get_prerendered_response(documents)
+
+        if result_json_supported():
+            user_id = self.get_user_id()
+            documents = self.paginator.paginate_rows(
+                lambda cursor, limit: get_result_json(user_id, cursor, limit), request
+            )
+            return self.paginator.get_prerendered_response(documents)
+
+        if fast_reads_enabled():
+            user_id = self.get_user_id()
+            page = self.paginate_queryset(get_result_values(user_id, self.paginator.get_cursor(request)))
+            with timed('serialize'):
+                data = result_rows(page, user_id)
+            return self.get_paginated_response(data)
+
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        with timed('serialize'):
+            data = serializer.data
+        return self.get_paginated_response(data)
+
+    @swagger_auto_schema(manual_parameters=[idempotency_key_param])
+    @idempotent
+    @limit_write_concurrency
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self.save_answers(serializer)
+
+    @swagger_auto_schema(manual_parameters=[idempotency_key_param])
+    @action(detail=False, methods=['post'])
+    @idempotent
+    @limit_write_concurrency
+    def batch(self, request, *args, **kwargs):
+        """
+            Все ответы на опрос одним запросом
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self.save_answers(serializer)
+
+    def save_answers(self, serializer):
+        """
+        Записывает ответы в базу или, если включена отложенная запись,
+        в журнал ответов. Во втором случае возвращает 202
+        """
+        spool = get_answer_spool()
+        if spool is not None:
+            spool.append(serializer.get_answer_records())
+            response_status = status.HTTP_202_ACCEPTED
+        else:
+            serializer.save()
+            pin_user_to_primary(serializer.validated_data['user_id'])
+            response_status = status.HTTP_201_CREATED
+        with timed('serialize'):
+            data = serializer.data
+        return Response(data, status=response_status)
+
+    def get_throttles(self):
+        if self.action in ('create', 'batch'):
+            return [AnswerUserThrottle(), AnswerGlobalThrottle()]
+        return super().get_throttles()
 
     def get_serializer_class(self):
+        if 'batch' in self.action:
+            return CreateSurveyAnswersSerializer
         if 'create' in self.action:
             return CreateAnswerSerializer
         if 'list' in self.action:
             return ResultHandleSerializer
 
-    def get_queryset(self):
+    def get_user_id(self) -> int:
         user_id = self.request.query_params.get('user_id')
         if not user_id:
             raise exceptions.ParseError('Требуется user_id')
+        return int(user_id)
 
-        queryset = get_result_queryset(int(user_id))
+    def get_queryset(self):
+        queryset = get_result_queryset(self.get_user_id(), self.paginator.get_cursor(self.request))
         return queryset
+
+
+class SurveyAuthoringViewSet(
+    CreateModelMixin,
+    UpdateModelMixin,
+    viewsets.GenericViewSet
+):
+    """
+        Создание и изменение опроса с вопросами и вариантами ответа одним запросом
+        Вопросы и варианты с id изменяются, без id - создаются,
+        отсутствующие в документе - удаляются
+    """
+    queryset = Survey.objects.all()
+    serializer_class = SurveyDocumentSerializer
+    permission_classes = (IsAdminUser,)
+
+    def perform_create(self, serializer):
+        serializer.instance = save_survey_document(serializer.validated_data)
+
+    def perform_update(self, serializer):
+        serializer.instance = save_survey_document(serializer.validated_data, serializer.instance)
+
+    @swagger_auto_schema(request_body=SurveyCloneSerializer, responses={201: SurveyDocumentSerializer})
+    @action(detail=True, methods=['post'])
+    def clone(self, request, *args, **kwargs):
+        """
+            Копия опроса с вопросами и вариантами ответа на новые даты
+        """
+        survey = self.get_object()
+        serializer = SurveyCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        clone = clone_survey(survey, **serializer.validated_data)
+        return Response(self.get_serializer(clone).data, status=status.HTTP_201_CREATED)
+
+
+class SurveyReportViewSet(viewsets.GenericViewSet):
+    """
+        Отчеты по опросам
+    """
+    queryset = Survey.objects.all()
+    serializer_class = SurveyTallySerializer
+    permission_classes = (IsAdminUser,)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+            Количество ответов на вопросы и варианты ответов опроса
+        """
+        survey = self.get_object()
+        data = {'id': survey.id, 'name': survey.name, 'questions': get_survey_tallies(survey.id)}
+        with timed('serialize'):
+            data = self.get_serializer(data).data
+        return Response(data)
+
+    export_format_param = openapi.Parameter(
+        'export_format',
+        openapi.IN_QUERY,
+        description="Формат выгрузки",
+        type=openapi.TYPE_STRING,
+        enum=list(EXPORT_FORMATS),
+        default='csv')
+
+    @swagger_auto_schema(manual_parameters=[export_format_param], responses={200: 'Файл с ответами'})
+    @action(detail=True)
+    def export(self, request, *args, **kwargs):
+        """
+            Потоковая выгрузка всех ответов опроса
+        """
+        survey = self.get_object()
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise exceptions.ParseError('Неизвестный формат выгрузки')
+
+        write_rows, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(write_rows(iter_answer_rows(survey.id)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="survey_{survey.id}.{export_format}"'
+        return response